@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark.py – pomiar wydajności etapów konwertera na sztucznych danych (1x / 10x / 100x)
+
+Dla każdej skali:
+  1) synthetic_data.generuj() tworzy w katalogu tymczasowym całe ./mnt/data,
+  2) każdy etap (kluby.py, main.py, merge_outputs.py, tworzenie_wystepowania_*)
+     uruchamiany jest w osobnym procesie, z cwd = katalog roboczy – skrypty używają
+     ścieżek względnych i robią część pracy przy imporcie,
+  3) proces etapu mierzy czas, szczyt RSS (swój i procesów potomnych, np. puli main.py)
+     i opcjonalnie szczyt tracemalloc (--tracemalloc, spowalnia kilkukrotnie).
+Wyniki trafiają do JSON; --porownaj stary.json pokazuje zmiany czasu i pamięci.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import synthetic_data
+
+KOD_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = "./mnt/data/output/benchmark"
+
+SKALE = (1, 10, 100)
+PROG_REGRESJI = 1.2         # wolniej / więcej pamięci o > 20% = regresja
+
+# (nazwa, skrypt, argumenty) – w kolejności zależności
+ETAPY = (
+    ("kluby", "kluby.py", []),
+    ("main", "main.py", []),
+    ("merge", "merge_outputs.py", []),
+    ("wystepowanie_lista", "tworzenie_wystepowania_z_listy_zawodnikow.py", []),
+    ("wystepowanie_xlsx", "tworzenie_wystepowania_z_xlsx.py", []),
+    ("wystepowanie_ankieta", "tworzenie_wystepowania_z_ankiety.py", []),
+)
+
+
+# -------------------------------
+# Proces etapu
+# -------------------------------
+
+def _maxrss_mb(kto) -> float:
+    """ru_maxrss w MB (Linux podaje KB, macOS bajty)."""
+    rss = resource.getrusage(kto).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def uruchom_w_procesie(skrypt: str, argv: list, wynik_path: str, z_tracemalloc: bool = False) -> None:
+    """Wykonuje skrypt jak `python skrypt argv` (w bieżącym procesie) i zapisuje pomiary."""
+    sys.argv = [skrypt] + list(argv)
+    if z_tracemalloc:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    runpy.run_path(skrypt, run_name="__main__")
+    czas = time.perf_counter() - start
+
+    pomiar = {
+        "czas_s": round(czas, 4),
+        "rss_mb": round(_maxrss_mb(resource.RUSAGE_SELF), 1),
+        "rss_potomne_mb": round(_maxrss_mb(resource.RUSAGE_CHILDREN), 1),
+    }
+    if z_tracemalloc:
+        pomiar["tracemalloc_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+
+    with open(wynik_path, "w", encoding="utf-8") as f:
+        json.dump(pomiar, f)
+
+
+def zmierz_etap(katalog: str, skrypt: str, argv: list, z_tracemalloc: bool = False) -> dict:
+    """Uruchamia etap w nowym procesie z cwd = katalog; zwraca pomiary albo opis błędu."""
+    wynik_path = os.path.join(katalog, ".pomiar.json")
+    if os.path.exists(wynik_path):
+        os.remove(wynik_path)
+
+    cmd = [sys.executable, os.path.abspath(__file__), "--etap", os.path.join(KOD_DIR, skrypt), wynik_path]
+    if z_tracemalloc:
+        cmd.append("--tracemalloc")
+    cmd += ["--"] + list(argv)
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [KOD_DIR, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=katalog, env=env, capture_output=True, text=True)
+    calosc = time.perf_counter() - start
+
+    if proc.returncode != 0 or not os.path.exists(wynik_path):
+        ogon = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+        return {"blad": "\n".join(ogon), "calosc_s": round(calosc, 4)}
+
+    with open(wynik_path, encoding="utf-8") as f:
+        pomiar = json.load(f)
+    pomiar["calosc_s"] = round(calosc, 4)      # z uruchomieniem interpretera i importami
+    return pomiar
+
+
+# -------------------------------
+# Skale
+# -------------------------------
+
+def zmierz_skale(skala: int, etapy=ETAPY, main_args=(), powtorzenia: int = 1,
+                 z_tracemalloc: bool = False, katalog: str = None, zostaw: bool = False) -> dict:
+    """Generuje dane dla skali i mierzy wszystkie etapy (najlepszy czas z powtórzeń)."""
+    katalog = katalog or tempfile.mkdtemp(prefix=f"bench_{skala}x_")
+    try:
+        start = time.perf_counter()
+        dane = synthetic_data.generuj(katalog, **synthetic_data.parametry_skali(skala))
+        dane["generowanie_s"] = round(time.perf_counter() - start, 2)
+        print(f"📦 {skala}x: {dane['pliki']} plików rund, {dane['miejsca']} miejsc ({dane['generowanie_s']} s)")
+
+        wyniki = {}
+        for nazwa, skrypt, argv in etapy:
+            argv = list(argv) + (list(main_args) if nazwa == "main" else [])
+            pomiary = [zmierz_etap(katalog, skrypt, argv, z_tracemalloc) for _ in range(powtorzenia)]
+            bledy = [p for p in pomiary if "blad" in p]
+            if bledy:
+                wyniki[nazwa] = bledy[0]
+                print(f"   ❌ {nazwa}: {bledy[0]['blad'].splitlines()[-1] if bledy[0]['blad'] else 'błąd'}")
+                continue
+
+            najlepszy = min(pomiary, key=lambda p: p["czas_s"])
+            najlepszy["czasy_s"] = [p["czas_s"] for p in pomiary]
+            if nazwa == "main" and dane["miejsca"]:
+                najlepszy["miejsca_na_s"] = round(dane["miejsca"] / max(najlepszy["czas_s"], 1e-9))
+            wyniki[nazwa] = najlepszy
+            print(f"   ⏱️ {nazwa:<22} {najlepszy['czas_s']:>9.3f} s   RSS {najlepszy['rss_mb']:>8.1f} MB")
+
+        return {"dane": dane, "etapy": wyniki}
+    finally:
+        if zostaw:
+            print(f"   📁 Dane zostawione w {katalog}")
+        else:
+            shutil.rmtree(katalog, ignore_errors=True)
+
+
+def porownaj(stary: dict, nowy: dict, prog: float = PROG_REGRESJI) -> list:
+    """Lista regresji (skala, etap, miara, stara, nowa) – wypisuje też pełne porównanie."""
+    regresje = []
+    if stary.get("tracemalloc") != nowy.get("tracemalloc") or stary.get("main_args") != nowy.get("main_args"):
+        print("⚠ Pomiary z innymi ustawieniami (--tracemalloc / --main-args) – czasy nieporównywalne")
+    for skala, wynik in nowy["skale"].items():
+        poprzedni = stary.get("skale", {}).get(skala)
+        if not poprzedni:
+            continue
+        print(f"📊 {skala}x vs {stary.get('utworzono', '?')}")
+        for etap, pomiar in wynik["etapy"].items():
+            p = poprzedni["etapy"].get(etap)
+            if not p or "blad" in p or "blad" in pomiar:
+                continue
+            for miara in ("czas_s", "rss_mb"):
+                a, b = p[miara], pomiar[miara]
+                zmiana = b / a if a else 1.0
+                znak = "⚠" if zmiana > prog else "✔"
+                print(f"   {znak} {etap:<22} {miara:<7} {a:>9.3f} -> {b:>9.3f} ({zmiana:.2f}x)")
+                if zmiana > prog:
+                    regresje.append((skala, etap, miara, a, b))
+    return regresje
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark etapów konwertera na sztucznych danych.")
+    ap.add_argument("--skale", type=int, nargs="+", default=list(SKALE))
+    ap.add_argument("--etapy", nargs="+", choices=[e[0] for e in ETAPY], help="domyślnie wszystkie")
+    ap.add_argument("--main-args", default="", help="dodatkowe argumenty main.py, np. --main-args=\"--workers 0\"")
+    ap.add_argument("--powtorzenia", type=int, default=1, help="uruchomień etapu; liczy się najlepszy czas")
+    ap.add_argument("--tracemalloc", action="store_true", help="mierz też szczyt alokacji Pythona (wolniej)")
+    ap.add_argument("--zostaw", action="store_true", help="nie usuwaj katalogów z wygenerowanymi danymi")
+    ap.add_argument("--out", default=None, help=f"plik JSON z wynikami (domyślnie {OUT_DIR}/benchmark_<data>.json)")
+    ap.add_argument("--porownaj", default=None, help="poprzedni JSON z wynikami do porównania")
+    ap.add_argument("--prog", type=float, default=PROG_REGRESJI, help="próg regresji (stosunek nowy/stary)")
+    # tryb wewnętrzny: pojedynczy etap w procesie potomnym
+    ap.add_argument("--etap", nargs=2, metavar=("SKRYPT", "WYNIK"), help=argparse.SUPPRESS)
+    ap.add_argument("reszta", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.etap:
+        reszta = args.reszta[1:] if args.reszta[:1] == ["--"] else args.reszta
+        uruchom_w_procesie(args.etap[0], reszta, args.etap[1], args.tracemalloc)
+        return
+
+    etapy = [e for e in ETAPY if not args.etapy or e[0] in args.etapy]
+    wyniki = {
+        "utworzono": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platforma": platform.platform(),
+        "cpu": os.cpu_count(),
+        "main_args": args.main_args,
+        "tracemalloc": args.tracemalloc,
+        "skale": {},
+    }
+    for skala in args.skale:
+        wyniki["skale"][str(skala)] = zmierz_skale(
+            skala, etapy, main_args=args.main_args.split(), powtorzenia=args.powtorzenia,
+            z_tracemalloc=args.tracemalloc, zostaw=args.zostaw,
+        )
+
+    out = args.out or os.path.join(OUT_DIR, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(wyniki, f, ensure_ascii=False, indent=2)
+    print(f"💾 Zapisano: {out}")
+
+    if args.porownaj:
+        with open(args.porownaj, encoding="utf-8") as f:
+            stary = json.load(f)
+        regresje = porownaj(stary, wyniki, args.prog)
+        if regresje:
+            print(f"⚠ Regresje: {len(regresje)} (próg {args.prog:.2f}x)")
+        else:
+            print("✅ Brak regresji")
+
+
+if __name__ == "__main__":
+    main()
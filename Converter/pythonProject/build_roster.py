@@ -2,13 +2,33 @@
 import os
 import re
 import glob
+import json
+import time
+import argparse
 import pandas as pd
 from pathlib import Path
 
+from name_index import IndeksNazwisk, pewne
+import metrics
+import schemat
+
 BASE_DIRS = ["./mnt/data/zawodnicy", "./mnt/data"]  # skanuj oba miejsca
+EXCLUDE_DIRS = ["./mnt/data/output"]                # własne wyniki potoku – nigdy nie są źródłem
 OUT_DIR = "mnt/data/output/roster"
+HEADER_CACHE = os.path.join(OUT_DIR, ".cache_naglowkow.json")
 os.makedirs(OUT_DIR, exist_ok=True)
 
+ROSTER_COLS = {
+    "Zawodnik": ["Zawodnik","Imie i nazwisko","Imię i nazwisko","Nazwisko i imię"],
+    "Skrot": ["Skrót","Skrot","Klub","Zespół","Zespol","Skrót klubu","Skrot klubu"]
+}
+MAPPING_COLS = {
+    "Zawodnik": ["Zawodnik","Imie i nazwisko","Imię i nazwisko","Nazwisko i imię","Nazwisko i Imię"],
+    "ID_Zawodnika": ["ID_Zawodnika","ID","Id","id zawodnika","Id_zawodnika"]
+}
+NAME_PARTS_COLS = {"Imie": ["Imie","Imię"], "Nazwisko": ["Nazwisko"]}
+MAPPING_NAME_RE = re.compile(r"(zawodnic|zgloszen|zgłoszen|master|lista|id)", re.IGNORECASE)
+
 # --------- helpers ---------
 def _norm_space(s: str) -> str:
     s = str(s) if s is not None else ""
@@ -16,8 +36,9 @@ def _norm_space(s: str) -> str:
     s = re.sub(r"\s+", " ", s)
     return s
 
-def _col_rename(df: pd.DataFrame, mapping: dict[str, str]) -> pd.DataFrame:
-    low = {str(c).strip().lower(): c for c in df.columns}
+def _plan_rename(columns, mapping: dict[str, str]) -> dict:
+    """Które kolumny przemianować (pierwszy pasujący alias, bez wielkości liter)."""
+    low = {str(c).strip().lower(): c for c in columns}
     rename = {}
     for want, alts in mapping.items():
         for a in alts:
@@ -25,77 +46,162 @@ def _col_rename(df: pd.DataFrame, mapping: dict[str, str]) -> pd.DataFrame:
             if key in low:
                 rename[low[key]] = want
                 break
+    return rename
+
+def _col_rename(df: pd.DataFrame, mapping: dict[str, str]) -> pd.DataFrame:
+    rename = _plan_rename(df.columns, mapping)
     if rename:
         df = df.rename(columns=rename)
     return df
 
-def read_csv_safe(path, nrows=None):
+def read_csv_safe(path, nrows=None, usecols=None):
     try:
         if not os.path.isfile(path) or os.path.getsize(path) == 0:
             return None
-        return pd.read_csv(path, nrows=nrows)
+        return pd.read_csv(path, nrows=nrows, usecols=usecols)
     except Exception:
         return None
 
-# --------- scan roster sources (name+club) ---------
-def scan_roster_sources():
-    rows = []
+# --------- discovery (same nagłówki, cache po mtime) ---------
+_header_cache = None
+
+def _load_header_cache() -> dict:
+    global _header_cache
+    if _header_cache is None:
+        _header_cache = {}
+        try:
+            with open(HEADER_CACHE, encoding="utf-8") as f:
+                _header_cache = json.load(f)
+        except (OSError, ValueError):
+            pass
+    return _header_cache
+
+def save_header_cache():
+    if _header_cache is None:
+        return
+    tmp = f"{HEADER_CACHE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_header_cache, f, ensure_ascii=False)
+    os.replace(tmp, HEADER_CACHE)
+
+def read_header(path):
+    """
+    Lista kolumn pliku (read_csv z nrows=0) albo None, jeśli pliku nie da się
+    przeczytać. Wynik pamiętany per plik, dopóki nie zmieni się rozmiar/mtime.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    cache = _load_header_cache()
+    wpis = cache.get(path)
+    if wpis is not None and wpis["size"] == st.st_size and wpis["mtime_ns"] == st.st_mtime_ns:
+        return wpis["columns"]
+
+    df = read_csv_safe(path, nrows=0)
+    columns = None if df is None else [str(c) for c in df.columns]
+    cache[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "columns": columns}
+    return columns
+
+def _excluded(path) -> bool:
+    p = os.path.abspath(path)
+    return any(p == d or p.startswith(d + os.sep) for d in map(os.path.abspath, EXCLUDE_DIRS))
+
+def discover_csv_files(name_re=None) -> list:
+    """Pliki *.csv z BASE_DIRS (bez EXCLUDE_DIRS), opcjonalnie filtr po nazwie pliku."""
     files = set()
     for base in BASE_DIRS:
         if not os.path.isdir(base):
             continue
-        files.update(glob.glob(os.path.join(base, "**", "*.csv"), recursive=True))
-    for f in sorted(files):
-        df = read_csv_safe(f)
+        for f in glob.glob(os.path.join(base, "**", "*.csv"), recursive=True):
+            if _excluded(f):
+                continue
+            if name_re is not None and not name_re.search(Path(f).name):
+                continue
+            files.add(f)
+    return sorted(files)
+
+def _with_headers(files) -> list:
+    """(ścieżka, kolumny) dla plików z czytelnym nagłówkiem."""
+    out = []
+    for f in files:
+        columns = read_header(f)
+        if columns is not None:
+            out.append((f, columns))
+    return out
+
+def discover_roster_files() -> list:
+    """(ścieżka, kolumny) kandydatów na źródła rosteru."""
+    return _with_headers(discover_csv_files())
+
+def discover_mapping_files() -> list:
+    """(ścieżka, kolumny) kandydatów na mapy Zawodnik -> ID (po nazwie pliku + znane nazwy)."""
+    files = set(discover_csv_files(MAPPING_NAME_RE))
+    # dorzuć znane nazwy
+    for f in ["./mnt/data/Zawodnict_zgłoszenia.csv"]:
+        if os.path.isfile(f):
+            files.add(f)
+    return _with_headers(sorted(files))
+
+def load_columns(path, columns, mapping: dict[str, str], want):
+    """
+    Wczytuje z pliku tylko kolumny, które po mapowaniu aliasów dają `want`
+    (usecols), i przemianowuje je. None, jeśli któregoś brakuje.
+    """
+    rename = _plan_rename(columns, mapping)
+    renamed = [rename.get(c, c) for c in columns]
+    if not set(want).issubset(renamed):
+        return None
+    usecols = [c for c, r in zip(columns, renamed) if r in want]
+    df = read_csv_safe(path, usecols=usecols)
+    if df is None:
+        return None
+    return df.rename(columns=rename)
+
+# --------- scan roster sources (name+club) ---------
+def scan_roster_sources(pliki=None, etap=None):
+    """pliki – wynik discover_roster_files() (domyślnie wykrywane tutaj); etap – metrics.Etap."""
+    rows = []
+    for f, columns in (discover_roster_files() if pliki is None else pliki):
+        start = time.perf_counter()
+        df = load_columns(f, columns, ROSTER_COLS, ["Zawodnik","Skrot"])
         if df is None:
-            continue
-        # mapuj potencjalne kolumny
-        df = _col_rename(df, {
-            "Zawodnik": ["Zawodnik","Imie i nazwisko","Imię i nazwisko","Nazwisko i imię"],
-            "Skrot": ["Skrót","Skrot","Klub","Zespół","Zespol","Skrót klubu","Skrot klubu"]
-        })
-        if not set(["Zawodnik","Skrot"]).issubset(df.columns):
+            if etap is not None:
+                etap.plik(f, czas_s=time.perf_counter() - start, status="pominiety")
             continue
         tmp = df[["Zawodnik","Skrot"]].copy()
         tmp["Zawodnik"] = tmp["Zawodnik"].astype(str).map(_norm_space)
         tmp["Skrot"] = tmp["Skrot"].astype(str).map(_norm_space)
         tmp["__src__"] = f
         tmp = tmp[(tmp["Zawodnik"]!="") & (tmp["Skrot"]!="")]
+        if etap is not None:
+            etap.plik(f, czas_s=time.perf_counter() - start, wiersze_we=len(df), wiersze_wy=len(tmp))
         if not tmp.empty:
             rows.append(tmp)
     if not rows:
         return pd.DataFrame(columns=["Zawodnik","Skrot","__src__"])
     out = pd.concat(rows, ignore_index=True).drop_duplicates()
-    return out
+    # skrót i ścieżka źródła powtarzają się w setkach wierszy -> category
+    return schemat.typuj(out, "roster")
 
 # --------- scan mapping sources (name→ID) ---------
-def scan_mapping_sources():
+def scan_mapping_sources(pliki=None, etap=None):
     """
     Szuka plików z kolumnami zawierającymi ID i nazwę zawodnika.
+    pliki – wynik discover_mapping_files() (domyślnie wykrywane tutaj); etap – metrics.Etap.
     """
     rows = []
-    files = set()
-    pat = re.compile(r"(zawodnic|zgloszen|zgłoszen|master|lista|id)", re.IGNORECASE)
-    for base in BASE_DIRS:
-        if not os.path.isdir(base):
-            continue
-        for f in glob.glob(os.path.join(base, "**", "*.csv"), recursive=True):
-            if pat.search(Path(f).name):
-                files.add(f)
-    # dorzuć znane nazwy
-    for f in ["./mnt/data/Zawodnict_zgłoszenia.csv"]:
-        if os.path.isfile(f):
-            files.add(f)
-
-    for f in sorted(files):
-        df = read_csv_safe(f)
+    for f, columns in (discover_mapping_files() if pliki is None else pliki):
+        start = time.perf_counter()
+        df = load_columns(f, columns, MAPPING_COLS, ["Zawodnik","ID_Zawodnika"])
+        # listy zawodników z osobnymi kolumnami Imie / Nazwisko (np. zawodnicy.csv)
+        if df is None and "Zawodnik" not in _plan_rename(columns, MAPPING_COLS).values():
+            df = load_columns(f, columns, {**MAPPING_COLS, **NAME_PARTS_COLS}, ["ID_Zawodnika","Imie","Nazwisko"])
+            if df is not None:
+                df["Zawodnik"] = df["Imie"].fillna("").astype(str) + " " + df["Nazwisko"].fillna("").astype(str)
         if df is None:
-            continue
-        df = _col_rename(df, {
-            "Zawodnik": ["Zawodnik","Imie i nazwisko","Imię i nazwisko","Nazwisko i imię","Nazwisko i Imię"],
-            "ID_Zawodnika": ["ID_Zawodnika","ID","Id","id zawodnika","Id_zawodnika"]
-        })
-        if not set(["Zawodnik","ID_Zawodnika"]).issubset(df.columns):
+            if etap is not None:
+                etap.plik(f, czas_s=time.perf_counter() - start, status="pominiety")
             continue
         tmp = df[["Zawodnik","ID_Zawodnika"]].copy()
         tmp["Zawodnik"] = tmp["Zawodnik"].astype(str).map(_norm_space)
@@ -103,20 +209,45 @@ def scan_mapping_sources():
         tmp["ID_Zawodnika"] = pd.to_numeric(tmp["ID_Zawodnika"], errors="coerce").astype("Int64").astype(str)
         tmp["__src__"] = f
         tmp = tmp[tmp["Zawodnik"]!=""]
+        if etap is not None:
+            etap.plik(f, czas_s=time.perf_counter() - start, wiersze_we=len(df), wiersze_wy=len(tmp))
         if not tmp.empty:
             rows.append(tmp)
     if not rows:
         return pd.DataFrame(columns=["Zawodnik","ID_Zawodnika","__src__"])
     out = pd.concat(rows, ignore_index=True).drop_duplicates(subset=["Zawodnik","ID_Zawodnika"])
-    return out
+    return schemat.typuj(out, "roster")
+
+# --------- fuzzy matching (name_index) ---------
+def dopasuj_rozmyte(unresolved: pd.DataFrame, mapping: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dla nazwisk bez dokładnego dopasowania szuka kandydata w indeksie nazwisk
+    (bez ogonków, dowolna kolejność imię/nazwisko, literówki). Każda unikalna
+    nazwa jest sprawdzana raz. Zwraca raport z pewnością i kolumną Przyjete.
+    """
+    znane = mapping[mapping["ID_Zawodnika"] != "<NA>"]
+    indeks = IndeksNazwisk(zip(znane["Zawodnik"], znane["ID_Zawodnika"]))
+    wyniki = {n: indeks.znajdz(n) for n in unresolved["Zawodnik"].drop_duplicates()}
+
+    dopasowania = pd.DataFrame.from_dict(wyniki, orient="index").rename(columns={"ID": "ID_Zawodnika"})
+    dopasowania["Przyjete"] = [pewne(w) for w in wyniki.values()]
+    raport = unresolved.merge(dopasowania, left_on="Zawodnik", right_index=True, how="left")
+    return raport.sort_values(["Przyjete", "Pewnosc"], ascending=[False, False])
 
 # --------- build roster ---------
 def build_and_save():
-    roster_src = scan_roster_sources()
-    if roster_src.empty:
-        print("⚠ Nie znaleziono żadnych plików z kolumnami (Zawodnik, Klub/Skrót).")
-        return
-    mapping = scan_mapping_sources()
+    with metrics.etap("wykrywanie") as e:
+        pliki_rostera = discover_roster_files()
+        pliki_mapy = discover_mapping_files()
+        save_header_cache()
+        e.dodaj(wiersze_wy=len(pliki_rostera) + len(pliki_mapy))
+
+    with metrics.etap("wczytanie") as e:
+        roster_src = scan_roster_sources(pliki_rostera, etap=e)
+        if roster_src.empty:
+            print("⚠ Nie znaleziono żadnych plików z kolumnami (Zawodnik, Klub/Skrót).")
+            return
+        mapping = scan_mapping_sources(pliki_mapy, etap=e)
 
     # join po nazwisku
     if mapping.empty:
@@ -128,6 +259,21 @@ def build_and_save():
         resolved = j.dropna(subset=["ID_Zawodnika"])[["ID_Zawodnika","Skrot","Zawodnik"]].drop_duplicates()
         unresolved = j[j["ID_Zawodnika"].isna()][["Zawodnik","Skrot"]].drop_duplicates()
 
+        # literówki / kolejność / ogonki – przez indeks nazwisk, nie wszystkie pary
+        if not unresolved.empty:
+            with metrics.etap("dopasowanie_rozmyte") as e:
+                fuzzy = dopasuj_rozmyte(unresolved, mapping)
+                e.dodaj(wiersze_we=len(unresolved), wiersze_wy=int(fuzzy["Przyjete"].sum()))
+            fuzzy_path = os.path.join(OUT_DIR, "roster_fuzzy_matches.csv")
+            fuzzy.to_csv(fuzzy_path, index=False)
+            przyjete = fuzzy[fuzzy["Przyjete"]]
+            resolved = pd.concat(
+                [resolved, przyjete[["ID_Zawodnika","Skrot","Zawodnik"]]], ignore_index=True
+            ).drop_duplicates()
+            unresolved = fuzzy[~fuzzy["Przyjete"]][["Zawodnik","Skrot"]]
+            print(f"🔎 Dopasowanie rozmyte: {len(przyjete)} przyjętych, "
+                  f"{len(unresolved)} do ręcznej weryfikacji – raport: {fuzzy_path}")
+
     # roster.csv = tylko resolved (bez kolumny Zawodnik, bo do bazy wystarczą ID+Skrot)
     roster = resolved[["ID_Zawodnika","Skrot"]].drop_duplicates()
     roster_path = os.path.join(OUT_DIR, "roster.csv")
@@ -145,5 +291,16 @@ def build_and_save():
     print(f"✅ roster_missing_ids.csv: {missing_path} ({len(unresolved)} braków)")
     print(f"✅ roster_resolved_with_names.csv: {resolved_path} ({len(resolved)} wierszy)")
 
-if __name__ == "__main__":
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Roster zawodników (ID_Zawodnika, Skrot) z plików CSV w mnt/data.")
+    metrics.dodaj_argumenty(ap)
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    metrics.wlacz_z_argumentow(args, "build_roster")
     build_and_save()
+    metrics.zakoncz_z_argumentow(args)
+
+if __name__ == "__main__":
+    main()
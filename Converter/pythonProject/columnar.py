@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+columnar.py – opcjonalny kolumnowy format wyjścia konwertera (Parquet, pyarrow)
+
+Układ partycjonowany (hive):
+    ./mnt/data/output/parquet/<tabela>/rok=<Rok>/liga=<Liga_Poziom>/runda_<N>.parquet
+✔ ID jako uint32, Zajete_miejsce jako float32 – bez utraty typów jak w CSV
+  (te same typy co w pamięci, schemat.TYPY),
+✔ wczytaj_tabele() czyta tylko potrzebne kolumny i tylko pasujące partycje.
+
+pyarrow jest zależnością opcjonalną – bez niego działa tylko format CSV.
+"""
+
+import glob
+import os
+
+import pandas as pd
+
+import schemat
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # format parquet jest opcjonalny
+    pa = ds = pq = None
+
+PARQUET_DIR = "./mnt/data/output/parquet"
+
+TABELE = ("miejsca", "wyscigi", "regaty", "wynikRegat")
+
+if pa is not None:
+    SCHEMATY = {
+        "miejsca": pa.schema([
+            ("ID_miejsca", pa.uint32()),
+            ("ID_wyscigu", pa.uint32()),
+            ("ID_wariantu_klubu", pa.uint32()),
+            ("Zajete_miejsce", pa.float32()),
+            ("Kary", pa.uint8()),
+            ("Numer_lodki", pa.uint16()),
+        ]),
+        "wyscigi": pa.schema([
+            ("ID_wyscigu", pa.uint32()),
+            ("ID_Regat", pa.uint32()),
+            ("Numer_wyscigu", pa.uint16()),
+            ("Finalowy", pa.bool_()),
+        ]),
+        "regaty": pa.schema([
+            ("ID_Regat", pa.uint32()),
+            ("Nazwa", pa.string()),
+            ("Liga_Poziom", pa.string()),
+            ("Miasto", pa.string()),
+            ("Numer_Rundy", pa.uint16()),
+            ("Rok", pa.uint16()),
+        ]),
+        "wynikRegat": pa.schema([
+            ("ID_wynikRegat", pa.uint32()),
+            ("regaty", pa.uint32()),
+            ("ID_wariantu_klubu", pa.uint32()),
+            ("miejsceWRegatach", pa.uint16()),
+        ]),
+    }
+
+
+def dostepny() -> bool:
+    return pa is not None
+
+
+def _wymagaj_pyarrow():
+    if pa is None:
+        raise RuntimeError("Format parquet wymaga pakietu pyarrow (pip install pyarrow).")
+
+
+def _do_tabeli_arrow(df: pd.DataFrame, tabela: str):
+    """Ramka z main.py (typy schemat.TYPY; także dawne ID-teksty) -> tabela pyarrow."""
+    schema = SCHEMATY[tabela]
+    df = schemat.typuj(df, tabela)
+    kolumny = {}
+    for pole in schema:
+        col = df[pole.name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            col = col.astype(object)
+        kolumny[pole.name] = pa.array(col, type=pole.type, from_pandas=True)
+    return pa.Table.from_pydict(kolumny, schema=schema)
+
+
+def sciezka_partycji(tabela: str, rok: int, liga: str, base_dir: str = PARQUET_DIR) -> str:
+    return os.path.join(base_dir, tabela, f"rok={rok}", f"liga={liga}")
+
+
+def zapisz_runde(ramki: dict, rok: int, liga: str, runda: int, base_dir: str = PARQUET_DIR) -> list:
+    """
+    Zapisuje ramki jednej rundy (klucze jak TABELE; None/pusta ramka = pomiń).
+    Zwraca listę zapisanych plików.
+    """
+    _wymagaj_pyarrow()
+    zapisane = []
+    for tabela in TABELE:
+        df = ramki.get(tabela)
+        if df is None or df.empty:
+            continue
+        folder = sciezka_partycji(tabela, rok, liga, base_dir)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"runda_{runda}.parquet")
+        pq.write_table(_do_tabeli_arrow(df, tabela), path)
+        zapisane.append(path)
+    return zapisane
+
+
+def istnieje(tabela: str, base_dir: str = PARQUET_DIR) -> bool:
+    return dostepny() and os.path.isdir(os.path.join(base_dir, tabela))
+
+
+def _najnowszy(pliki) -> float:
+    return max((os.path.getmtime(p) for p in pliki), default=0)
+
+
+def pliki_tabeli(tabela: str, base_dir: str = PARQUET_DIR) -> list:
+    return glob.glob(os.path.join(base_dir, tabela, "**", "*.parquet"), recursive=True)
+
+
+def aktualny(tabele, csv_dir: str, base_dir: str = PARQUET_DIR) -> bool:
+    """
+    Czy czytać wyjście main.py z Parquet zamiast z *_<tabela>.csv w csv_dir:
+    są partycje wszystkich tabel, a najnowszy plik Parquet jest co najmniej tak
+    nowy jak najnowszy CSV tych tabel. Po `main.py --format oba` i kolejnym
+    przebiegu tylko z CSV stary Parquet przegrywa.
+    """
+    if not all(istnieje(t, base_dir) for t in tabele):
+        return False
+    parquet = _najnowszy(p for t in tabele for p in pliki_tabeli(t, base_dir))
+    csv = _najnowszy(p for t in tabele for p in glob.glob(os.path.join(csv_dir, f"*_{t}.csv")))
+    return parquet >= csv
+
+
+def wczytaj_tabele(tabela: str, columns=None, rok=None, liga=None, base_dir: str = PARQUET_DIR) -> pd.DataFrame:
+    """
+    Czyta tabelę jako DataFrame. `columns` – projekcja kolumn; `rok`/`liga`
+    (wartość albo lista) – filtr po partycjach, więc niepasujące pliki nie są otwierane.
+    Kolumny partycji dostępne są jako `rok` i `liga`; typy jak w schemat.TYPY.
+    """
+    _wymagaj_pyarrow()
+    path = os.path.join(base_dir, tabela)
+    partycje = ds.partitioning(
+        pa.schema([("rok", pa.int32()), ("liga", pa.string())]), flavor="hive"
+    )
+    dataset = ds.dataset(path, format="parquet", partitioning=partycje)
+
+    filtr = None
+    for pole, wartosc in (("rok", rok), ("liga", liga)):
+        if wartosc is None:
+            continue
+        wartosci = list(wartosc) if isinstance(wartosc, (list, tuple, set)) else [wartosc]
+        warunek = ds.field(pole).isin(wartosci)
+        filtr = warunek if filtr is None else (filtr & warunek)
+
+    return schemat.typuj(dataset.to_table(columns=columns, filter=filtr).to_pandas(), tabela)
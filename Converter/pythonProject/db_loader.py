@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+db_loader.py – hurtowe ładowanie połączonych tabel do bazy liga_*
+
+Kolejność zgodna z kluczami obcymi (init_updated.sql):
+    ZestawienieKlubow -> KlubWariant -> Zawodnik -> Regaty -> Wyscigi
+    -> Miejsca -> WynikRegatManual -> Wystepowanie_w_regatach
+
+✔ jedno połączenie na cały przebieg, jedno zapytanie z parametrami na tabelę,
+✔ executemany() w dużych paczkach – jedna paczka = jedna transakcja,
+✔ postęp (plik, liczba wierszy, SHA1) zapisywany w tej samej transakcji co dane,
+  więc przerwane ładowanie można wznowić – załadowane wiersze nie wejdą drugi raz,
+✔ tabele z kluczem naturalnym (występowania: zawodnik + regaty) – wiersz
+  z kluczem już obecnym w bazie lub we wcześniejszym źródle jest pomijany,
+  a różniący się od niego (np. inny wariant klubu) zgłaszany jako konflikt,
+✔ lokalna baza SQLite tworzona z init_updated.sql (do testów zamiast MySQL).
+
+MySQL wymaga opcjonalnego pakietu pymysql (--mysql user:haslo@host:port/baza).
+"""
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+import metrics
+import schemat
+from manifest import sha1_pliku
+
+try:
+    import pymysql
+except ImportError:  # MySQL jest opcjonalny – testy idą na SQLite
+    pymysql = None
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "init_updated.sql")
+SQLITE_PATH = "./mnt/data/output/db/liga.sqlite"
+MERGE_DIR = "./mnt/data/output/main/merge"
+WYSTEPOWANIE_DIR = "./mnt/data/output/wystepowanie"
+
+BATCH_SIZE = 5_000
+
+TABELA_POSTEPU = "ladowanie_postep"
+
+
+@dataclass(frozen=True)
+class Tabela:
+    nazwa: str
+    zrodla: tuple          # wzorce glob plików CSV
+    kolumny: tuple         # kolumny CSV == kolumny tabeli
+    liczbowe: tuple = ()   # kolumny rzutowane na liczby całkowite (np. '20193720.0')
+    wymagane: tuple = ()   # NOT NULL w schemacie – wiersze bez nich są pomijane
+    teksty: tuple = ()     # NOT NULL tekstowe – pusta komórka = '' (jak w kluby_insert.sql)
+    unikalne: tuple = ()   # klucz naturalny – wygrywa pierwsze źródło, reszta pomijana
+    typy: str = None       # tabela w schemat.TYPY – kawałki typowane jak w konwerterze
+
+
+# kolejność = kolejność kluczy obcych
+TABELE = (
+    Tabela("liga_ZestawienieKlubow",
+           ("./mnt/data/kluby/Kluby_tablica.csv",),
+           ("ID_zestawienia_klubow", "Nazwa"),
+           liczbowe=("ID_zestawienia_klubow",),
+           wymagane=("ID_zestawienia_klubow",),
+           teksty=("Nazwa",)),
+    Tabela("liga_KlubWariant",
+           ("./mnt/data/kluby/kluby_wyciag.csv",),
+           ("ID_wariantu_klubu", "Skrot", "Nazwa", "ID_zestawienia_klubow"),
+           liczbowe=("ID_wariantu_klubu", "ID_zestawienia_klubow"),
+           wymagane=("ID_wariantu_klubu", "ID_zestawienia_klubow"),
+           teksty=("Skrot", "Nazwa"),
+           typy="kluby"),
+    Tabela("liga_Zawodnik",
+           ("./mnt/data/zawodnicy/zawodnicy_unique_all_with_ids.csv",),
+           ("ID_Zawodnika", "Imie", "Nazwisko", "Email", "Pozycja_na_lodce",
+            "Data_wstapienia_do_PLZ", "Numer_licencji", "Numer_ubezpieczenia"),
+           liczbowe=("ID_Zawodnika",),
+           wymagane=("ID_Zawodnika",)),
+    Tabela("liga_Regaty",
+           (f"{MERGE_DIR}/all_regaty.csv",),
+           ("ID_Regat", "Nazwa", "Liga_Poziom", "Miasto", "Numer_Rundy", "Rok"),
+           liczbowe=("ID_Regat", "Numer_Rundy", "Rok"),
+           wymagane=("ID_Regat",),
+           typy="regaty"),
+    Tabela("liga_Wyscigi",
+           (f"{MERGE_DIR}/all_wyscigi.csv",),
+           ("ID_wyscigu", "ID_Regat", "Numer_wyscigu", "Finalowy"),
+           liczbowe=("ID_wyscigu", "ID_Regat"),
+           wymagane=("ID_wyscigu", "ID_Regat"),
+           typy="wyscigi"),
+    # ID_miejsca / ID / ID_wystepowania = AUTO_INCREMENT – nie ładujemy ich z CSV
+    Tabela("liga_Miejsca",
+           (f"{MERGE_DIR}/all_miejsca.csv",),
+           ("ID_wyscigu", "ID_wariantu_klubu", "Zajete_miejsce", "Kary", "Numer_lodki"),
+           liczbowe=("ID_wyscigu", "ID_wariantu_klubu", "Kary"),
+           wymagane=("ID_wyscigu", "ID_wariantu_klubu"),
+           typy="miejsca"),
+    Tabela("liga_WynikRegatManual",
+           (f"{MERGE_DIR}/all_wynikRegat.csv",),
+           ("regaty", "ID_wariantu_klubu", "miejsceWRegatach"),
+           liczbowe=("regaty", "ID_wariantu_klubu", "miejsceWRegatach"),
+           wymagane=("regaty", "ID_wariantu_klubu", "miejsceWRegatach"),
+           typy="wynikRegat"),
+    # producenci występowań w kolejności pierwszeństwa: listy zawodników ligi,
+    # arkusz xlsx, ankieta (pliki brak_* / brakujacy_* odpadają po nagłówku)
+    Tabela("liga_Wystepowanie_w_regatach",
+           (f"{WYSTEPOWANIE_DIR}/wystepowanie_z_listy/wystepowanie_*.csv",
+            f"{WYSTEPOWANIE_DIR}/xlsx/wystepowanie_all.csv",
+            f"{WYSTEPOWANIE_DIR}/ankieta/wystepowania_z_ankiety_all.csv"),
+           ("ID_Zawodnika", "ID_Regat", "ID_wariantu_klubu", "WynikWRegatach", "Trening"),
+           liczbowe=("ID_Zawodnika", "ID_Regat", "ID_wariantu_klubu", "WynikWRegatach"),
+           wymagane=("ID_Zawodnika", "ID_Regat", "ID_wariantu_klubu"),
+           unikalne=("ID_Zawodnika", "ID_Regat"),
+           typy="wystepowanie"),
+)
+
+
+# -------------------------------
+# Połączenie
+# -------------------------------
+
+class Polaczenie:
+    """Jedno połączenie DB-API + styl parametrów ('?' w SQLite, '%s' w pymysql)."""
+
+    def __init__(self, conn, znacznik: str, silnik: str):
+        self.conn = conn
+        self.znacznik = znacznik
+        self.silnik = silnik
+
+    @classmethod
+    def sqlite(cls, path: str):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA foreign_keys = ON")   # jak InnoDB
+        return cls(conn, "?", "sqlite")
+
+    @classmethod
+    def mysql(cls, dsn: str):
+        """dsn = user:haslo@host:port/baza (port opcjonalny)."""
+        if pymysql is None:
+            raise RuntimeError("Ładowanie do MySQL wymaga pakietu pymysql (pip install pymysql).")
+        m = re.fullmatch(r"([^:@]+)(?::([^@]*))?@([^:/]+)(?::(\d+))?/(.+)", dsn)
+        if not m:
+            raise ValueError(f"Niepoprawny DSN MySQL: {dsn} (oczekiwano user:haslo@host:port/baza)")
+        user, haslo, host, port, baza = m.groups()
+        conn = pymysql.connect(
+            host=host, port=int(port or 3306), user=user, password=haslo or "",
+            database=baza, charset="utf8mb4", autocommit=False,
+        )
+        return cls(conn, "%s", "mysql")
+
+    def tabele(self) -> set:
+        cur = self.conn.cursor()
+        if self.silnik == "sqlite":
+            cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        else:
+            cur.execute("SHOW TABLES")
+        return {r[0] for r in cur.fetchall()}
+
+    def zamknij(self) -> None:
+        self.conn.close()
+
+
+# -------------------------------
+# Schemat
+# -------------------------------
+
+def schemat_sqlite(sql: str) -> str:
+    """
+    init_updated.sql (MySQL) -> SQLite. Tylko różnice składni; skrypt jest
+    idempotentny, więc można go puścić na istniejącej bazie bez utraty danych.
+    """
+    sql = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b",
+                 "INTEGER PRIMARY KEY AUTOINCREMENT", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"^\s*DROP\s+TABLE\b[^;]*;", "", sql, flags=re.IGNORECASE | re.MULTILINE)
+    sql = re.sub(r"\bCREATE\s+TABLE\s+(?!IF\s+NOT\s+EXISTS)",
+                 "CREATE TABLE IF NOT EXISTS ", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bCREATE\s+INDEX\s+(?!IF\s+NOT\s+EXISTS)",
+                 "CREATE INDEX IF NOT EXISTS ", sql, flags=re.IGNORECASE)
+    return sql
+
+
+def utworz_schemat(polaczenie: Polaczenie, schema_path: str = SCHEMA_PATH) -> None:
+    if polaczenie.silnik == "sqlite":
+        with open(schema_path, encoding="utf-8") as f:
+            polaczenie.conn.executescript(schemat_sqlite(f.read()))
+
+    cur = polaczenie.conn.cursor()
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABELA_POSTEPU} ("
+        " tabela VARCHAR(64) NOT NULL,"
+        " zrodlo VARCHAR(255) NOT NULL,"
+        " sha1 CHAR(40) NOT NULL,"
+        " wiersze INT NOT NULL,"
+        " zakonczone BOOLEAN NOT NULL,"
+        " PRIMARY KEY (tabela, zrodlo))"
+    )
+    polaczenie.conn.commit()
+
+
+# -------------------------------
+# Postęp (wznawianie)
+# -------------------------------
+
+def wczytaj_postep(polaczenie: Polaczenie, tabela: str, zrodlo: str):
+    """Zwraca (sha1, wiersze, zakonczone) albo None."""
+    z = polaczenie.znacznik
+    cur = polaczenie.conn.cursor()
+    cur.execute(
+        f"SELECT sha1, wiersze, zakonczone FROM {TABELA_POSTEPU} WHERE tabela = {z} AND zrodlo = {z}",
+        (tabela, zrodlo),
+    )
+    r = cur.fetchone()
+    return None if r is None else (r[0], int(r[1]), bool(r[2]))
+
+
+def _zapisz_postep(cur, znacznik: str, tabela: str, zrodlo: str, sha1: str, wiersze: int, zakonczone: bool):
+    """Bez commit – idzie w tej samej transakcji co paczka danych."""
+    z = znacznik
+    cur.execute(f"DELETE FROM {TABELA_POSTEPU} WHERE tabela = {z} AND zrodlo = {z}", (tabela, zrodlo))
+    cur.execute(
+        f"INSERT INTO {TABELA_POSTEPU} (tabela, zrodlo, sha1, wiersze, zakonczone) VALUES ({z}, {z}, {z}, {z}, {z})",
+        (tabela, zrodlo, sha1, wiersze, zakonczone),
+    )
+
+
+def wyczysc(polaczenie: Polaczenie, tabele=TABELE) -> None:
+    """Usuwa dane w odwrotnej kolejności kluczy obcych i cały zapisany postęp."""
+    cur = polaczenie.conn.cursor()
+    for t in reversed(tabele):
+        cur.execute(f"DELETE FROM {t.nazwa}")
+        cur.execute(f"DELETE FROM {TABELA_POSTEPU} WHERE tabela = {polaczenie.znacznik}", (t.nazwa,))
+    polaczenie.conn.commit()
+
+
+# -------------------------------
+# Ładowanie
+# -------------------------------
+
+def pliki_zrodlowe(tabela: Tabela) -> list:
+    """Pliki pasujące do wzorców, które mają wszystkie kolumny tabeli (po nagłówku)."""
+    pliki = []
+    for wzorzec in tabela.zrodla:
+        for path in sorted(glob.glob(wzorzec, recursive=True)):
+            try:
+                naglowek = pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns
+            except (OSError, ValueError):
+                continue
+            if set(tabela.kolumny).issubset(naglowek):
+                pliki.append(path)
+    return pliki
+
+
+def _przygotuj_wiersze(chunk: pd.DataFrame, tabela: Tabela):
+    """Kawałek CSV -> (krotki do executemany, liczba pominiętych wierszy)."""
+    df = chunk[list(tabela.kolumny)].copy()
+    if tabela.typy:
+        df = schemat.do_sql(schemat.typuj(df, tabela.typy), tabela.typy)
+    for col in tabela.liczbowe:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in tabela.teksty:
+        df[col] = df[col].fillna("").astype(str)
+
+    pominiete = 0
+    if tabela.wymagane:
+        ok = df[list(tabela.wymagane)].notna().all(axis=1)
+        pominiete = int((~ok).sum())
+        df = df[ok]
+
+    # typy Pythona zamiast numpy (sqlite3/pymysql), NaN/NA -> NULL
+    df = df.astype(object)
+    df = df.where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None)), pominiete
+
+
+def _istniejace(polaczenie: Polaczenie, tabela: Tabela) -> dict:
+    """Wiersze tabeli w bazie: klucz naturalny (tabela.unikalne) -> krotka kolumn."""
+    cur = polaczenie.conn.cursor()
+    cur.execute(f"SELECT {', '.join(tabela.kolumny)} FROM {tabela.nazwa}")
+    pozycje = [tabela.kolumny.index(k) for k in tabela.unikalne]
+    return {tuple(r[i] for i in pozycje): tuple(r) for r in cur.fetchall()}
+
+
+def _bez_powtorzen(wiersze: list, tabela: Tabela, istniejace: dict):
+    """
+    Odrzuca wiersze z kluczem naturalnym, który już jest (w bazie albo wcześniej
+    w tym przebiegu); nowe klucze dopisuje do istniejace.
+    Zwraca (nowe, liczba_powtórzeń, konflikty [(stary, nowy), ...]).
+    """
+    pozycje = [tabela.kolumny.index(k) for k in tabela.unikalne]
+    nowe, powtorzone, konflikty = [], 0, []
+    for w in wiersze:
+        klucz = tuple(w[i] for i in pozycje)
+        stary = istniejace.get(klucz)
+        if stary is None:
+            istniejace[klucz] = w
+            nowe.append(w)
+        elif stary == w:
+            powtorzone += 1
+        else:
+            konflikty.append((stary, w))
+    return nowe, powtorzone, konflikty
+
+
+def _tabela_konfliktow(tabela: Tabela, konflikty: list) -> pd.DataFrame:
+    """Wiersz z bazy + kolumny *_nowy tam, gdzie pominięty wiersz się różni."""
+    wiersze = []
+    for stary, nowy in konflikty:
+        wiersz = dict(zip(tabela.kolumny, stary))
+        for k, s, n in zip(tabela.kolumny, stary, nowy):
+            if s != n:
+                wiersz[f"{k}_nowy"] = n
+        wiersze.append(wiersz)
+    return pd.DataFrame(wiersze)
+
+
+def zaladuj_plik(polaczenie: Polaczenie, tabela: Tabela, path: str, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Ładuje jeden plik paczkami po batch_size wierszy. Wznawia od zapisanego
+    postępu. Zwraca liczbę wstawionych wierszy (w tym uruchomieniu).
+    """
+    sha1 = sha1_pliku(path)
+    postep = wczytaj_postep(polaczenie, tabela.nazwa, path)
+    start = 0
+    if postep is not None:
+        stary_sha1, wiersze, zakonczone = postep
+        if stary_sha1 != sha1:
+            print(f"❌ {path} zmienił się od poprzedniego ładowania do {tabela.nazwa} "
+                  f"– pomijam (użyj --od-nowa, żeby załadować wszystko ponownie)")
+            return 0
+        if zakonczone:
+            print(f"⏭️ Już załadowane: {path} -> {tabela.nazwa} ({wiersze} wierszy)")
+            return 0
+        start = wiersze
+        print(f"↻ Wznawiam {path} -> {tabela.nazwa} od wiersza {start}")
+
+    z = polaczenie.znacznik
+    sql = (f"INSERT INTO {tabela.nazwa} ({', '.join(tabela.kolumny)}) "
+           f"VALUES ({', '.join([z] * len(tabela.kolumny))})")
+
+    cur = polaczenie.conn.cursor()
+    wstawione, pominiete, przeczytane = 0, 0, start
+    istniejace = _istniejace(polaczenie, tabela) if tabela.unikalne else None
+    powtorzone, konflikty = 0, []
+    czytnik = pd.read_csv(
+        path, encoding="utf-8-sig", chunksize=batch_size,
+        skiprows=range(1, start + 1) if start else None,
+    )
+    for chunk in czytnik:
+        wiersze, pom = _przygotuj_wiersze(chunk, tabela)
+        if istniejace is not None:
+            wiersze, powt, konf = _bez_powtorzen(wiersze, tabela, istniejace)
+            powtorzone += powt
+            konflikty += konf
+        try:
+            if wiersze:
+                cur.executemany(sql, wiersze)
+            przeczytane += len(chunk)
+            _zapisz_postep(cur, z, tabela.nazwa, path, sha1, przeczytane, False)
+            polaczenie.conn.commit()
+        except Exception:
+            polaczenie.conn.rollback()
+            print(f"❌ Błąd w paczce {path} (wiersze {przeczytane + 1}–{przeczytane + len(chunk)}) "
+                  f"-> {tabela.nazwa}; zatwierdzono {przeczytane - start} wierszy, można wznowić")
+            raise
+        wstawione += len(wiersze)
+        pominiete += pom
+
+    _zapisz_postep(cur, z, tabela.nazwa, path, sha1, przeczytane, True)
+    polaczenie.conn.commit()
+
+    print(f"✅ {tabela.nazwa} <- {path}: {wstawione} wierszy")
+    if pominiete:
+        print(f"⚠ Pominięto {pominiete} wierszy bez wymaganych kolumn ({', '.join(tabela.wymagane)})")
+    if powtorzone:
+        print(f"ℹ Pominięto {powtorzone} wierszy już załadowanych ({', '.join(tabela.unikalne)})")
+    if konflikty:
+        print(f"❌ {len(konflikty)} konfliktów ({', '.join(tabela.unikalne)}) – zostaje wiersz "
+              f"załadowany wcześniej, nowy pominięty:")
+        print(_tabela_konfliktow(tabela, konflikty[:20]).to_string(index=False))
+    return wstawione
+
+
+def zaladuj(polaczenie: Polaczenie, tabele=TABELE, batch_size: int = BATCH_SIZE) -> dict:
+    """Ładuje wszystkie tabele w kolejności kluczy obcych. Zwraca {tabela: wstawione}."""
+    wynik = {}
+    for tabela in tabele:
+        pliki = pliki_zrodlowe(tabela)
+        if not pliki:
+            print(f"⚠ Brak plików źródłowych dla {tabela.nazwa}: {', '.join(tabela.zrodla)}")
+            wynik[tabela.nazwa] = 0
+            continue
+        wynik[tabela.nazwa] = 0
+        with metrics.etap(f"db_{tabela.nazwa}") as e:
+            for p in pliki:
+                start = time.perf_counter()
+                n = zaladuj_plik(polaczenie, tabela, p, batch_size)
+                e.plik(p, czas_s=time.perf_counter() - start, wiersze_we=n, wiersze_wy=n)
+                wynik[tabela.nazwa] += n
+    return wynik
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Hurtowe ładowanie tabel liga_* do bazy (SQLite lub MySQL).")
+    cel = ap.add_mutually_exclusive_group()
+    cel.add_argument("--sqlite", default=SQLITE_PATH,
+                     help=f"plik bazy SQLite tworzonej z init_updated.sql (domyślnie {SQLITE_PATH})")
+    cel.add_argument("--mysql", metavar="DSN",
+                     help="user:haslo@host:port/baza – istniejąca baza MySQL (wymaga pymysql)")
+    ap.add_argument("--schema", default=SCHEMA_PATH, help="ścieżka do init_updated.sql")
+    ap.add_argument("--batch", type=int, default=BATCH_SIZE, help="wierszy w jednej transakcji")
+    ap.add_argument("--tabele", nargs="+", choices=[t.nazwa for t in TABELE],
+                    help="ładuj tylko wybrane tabele (kolejność i tak wg kluczy obcych)")
+    ap.add_argument("--od-nowa", action="store_true",
+                    help="wyczyść ładowane tabele i zapisany postęp przed ładowaniem")
+    metrics.dodaj_argumenty(ap)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.batch < 1:
+        raise SystemExit("--batch musi być dodatni")
+
+    tabele = [t for t in TABELE if not args.tabele or t.nazwa in args.tabele]
+    metrics.wlacz_z_argumentow(args, "db_loader")
+
+    if args.mysql:
+        polaczenie = Polaczenie.mysql(args.mysql)
+    else:
+        polaczenie = Polaczenie.sqlite(args.sqlite)
+        print(f"ℹ Baza SQLite: {args.sqlite}")
+
+    try:
+        utworz_schemat(polaczenie, args.schema)
+        brak = [t.nazwa for t in tabele if t.nazwa not in polaczenie.tabele()]
+        if brak:
+            raise SystemExit(f"❌ W bazie brakuje tabel: {', '.join(brak)}")
+
+        if args.od_nowa:
+            wyczysc(polaczenie, tabele)
+            print("🗑️ Wyczyszczono tabele i postęp ładowania")
+
+        wynik = zaladuj(polaczenie, tabele, args.batch)
+    finally:
+        polaczenie.zamknij()
+
+    print("\n📦 Podsumowanie:")
+    for nazwa, n in wynik.items():
+        print(f"   {nazwa}: {n}")
+    metrics.zakoncz_z_argumentow(args)
+
+
+if __name__ == "__main__":
+    main()
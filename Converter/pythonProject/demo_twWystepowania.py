@@ -1,14 +1,11 @@
 
 # -*- coding: utf-8 -*-
-import argparse, os, re, hashlib, pandas as pd, numpy as np
+import argparse, os, re, pandas as pd, numpy as np
+
+from id_registry import generate_numeric_ids
+import metrics
+import regaty_index
 
-def generate_numeric_id(typ: str, liga_poziom: str, **params) -> str:
-    param_string = f"liga_poziom={liga_poziom}|" + "|".join(f"{k}={v}" for k, v in sorted(params.items()))
-    base_string = f"{typ}|{param_string}"
-    import hashlib as _h
-    hash_bytes = _h.sha1(base_string.encode()).digest()
-    numeric_id = int.from_bytes(hash_bytes[:4], byteorder='big')
-    return f"{numeric_id % 100_000_000:08d}"
 
 def infer_liga_rok_from_filename(path: str):
     fname = os.path.basename(path)
@@ -30,7 +27,12 @@ def norm_cols(df):
     df.columns = [str(c).strip() for c in df.columns]
     return df
 
-def parse_args():
+OUT_FILE = "./mnt/data/output/wystepowanie/demo/wystepowania.csv"
+
+KOLUMNY_WYJSCIA = ["ID_wystepowania", "ID_Zawodnika", "ID_Regat", "Skrot", "WynikWRegatach",
+                   "Imie", "Nazwisko", "Liga_Poziom", "Rok", "Numer_Rundy"]
+
+def parse_args(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--wyniki", default="./mnt/data/output/all_wynikRegat.csv")
     ap.add_argument("--zawodnicy", default="./mnt/data/zawodnicy/Zawodnicy_Ekstraklsa_2024.csv")
@@ -38,21 +40,19 @@ def parse_args():
     ap.add_argument("--liga", default=None)
     ap.add_argument("--rok", type=int, default=None)
     ap.add_argument("--limit", type=int, default=10)
-    return ap.parse_args()
-
-def main():
-    args = parse_args()
-    wyn = norm_cols(load_csv_any(args.wyniki))
-    if not set(["regaty","klub","miejsceWRegatach"]).issubset(wyn.columns):
-        print("Brakuje kolumn w all_wynikRegat.csv"); return
-    wyn["regaty"] = wyn["regaty"].astype(str); wyn["klub"] = wyn["klub"].astype(str)
-    place = {(r.regaty, r.klub): r.miejsceWRegatach for r in wyn[["regaty","klub","miejsceWRegatach"]].itertuples(index=False)}
-    reg_ids = set(wyn["regaty"].astype(str).unique())
-    rost = norm_cols(load_csv_any(args.zawodnicy))
-
-    # heurystyka kolumn
+    ap.add_argument("--batch", action="store_true",
+                    help="cały roster, zapis tabeli występowań do --out zamiast wypisu --limit wierszy")
+    ap.add_argument("--out", default=OUT_FILE)
+    metrics.dodaj_argumenty(ap)
+    return ap.parse_args(argv)
+
+def przygotuj_roster(rost, liga, rok, variant):
+    """
+    Roster -> ramka (_wiersz, Imie, Nazwisko, Fullname, Skrot, Liga_Poziom, Rok, Runda, ID_Zawodnika).
+    Wariant B bierze ligę/rok/rundę z wiersza (poziom_ligi, rok, Runda / numer rundy).
+    """
     club_col = next((c for c in ["Skrót","Skrot","Klub","Zespół","Zespol"] if c in rost.columns), None)
-    if not club_col: print("Brak kolumny Skrót/Skrot/Klub w rosterze"); return
+    if not club_col: print("Brak kolumny Skrót/Skrot/Klub w rosterze"); return None
     id_col = next((c for c in ["ID_Zawodnika","ID","IdZawodnika"] if c in rost.columns), None)
 
     name_mode=None
@@ -60,72 +60,117 @@ def main():
         if b is None and a in rost.columns: name_mode=(a,b); break
         if b is not None and a in rost.columns and b in rost.columns: name_mode=(a,b); break
 
+    tekst = lambda c: rost[c].astype(str).str.strip() if c in rost.columns else pd.Series("", index=rost.index)
+    df = pd.DataFrame({"_wiersz": np.arange(len(rost)), "Skrot": tekst(club_col)}, index=rost.index)
+
+    # Imię/Nazwisko
+    a, b = name_mode if name_mode else ("Zawodnik", None)
+    if b is None:
+        df["Imie"] = ""; df["Nazwisko"] = tekst(a); df["Fullname"] = df["Nazwisko"]
+    else:
+        df["Imie"] = tekst(a); df["Nazwisko"] = tekst(b)
+        df["Fullname"] = (df["Imie"] + " " + df["Nazwisko"]).str.strip()
+
+    # wariant A/B
+    if variant=="B":
+        df["Liga_Poziom"] = rost["poziom_ligi"].fillna(liga).astype(str) if "poziom_ligi" in rost.columns else str(liga)
+        df["Rok"] = rost["rok"].fillna(rok) if "rok" in rost.columns else rok
+        runda_col = next((c for c in ["Runda","numer rundy"] if c in rost.columns), None)
+    else:
+        df["Liga_Poziom"] = str(liga); df["Rok"] = rok
+        runda_col = "Runda" if "Runda" in rost.columns else None
+    df["Rok"] = pd.to_numeric(df["Rok"]).astype("int64")
+    df["Runda"] = pd.to_numeric(rost[runda_col], errors="coerce").astype("Int64") if runda_col else pd.array([pd.NA]*len(df), dtype="Int64")
+
+    df = df[df["Skrot"] != ""]
+
+    # ID zawodnika: z rosteru albo deterministyczne – każdy zestaw parametrów liczony raz na ligę
+    df["ID_Zawodnika"] = None
+    if id_col:
+        def z_rosteru(v):
+            try:
+                return str(int(v)).zfill(8) if len(str(int(v)))<=8 else str(int(v))
+            except Exception:
+                return str(v).strip()
+        ids = rost.loc[df.index, id_col]
+        df.loc[ids.notna(), "ID_Zawodnika"] = ids[ids.notna()].map(z_rosteru)
+    brak = df["ID_Zawodnika"].isna()
+    for liga_use, grupa in df[brak].groupby("Liga_Poziom", sort=False):
+        params = [{"rok": int(r), "klub": k, "nazwisko_imie": n}
+                  for r, k, n in zip(grupa["Rok"], grupa["Skrot"], grupa["Fullname"])]
+        df.loc[grupa.index, "ID_Zawodnika"] = generate_numeric_ids("zawodnik", liga_use, params)
+    return df
+
+def zbuduj_wystepowania(roster, wyn, rundy):
+    """
+    Roster x rundy z indeksu regat (tylko rundy, które istnieją w sezonie ligi,
+    albo podana Runda) x wyniki po (ID_Regat, klub) – złączenia zamiast pętli po rundach.
+    """
+    df = roster.merge(rundy, on=["Liga_Poziom","Rok"], how="inner")
+    df = df[df["Runda"].isna() | (df["Runda"] == df["Numer_Rundy"])]
+
+    # jak dawny słownik place: przy powtórzonym (regaty, klub) wygrywa ostatni wiersz
+    miejsca = wyn.drop_duplicates(["ID_Regat","Skrot"], keep="last")
+    df = df.merge(miejsca, on=["ID_Regat","Skrot"], how="inner")
+    df = df.sort_values(["_wiersz","Numer_Rundy"], kind="stable").reset_index(drop=True)
+
+    df["ID_wystepowania"] = None
+    for liga_use, grupa in df.groupby("Liga_Poziom", sort=False):
+        params = [{"rok": int(r), "runda": int(n), "zawodnik": z, "klub": k}
+                  for r, n, z, k in zip(grupa["Rok"], grupa["Numer_Rundy"], grupa["ID_Zawodnika"], grupa["Skrot"])]
+        df.loc[grupa.index, "ID_wystepowania"] = generate_numeric_ids("wystepowanie", liga_use, params)
+    df["ID_Regat"] = df["ID_Regat"].map("{:08d}".format)
+    return df[KOLUMNY_WYJSCIA]
+
+def uruchom(args):
+    with metrics.etap("wczytanie") as e:
+        wyn = norm_cols(load_csv_any(args.wyniki))
+        if not set(["regaty","klub","miejsceWRegatach"]).issubset(wyn.columns):
+            print("Brakuje kolumn w all_wynikRegat.csv"); return
+        wyn = pd.DataFrame({
+            "ID_Regat": pd.to_numeric(wyn["regaty"], errors="coerce"),
+            "Skrot": wyn["klub"].astype(str),
+            "WynikWRegatach": wyn["miejsceWRegatach"],
+        }).dropna(subset=["ID_Regat"]).astype({"ID_Regat": "int64"})
+        rost = norm_cols(load_csv_any(args.zawodnicy))
+        e.dodaj(wiersze_we=len(wyn) + len(rost), wiersze_wy=len(rost))
+
     liga_file, rok_file = infer_liga_rok_from_filename(args.zawodnicy)
     liga = args.liga or liga_file
     if str(liga).lower()=='ekstraklsa': liga='Ekstraklasa'
     rok = args.rok or rok_file
 
-    out_rows=[]; shown=0
-    for _, row in rost.iterrows():
-        if shown>=args.limit: break
-        skrot = str(row.get(club_col,"")).strip()
-        if not skrot: continue
-
-        # Imię/Nazwisko do logu
-        if name_mode:
-            a,b = name_mode
-            if b is None:
-                imie = ""; nazwisko = str(row.get(a,"")).strip()
-                fullname = nazwisko
-            else:
-                imie = str(row.get(a,"")).strip(); nazwisko = str(row.get(b,"")).strip()
-                fullname = f"{imie} {nazwisko}".strip()
-        else:
-            imie = ""; nazwisko = str(row.get("Zawodnik","")).strip()
-            fullname = nazwisko
-
-        # wariant A/B
-        if args.variant=="B":
-            liga_use = row.get("poziom_ligi", liga)
-            rok_use = int(row.get("rok", rok))
-            runda_val = row.get("Runda", row.get("numer rundy", None))
-            candidate_rundy = [int(runda_val)] if pd.notna(runda_val) else list(range(1,13))
-        else:
-            liga_use = liga; rok_use = rok
-            runda_val = row.get("Runda", None)
-            candidate_rundy = [int(runda_val)] if pd.notna(runda_val) else list(range(1,13))
-
-        # ID zawodnika
-        if id_col and pd.notna(row.get(id_col, np.nan)):
-            try:
-                zawodnik_id = str(int(row[id_col])).zfill(8) if len(str(int(row[id_col])))<=8 else str(int(row[id_col]))
-            except Exception:
-                zawodnik_id = str(row[id_col]).strip()
-        else:
-            zawodnik_id = generate_numeric_id("zawodnik", str(liga_use), rok=rok_use, klub=skrot, nazwisko_imie=fullname)
+    with metrics.etap("dopasowanie") as e:
+        roster = przygotuj_roster(rost, liga, rok, args.variant)
+        if roster is None: return
+        wyst = zbuduj_wystepowania(roster, wyn, regaty_index.wczytaj().ramka())
+        e.dodaj(wiersze_we=len(roster), wiersze_wy=len(wyst))
 
-        # iteracja po rundach
-        for nr in candidate_rundy:
-            try:
-                rid = generate_numeric_id("regaty", str(liga_use), rok=rok_use, runda=int(nr))
-            except Exception:
-                continue
-            if rid not in reg_ids: continue
-            if (rid, skrot) not in place: continue
-            miejsce = place[(rid, skrot)]
-            wyst_id = generate_numeric_id("wystepowanie", str(liga_use), rok=rok_use, runda=int(nr), zawodnik=zawodnik_id, klub=skrot)
-
-            # WYPIS PARAMETRÓW
-            print(
-                f"Zawodnik={imie} {nazwisko}; Klub={skrot}; Liga={liga_use}; Rok={rok_use}; Runda={nr}; "
-                f"ID_Regat={rid}; WynikWRegatach={miejsce}; ID_Zawodnika={zawodnik_id}; ID_wystepowania={wyst_id}"
-            )
-
-            shown+=1
-            if shown>=args.limit: break
-
-    if shown==0:
+    if wyst.empty:
         print("❌ Demo nie znalazło pasujących rekordów. Sprawdź ligę/rok/rundy lub nazwy klubów.")
+        return
+
+    if args.batch:
+        with metrics.etap("zapis") as e:
+            folder = os.path.dirname(args.out)
+            if folder: os.makedirs(folder, exist_ok=True)
+            wyst.to_csv(args.out, index=False, encoding="utf-8-sig")
+            e.dodaj(wiersze_we=len(wyst), wiersze_wy=len(wyst))
+        print(f"💾 Zapisano {len(wyst)} występowań ({wyst['ID_Zawodnika'].nunique()} zawodników) -> {args.out}")
+        return
+
+    # WYPIS PARAMETRÓW
+    for r in wyst.head(args.limit).itertuples(index=False):
+        print(
+            f"Zawodnik={r.Imie} {r.Nazwisko}; Klub={r.Skrot}; Liga={r.Liga_Poziom}; Rok={r.Rok}; Runda={r.Numer_Rundy}; "
+            f"ID_Regat={r.ID_Regat}; WynikWRegatach={r.WynikWRegatach}; ID_Zawodnika={r.ID_Zawodnika}; ID_wystepowania={r.ID_wystepowania}"
+        )
+
+def main(argv=None):
+    args = parse_args(argv)
+    metrics.wlacz_z_argumentow(args, "demo_wystepowania")
+    uruchom(args)
+    metrics.zakoncz_z_argumentow(args)
 
 if __name__=='__main__':
     main()
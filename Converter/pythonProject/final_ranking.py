@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+final_ranking.py – klasyfikacja regat z wyścigów (GOLD/SILVER + finał) prosto z ramek main.py
+
+Odpowiednik zapytania z "zapytanieOKlubyZFinałami.txt", dla wielu regat naraz:
+  1) jeden wynik na (klub, wyścig) – MIN(Zajete_miejsce),
+  2) Suma_Przefinalem = suma miejsc z wyścigów o Numer_wyscigu <> 0,
+  3) ranking po (Suma_Przefinalem, klub); pierwsza połowa (CEIL(n/2)) = GOLD, reszta = SILVER,
+  4) Suma_Po_Finalu = Suma_Przefinalem + miejsce w finale (Numer_wyscigu = 0, brak = 0),
+  5) miejsce w grupie po (Suma_Po_Finalu, klub); SILVER zaczyna się od CEIL(n/2) + 1.
+Klub = ID_wariantu_klubu (w zapytaniu SQL był to Skrot) – decyduje tylko przy remisach.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import miejsca_store
+import schemat
+
+MERGE_DIR = "./mnt/data/output/main/merge"
+OUT_DIR = "./mnt/data/output/ranking"
+
+KOLUMNY = ["ID_Regat", "Klub", "Suma_Przefinalem", "Wynik_Finalu", "Suma_Po_Finalu",
+           "Final_Grupa", "Miejsce_Koncowe"]
+
+
+def ranking_z_finalem(miejsca: pd.DataFrame, wyscigi: pd.DataFrame, klub: str = "ID_wariantu_klubu") -> pd.DataFrame:
+    """
+    miejsca: ID_wyscigu, <klub>, Zajete_miejsce   (_miejsca / all_miejsca.csv)
+    wyscigi: ID_wyscigu, ID_Regat, Numer_wyscigu  (_wyscigi / all_wyscigi.csv)
+    Zwraca KOLUMNY, posortowane po (ID_Regat, Miejsce_Koncowe). Kluby bez
+    żadnego wyścigu przed finałem nie są klasyfikowane (jak w SQL).
+    """
+    if miejsca.empty or wyscigi.empty:
+        return pd.DataFrame(columns=KOLUMNY)
+
+    # 1) jeden wynik na wyścig i klub
+    uniq = (
+        miejsca.groupby([klub, "ID_wyscigu"], sort=False)["Zajete_miejsce"].min()
+        .rename("miejsce").reset_index()
+    )
+    w = wyscigi[["ID_wyscigu", "ID_Regat"]].copy()
+    # CAST(Numer_wyscigu AS UNSIGNED) – tekst bez liczby liczy się jak 0
+    w["finalowy"] = pd.to_numeric(wyscigi["Numer_wyscigu"], errors="coerce").fillna(0).to_numpy() == 0
+    u = uniq.merge(w, on="ID_wyscigu", how="inner").rename(columns={klub: "Klub"})
+    # schemat czyta Zajete_miejsce jako float32 – sumy w float64 jak w standings_live
+    u["miejsce"] = u["miejsce"].astype("float64")
+
+    # 2) + 3) sumy przed finałem i wynik finału
+    klucz = ["ID_Regat", "Klub"]
+    pre = u[~u["finalowy"]].groupby(klucz)["miejsce"].sum().rename("Suma_Przefinalem")
+    fin = u[u["finalowy"]].groupby(klucz)["miejsce"].min().rename("Wynik_Finalu")
+    t = pre.to_frame().join(fin, how="left").reset_index()
+    if t.empty:
+        return pd.DataFrame(columns=KOLUMNY)
+
+    # 4) ranking przed finałem i podział na połowy
+    t = t.sort_values(["ID_Regat", "Suma_Przefinalem", "Klub"], kind="mergesort")
+    pre_rank = t.groupby("ID_Regat", sort=False).cumcount().to_numpy() + 1
+    nteams = t.groupby("ID_Regat", sort=False)["Klub"].transform("size").to_numpy()
+    half = (nteams + 1) // 2
+
+    t["Final_Grupa"] = np.where(pre_rank <= half, "GOLD", "SILVER")
+    t["half"] = half
+    t["Wynik_Finalu"] = t["Wynik_Finalu"].fillna(0)
+    t["Suma_Po_Finalu"] = t["Suma_Przefinalem"] + t["Wynik_Finalu"]
+
+    # 5) miejsce w grupie
+    t = t.sort_values(["ID_Regat", "Final_Grupa", "Suma_Po_Finalu", "Klub"], kind="mergesort")
+    rn = t.groupby(["ID_Regat", "Final_Grupa"], sort=False).cumcount().to_numpy() + 1
+    t["Miejsce_Koncowe"] = np.where(t["Final_Grupa"].to_numpy() == "GOLD", rn, t["half"].to_numpy() + rn)
+
+    t = t.sort_values(["ID_Regat", "Miejsce_Koncowe"], kind="mergesort")
+    return t[KOLUMNY].reset_index(drop=True)
+
+
+def wynik_regat_z_rankingu(ranking: pd.DataFrame) -> pd.DataFrame:
+    """Ranking -> tabela _wynikRegat (ten sam układ kolumn co z kolumny M-sce)."""
+    return pd.DataFrame({
+        "ID_wynikRegat": "",
+        "regaty": ranking["ID_Regat"].to_numpy(),
+        "ID_wariantu_klubu": ranking["Klub"].to_numpy(),
+        "miejsceWRegatach": ranking["Miejsce_Koncowe"].astype(np.int64).to_numpy(),
+    })
+
+
+# -------------------------------
+# MAIN – wszystkie regaty z połączonych CSV
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Klasyfikacja regat GOLD/SILVER z wyścigów (all_miejsca + all_wyscigi).")
+    ap.add_argument("--merge-dir", default=MERGE_DIR, help="folder z all_miejsca.csv i all_wyscigi.csv")
+    ap.add_argument("--magazyn", nargs="?", const=miejsca_store.MAGAZYN_PATH, default=None,
+                    help=f"czytaj miejsca z binarnego magazynu (domyślnie {miejsca_store.MAGAZYN_PATH}) zamiast CSV")
+    ap.add_argument("--out", default=os.path.join(OUT_DIR, "ranking_z_finalem.csv"))
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.magazyn:
+        miejsca, wyscigi = miejsca_store.wczytaj(args.magazyn).ramki()
+    else:
+        miejsca = schemat.wczytaj_csv(os.path.join(args.merge_dir, "all_miejsca.csv"), "miejsca",
+                                      usecols=["ID_wyscigu", "ID_wariantu_klubu", "Zajete_miejsce"])
+        wyscigi = schemat.wczytaj_csv(os.path.join(args.merge_dir, "all_wyscigi.csv"), "wyscigi",
+                                      usecols=["ID_wyscigu", "ID_Regat", "Numer_wyscigu"])
+
+    ranking = ranking_z_finalem(miejsca, wyscigi)
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    ranking.to_csv(args.out, index=False)
+    print(f"✅ Sklasyfikowano {ranking['ID_Regat'].nunique()} regat, {len(ranking)} klubów")
+    print(f"Zapisano: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+id_index.py – trwały, globalny indeks wszystkich wygenerowanych ID
+
+ID to 4 bajty SHA1 modulo 100 000 000, więc dwa różne klucze mogą dostać to samo ID.
+Indeks pamięta, z jakiego klucza (np. "regaty|liga_poziom=1 Liga|rok=2019|runda=1")
+powstało każde ID – wspólnie dla regat, wyścigów, wariantów klubów i zawodników:
+✔ rejestruj() – O(1) w słowniku; to samo ID z innym kluczem = kolizja zgłaszana od razu,
+✔ ids() – posortowana tablica uint32 do sprawdzania całych kolumn (np.searchsorted),
+✔ zapis w .npz (ids + klucze + kolizje), między uruchomieniami.
+"""
+
+import os
+
+import numpy as np
+
+INDEKS_PATH = "./mnt/data/output/id_index.npz"
+
+
+class IndeksID:
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._mapa = {}          # ID -> klucz kanoniczny
+        self.kolizje = []        # (ID, klucz_w_indeksie, nowy_klucz)
+        self._kolizje_set = set()
+        self._ids = None         # posortowana tablica, liczona leniwie
+        self.zmieniony = False
+
+        if path and os.path.isfile(path):
+            try:
+                with np.load(path, allow_pickle=False) as dane:
+                    self._mapa = dict(zip(dane["ids"].tolist(), dane["klucze"].tolist()))
+                    for id_, (stary, nowy) in zip(dane["kolizje_ids"].tolist(), dane["kolizje_klucze"].tolist()):
+                        self._dodaj_kolizje(id_, stary, nowy)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠ Pomijam uszkodzony indeks ID {path}: {e}")
+                self._mapa, self.kolizje, self._kolizje_set = {}, [], set()
+
+    def __len__(self) -> int:
+        return len(self._mapa)
+
+    def _dodaj_kolizje(self, numeric_id: int, stary: str, nowy: str) -> bool:
+        para = (numeric_id, stary, nowy)
+        if para in self._kolizje_set:
+            return False
+        self._kolizje_set.add(para)
+        self.kolizje.append(para)
+        return True
+
+    def rejestruj(self, numeric_id: int, klucz: str) -> bool:
+        """Zapisuje ID z jego kluczem. False = to ID ma już inny klucz (kolizja)."""
+        stary = self._mapa.get(numeric_id)
+        if stary is None:
+            self._mapa[numeric_id] = klucz
+            self._ids = None
+            self.zmieniony = True
+            return True
+        if stary == klucz:
+            return True
+
+        if self._dodaj_kolizje(numeric_id, stary, klucz):
+            self.zmieniony = True
+            print(f"❌ Kolizja ID {numeric_id:08d}: '{stary}' i '{klucz}'")
+        return False
+
+    def klucz(self, numeric_id: int):
+        """Klucz, z którego powstało ID (None, jeśli nieznane)."""
+        return self._mapa.get(int(numeric_id))
+
+    def ids(self) -> np.ndarray:
+        if self._ids is None:
+            self._ids = np.sort(np.fromiter(self._mapa.keys(), dtype=np.uint32, count=len(self._mapa)))
+        return self._ids
+
+    def nieznane(self, kolumna) -> np.ndarray:
+        """ID z kolumny (np. ID_Regat z CSV), których nie ma w indeksie – bez powtórzeń."""
+        wartosci = np.unique(np.asarray(kolumna, dtype=np.int64))
+        ids = self.ids()
+        if ids.size == 0:
+            return wartosci
+        poz = np.searchsorted(ids, wartosci).clip(max=ids.size - 1)
+        return wartosci[ids[poz] != wartosci]
+
+    def zapisz(self, path: str = None) -> None:
+        path = path or self.path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        ids = self.ids()
+        klucze = np.array([self._mapa[i] for i in ids.tolist()], dtype=str)
+        kolizje_ids = np.array([k[0] for k in self.kolizje], dtype=np.uint32)
+        kolizje_klucze = np.array([k[1:] for k in self.kolizje], dtype=str).reshape(-1, 2)
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, ids=ids, klucze=klucze,
+                                kolizje_ids=kolizje_ids, kolizje_klucze=kolizje_klucze)
+        os.replace(tmp, path)
+        self.zmieniony = False
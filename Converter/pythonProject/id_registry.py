@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+id_registry.py – wspólny rejestr deterministycznych ID (main.py, kluby.py, demo_twWystepowania.py)
+
+ID = pierwsze 4 bajty SHA1 z "typ|liga_poziom=...|k=v|..." modulo 100 000 000.
+✔ pamięć LRU – ten sam zestaw parametrów nie jest formatowany ani hashowany drugi raz,
+✔ API wsadowe – generate_numeric_ids() dla wielu zestawów parametrów naraz,
+✔ opcjonalny cache na dysku (JSON), który przeżywa między uruchomieniami,
+✔ opcjonalny globalny indeks ID (id_index.py) – kolizje zgłaszane przy generowaniu.
+"""
+
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+from id_index import IndeksID
+
+MEMO_SIZE = 1 << 16
+
+_cache_dyskowy = None       # base_string -> int, gdy włączony cache na dysku
+_cache_dyskowy_path = None
+_cache_dyskowy_zmieniony = False
+_nowe_wpisy = {}            # wpisy dodane od ostatniego pobierz_nowe_wpisy()
+_zbieraj_wszystkie = False  # proces roboczy: zgłaszaj każde nowe ID (dla indeksu w procesie głównym)
+_indeks = None              # IndeksID, gdy włączony globalny indeks
+
+
+# ----------------------------------------
+# NORMALIZACJA – WSPÓLNA DLA WSZYSTKICH SKRYPTÓW
+# ----------------------------------------
+
+def _norm(s: str) -> str:
+    """Podstawowa normalizacja – przycięcie i zbicie wielu spacji w jedną."""
+    if s is None:
+        return ""
+    return re.sub(r"\s+", " ", str(s).strip())
+
+
+def _norm_key(s: str) -> str:
+    """
+    Normalizacja skrótu klubu:
+    - przycięcie,
+    - zbicie wielu spacji,
+    - USUNIĘCIE wszystkich spacji,
+    - wielkie litery.
+    Dzięki temu 'PJK', 'P J K', ' PJK ' -> 'PJK'.
+    """
+    base = _norm(s)
+    base = base.replace(" ", "")
+    return base.upper()
+
+
+def _norm_name(s: str) -> str:
+    """Normalizacja nazwy klubu – tylko porządkowanie spacji."""
+    return _norm(s)
+
+
+# ----------------------------------------
+# HASH
+# ----------------------------------------
+
+def _klucz(params: dict) -> tuple:
+    """
+    Klucz pamięci: posortowane (nazwa, typ, wartość). Typ jest w kluczu, bo
+    1 == 1.0 == True dają ten sam hash, a różne teksty ("1", "1.0", "True").
+    """
+    return tuple(sorted((k, type(v), v) for k, v in params.items()))
+
+
+def _base_string(typ: str, liga_poziom: str, params_items: tuple) -> str:
+    param_string = f"liga_poziom={liga_poziom}|" + "|".join(
+        f"{k}={v}" for k, _, v in params_items
+    )
+    return f"{typ}|{param_string}"
+
+
+def _sha1_id(base_string: str) -> int:
+    hash_bytes = hashlib.sha1(base_string.encode()).digest()
+    return int.from_bytes(hash_bytes[:4], byteorder="big") % 100_000_000
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _id_z_klucza(base_string: str) -> int:
+    """ID dla gotowego klucza: cache na dysku -> SHA1, potem rejestracja w indeksie."""
+    global _cache_dyskowy_zmieniony
+
+    numeric_id = None if _cache_dyskowy is None else _cache_dyskowy.get(base_string)
+    if numeric_id is None:
+        numeric_id = _sha1_id(base_string)
+        if _cache_dyskowy is not None:
+            _cache_dyskowy[base_string] = numeric_id
+            _nowe_wpisy[base_string] = numeric_id
+            _cache_dyskowy_zmieniony = True
+
+    if _zbieraj_wszystkie:
+        _nowe_wpisy[base_string] = numeric_id
+    if _indeks is not None:
+        _indeks.rejestruj(numeric_id, base_string)
+    return numeric_id
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _numeric_id(typ: str, liga_poziom: str, params_items: tuple) -> int:
+    """params_items = wynik _klucz() – klucz pamięci LRU."""
+    return _id_z_klucza(_base_string(typ, liga_poziom, params_items))
+
+
+def id_z_klucza(base_string: str) -> int:
+    """
+    ID dla klucza spoza schematu typ|liga_poziom=...|... (np. 'zawodnik|name_norm=...'),
+    z tym samym cache i indeksem co pozostałe ID.
+    """
+    return _id_z_klucza(base_string)
+
+
+def generate_numeric_id_int(typ: str, liga_poziom: str, **params) -> int:
+    """Kanoniczne ID jako int (tak jak dotąd zwracało kluby.py)."""
+    return _numeric_id(typ, str(liga_poziom), _klucz(params))
+
+
+def generate_numeric_id(typ: str, liga_poziom: str, **params) -> str:
+    """
+    Kanoniczne ID: 8 cyfr z SHA1 (zero-padded string, jak w main.py).
+    """
+    return f"{generate_numeric_id_int(typ, liga_poziom, **params):08d}"
+
+
+def generate_numeric_ids(typ: str, liga_poziom: str, params_list, as_int: bool = False) -> list:
+    """
+    Wersja wsadowa: jedno ID dla każdego słownika parametrów z params_list
+    (w tej samej kolejności). Powtarzające się zestawy liczone są raz.
+    """
+    liga_poziom = str(liga_poziom)
+    klucze = [_klucz(p) for p in params_list]
+    wyniki = {k: _numeric_id(typ, liga_poziom, k) for k in dict.fromkeys(klucze)}
+    if as_int:
+        return [wyniki[k] for k in klucze]
+    return [f"{wyniki[k]:08d}" for k in klucze]
+
+
+def calc_club_variant_id_int(skrot_raw: str, nazwa_raw: str) -> int:
+    return generate_numeric_id_int(
+        "KLUB_WARIANT", "ALL",
+        Skrot=_norm_key(skrot_raw),
+        Nazwa=_norm_name(nazwa_raw),
+    )
+
+
+def calc_club_variant_id(skrot_raw: str, nazwa_raw: str) -> str:
+    """
+    Jedyny sposób liczenia ID_wariantu_klubu – identyczny w main.py i kluby.py.
+    """
+    return f"{calc_club_variant_id_int(skrot_raw, nazwa_raw):08d}"
+
+
+# ----------------------------------------
+# CACHE NA DYSKU
+# ----------------------------------------
+
+def wlacz_cache_dyskowy(path: str) -> int:
+    """
+    Włącza cache ID na dysku (JSON: base_string -> ID). Zwraca liczbę
+    wczytanych wpisów. Nieczytelny plik traktujemy jak pusty cache.
+    """
+    global _cache_dyskowy, _cache_dyskowy_path, _cache_dyskowy_zmieniony
+
+    dane = {}
+    if os.path.isfile(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                dane = {k: int(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            print(f"⚠ Pomijam uszkodzony cache ID {path}: {e}")
+            dane = {}
+
+    _cache_dyskowy = dane
+    _cache_dyskowy_path = path
+    _cache_dyskowy_zmieniony = False
+    _nowe_wpisy.clear()
+    _wyczysc_pamiec()
+    return len(dane)
+
+
+def _wyczysc_pamiec() -> None:
+    _numeric_id.cache_clear()
+    _id_z_klucza.cache_clear()
+
+
+def zbieraj_nowe_wpisy() -> None:
+    """
+    W procesie roboczym: pobierz_nowe_wpisy() zwraca każde nowo policzone ID
+    (nie tylko nowe dla cache), żeby proces główny mógł je dodać do indeksu.
+    """
+    global _zbieraj_wszystkie
+    _zbieraj_wszystkie = True
+    _wyczysc_pamiec()
+
+
+def pobierz_nowe_wpisy() -> dict:
+    """
+    Zwraca (i czyści) wpisy dodane do cache od ostatniego wywołania.
+    Używane przez procesy robocze, żeby przekazać nowe ID do procesu głównego.
+    """
+    nowe = dict(_nowe_wpisy)
+    _nowe_wpisy.clear()
+    return nowe
+
+
+def dodaj_wpisy(wpisy: dict) -> None:
+    """Dokłada do cache i indeksu wpisy policzone w innym procesie."""
+    global _cache_dyskowy_zmieniony
+
+    if _indeks is not None:
+        for base_string, numeric_id in wpisy.items():
+            _indeks.rejestruj(numeric_id, base_string)
+
+    if _cache_dyskowy is None or not wpisy:
+        return
+    nowe = {k: v for k, v in wpisy.items() if k not in _cache_dyskowy}
+    if nowe:
+        _cache_dyskowy.update(nowe)
+        _cache_dyskowy_zmieniony = True
+
+
+def zapisz_cache_dyskowy() -> None:
+    """Zapisuje cache na dysk (tylko jeśli przybyły nowe wpisy)."""
+    global _cache_dyskowy_zmieniony
+
+    if _cache_dyskowy is None or not _cache_dyskowy_zmieniony:
+        return
+
+    folder = os.path.dirname(_cache_dyskowy_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    tmp = f"{_cache_dyskowy_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_cache_dyskowy, f, ensure_ascii=False)
+    os.replace(tmp, _cache_dyskowy_path)
+    _cache_dyskowy_zmieniony = False
+
+
+# ----------------------------------------
+# GLOBALNY INDEKS ID
+# ----------------------------------------
+
+def wlacz_indeks(path: str) -> IndeksID:
+    """
+    Włącza globalny indeks ID (id_index.py). Od tej chwili każde wygenerowane
+    ID jest w nim rejestrowane, a kolizja z innym kluczem zgłaszana od razu.
+    """
+    global _indeks
+    _indeks = IndeksID(path)
+    _wyczysc_pamiec()   # ID z pamięci LRU też muszą przejść przez indeks
+    return _indeks
+
+
+def indeks():
+    """Aktywny IndeksID albo None."""
+    return _indeks
+
+
+def zapisz_indeks() -> None:
+    if _indeks is not None and _indeks.zmieniony:
+        _indeks.zapisz()
@@ -1,137 +1,127 @@
 import os
 import re
 import glob
-import hashlib
+import argparse
+import time
 import pandas as pd
 from collections import Counter
 
+# normalizacja i ID – wspólne z main.py (id_registry.py);
+# kluby.py od zawsze trzyma ID jako int – stąd wariant *_int
+from id_registry import (
+    _norm,
+    _norm_key,
+    _norm_name,
+    calc_club_variant_id_int as calc_club_variant_id,
+)
+import kluby_index
+import metrics
+import schemat
+from manifest import Manifest
+from source_catalog import Katalog
+
 BASE_DIR = "./mnt/data/Regaty"
+XLSX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "PLŻ wyniki")
 OUT_DIR  = "./mnt/data/kluby"
 MAPPING_PATH = "./mnt/data/kluby/Kluby_tablica.csv"
 
+# manifest trybu --incremental (pary klubów z każdego pliku trzymane w manifeście)
+MANIFEST_FILE = ".manifest_kluby.json"
+WERSJA_WYCIAGU = "kluby.py/1"
+
 os.makedirs(OUT_DIR, exist_ok=True)
 
 # ----------------------------------------
-# NORMALIZACJA – IDENTYCZNA Z main.py
+# Wczytywanie klubów z CSV – TAK SAMO JAK W main.py
 # ----------------------------------------
 
-def _norm(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s).strip()
-    return re.sub(r"\s+", " ", s)
-
-
-def _norm_key(s: str) -> str:
+def _pary_z_pliku(katalog: Katalog, plik):
     """
-    Normalizacja skrótu:
-    - przycięcie,
-    - redukcja wielu spacji,
-    - usunięcie spacji ze środka,
-    - zamiana na UPPER
-
-    Dzięki temu:
-    'P JK', 'P  J K', ' pjk ' -> 'PJK'
+    Pary (Skrot, Nazwa) z jednego pliku rundy, używając:
+      - skrót: kolumna 'Skrót' lub 'Zespół'
+      - nazwa: kolumna 'Klub' (jeśli istnieje), inaczej pusty string
+    Zwraca None, jeśli pliku nie da się wczytać.
     """
-    base = _norm(s)
-    base = base.replace(" ", "")
-    return base.upper()
-
-
-def _norm_name(s: str) -> str:
-    """normalizacja nazwy — pojedyncze spacje (bez zmiany wielkości liter)"""
-    return _norm(s)
-
-
-# ----------------------------------------
-# GENEROWANIE ID – WSPÓLNE Z main.py
-# ----------------------------------------
-
-def generate_numeric_id(typ: str, liga_poziom: str, **params) -> int:
-    param_string = (
-        f"liga_poziom={liga_poziom}|"
-        + "|".join(f"{k}={v}" for k, v in sorted(params.items()))
+    try:
+        df = katalog.wczytaj(plik)
+    except Exception:
+        return None
+
+    # dokładnie jak w main.py:
+    club_col = "Skrót" if "Skrót" in df.columns else (
+        "Zespół" if "Zespół" in df.columns else None
     )
-    base_string = f"{typ}|{param_string}"
-    hash_bytes = hashlib.sha1(base_string.encode()).digest()
-    return int.from_bytes(hash_bytes[:4], "big") % 100_000_000
+    if club_col is None:
+        # ten plik main.py też by pominął
+        return []
 
+    rows = []
+    for _, r in df.iterrows():
+        skrot = _norm(r[club_col]) if club_col in df.columns else ""
+        # nazwa klubu – jeśli kolumna istnieje
+        if "Klub" in df.columns:
+            nazwa = _norm(r["Klub"])
+        else:
+            nazwa = ""
+
+        if not skrot and nazwa:
+            auto = re.sub(r"[^A-Za-z0-9]", "", nazwa.upper())[:6]
+            skrot = auto or "TMP"
+
+        if not skrot and not nazwa:
+            continue
 
-def calc_club_variant_id(skrot_raw: str, nazwa_raw: str) -> int:
-    sk = _norm_key(skrot_raw)
-    nm = _norm_name(nazwa_raw)
-    return generate_numeric_id(
-        "KLUB_WARIANT", "ALL", Skrot=sk, Nazwa=nm
-    )
+        rows.append({"Skrot": skrot, "Nazwa": nazwa})
 
+    return rows
 
-# ----------------------------------------
-# Wczytywanie klubów z CSV – TAK SAMO JAK W main.py
-# ----------------------------------------
 
-def scan_clubs():
+def scan_clubs(manifest=None, katalog: Katalog = None, etap=None):
     """
-    Przechodzi po katalogu ./mnt/data/Regaty TAK SAMO jak main.py i
-    z każdego pliku .csv wyciąga pary (Skrot, NazwaKlubu), używając:
-      - skrót: kolumna 'Skrót' lub 'Zespół'
-      - nazwa: kolumna 'Klub' (jeśli istnieje), inaczej pusty string
+    Bierze pliki .csv z katalogu źródeł (source_catalog.Katalog – ten sam,
+    którego używa main.py; także foldery bez numeru rundy) i z każdego
+    wyciąga pary (Skrot, NazwaKlubu).
+
+    Z manifestem (tryb --incremental) pary z niezmienionych plików
+    brane są z manifestu, bez ponownego czytania CSV.
+    etap (metrics.Etap) dostaje czas i liczbę wierszy każdego pliku.
+    Skrot/Nazwa wracają jako category (schemat.TYPY["kluby"]).
     """
+    if katalog is None:
+        katalog = Katalog(BASE_DIR)
+
     raw_rows = []
     seen_files = 0
 
-    for year_folder in os.listdir(BASE_DIR):
-        year_path = os.path.join(BASE_DIR, year_folder)
-        if not os.path.isdir(year_path):
-            continue
-
-        for liga_folder_raw in os.listdir(year_path):
-            liga_path = os.path.join(year_path, liga_folder_raw)
-            if not os.path.isdir(liga_path):
+    for plik in katalog.pliki:
+        start = time.perf_counter()
+        rows = None
+        status = "ok"
+        if manifest is not None:
+            bez_zmian, info = manifest.sprawdz(plik.path)
+            if bez_zmian:
+                rows = manifest.dane(plik.path)
+                status = "pominiety"
+
+        if rows is None:
+            rows = _pary_z_pliku(katalog, plik)
+            if rows is None:
+                if etap is not None:
+                    etap.plik(plik.path, czas_s=time.perf_counter() - start, status="blad")
                 continue
+            if manifest is not None:
+                manifest.zapisz_wpis(plik.path, info, outputs=[], dane=rows)
 
-            for runda_folder in os.listdir(liga_path):
-                runda_path = os.path.join(liga_path, runda_folder)
-                if not os.path.isdir(runda_path):
-                    continue
-
-                for file in os.listdir(runda_path):
-                    if not file.endswith(".csv"):
-                        continue
-
-                    csv_path = os.path.join(runda_path, file)
-                    try:
-                        df = pd.read_csv(csv_path)
-                    except Exception:
-                        continue
-
-                    seen_files += 1
+        if etap is not None:
+            etap.plik(plik.path, czas_s=time.perf_counter() - start, wiersze_we=len(rows),
+                      wiersze_wy=len(rows), status=status)
+        seen_files += 1
+        raw_rows.extend(rows)
 
-                    # dokładnie jak w main.py:
-                    club_col = "Skrót" if "Skrót" in df.columns else (
-                        "Zespół" if "Zespół" in df.columns else None
-                    )
-                    if club_col is None:
-                        # ten plik main.py też by pominął
-                        continue
+    if manifest is not None:
+        manifest.usun_nieaktualne(p.path for p in katalog.pliki)
 
-                    for _, r in df.iterrows():
-                        skrot = _norm(r[club_col]) if club_col in df.columns else ""
-                        # nazwa klubu – jeśli kolumna istnieje
-                        if "Klub" in df.columns:
-                            nazwa = _norm(r["Klub"])
-                        else:
-                            nazwa = ""
-
-                        if not skrot and nazwa:
-                            auto = re.sub(r"[^A-Za-z0-9]", "", nazwa.upper())[:6]
-                            skrot = auto or "TMP"
-
-                        if not skrot and not nazwa:
-                            continue
-
-                        raw_rows.append({"Skrot": skrot, "Nazwa": nazwa})
-
-    return pd.DataFrame(raw_rows), seen_files
+    return schemat.typuj(pd.DataFrame(raw_rows), "kluby"), seen_files
 
 
 # ----------------------------------------
@@ -145,7 +135,7 @@ def build_pairs(raw_df: pd.DataFrame) -> pd.DataFrame:
     raw_df["Sk_norm"] = raw_df["Skrot"].map(_norm_key)
     raw_df["Nm_norm"] = raw_df["Nazwa"].map(_norm_name)
 
-    grouped = raw_df.groupby(["Sk_norm", "Nm_norm"]).size().reset_index()
+    grouped = raw_df.groupby(["Sk_norm", "Nm_norm"], observed=True).size().reset_index()
 
     rows = []
     for _, r in grouped.iterrows():
@@ -163,7 +153,7 @@ def build_pairs(raw_df: pd.DataFrame) -> pd.DataFrame:
             "Nazwa": nm_norm
         })
 
-    return pd.DataFrame(rows).sort_values(["Skrot", "Nazwa"])
+    return schemat.typuj(pd.DataFrame(rows).sort_values(["Skrot", "Nazwa"]), "kluby")
 
 
 # ----------------------------------------
@@ -171,30 +161,14 @@ def build_pairs(raw_df: pd.DataFrame) -> pd.DataFrame:
 # ----------------------------------------
 
 def load_mapping():
-    if not os.path.exists(MAPPING_PATH):
-        return pd.DataFrame()
-
-    df = pd.read_csv(MAPPING_PATH)
+    """{skrót_norm: ID_zestawienia_klubow} z Kluby_tablica.csv (kluby_index.wczytaj_tablice)."""
+    return kluby_index.wczytaj_tablice(MAPPING_PATH)
 
-    rows = []
-    for _, r in df.iterrows():
-        id_z = r["ID_zestawienia_klubow"]
-        sk_field = _norm(r["Skrot"])
-
-        for part in sk_field.split(";"):
-            part = _norm(part)
-            rows.append({
-                "ID_zestawienia_klubow": id_z,
-                "Sk_norm": _norm_key(part)
-            })
 
-    return pd.DataFrame(rows)
-
-
-def attach_zestawienie_ids(df_pairs: pd.DataFrame, mapping: pd.DataFrame):
+def attach_zestawienie_ids(df_pairs: pd.DataFrame, mapping: dict):
     df = df_pairs.copy()
-    df["Sk_norm"] = df["Skrot"].map(_norm_key)
-    return df.merge(mapping, on="Sk_norm", how="left").drop(columns=["Sk_norm"])
+    df["ID_zestawienia_klubow"] = df["Skrot"].map(_norm_key).map(mapping)
+    return schemat.typuj(df, "kluby")
 
 
 # ----------------------------------------
@@ -207,20 +181,23 @@ def add_variant_ids(df: pd.DataFrame):
         lambda r: calc_club_variant_id(r["Skrot"], r["Nazwa"]),
         axis=1
     )
-    return df
+    return schemat.typuj(df, "kluby")
 
 
 def save_outputs(df):
     out_csv = os.path.join(OUT_DIR, "kluby_wyciag.csv")
     out_sql = os.path.join(OUT_DIR, "kluby_insert.sql")
 
-    df.to_csv(out_csv, index=False)
+    # kluby_wyciag.csv od zawsze ma ID bez zer wiodących
+    schemat.do_csv(df, out_csv, "kluby", zera=False)
 
     with open(out_sql, "w", encoding="utf-8") as f:
         for _, r in df.iterrows():
+            # skrót spoza Kluby_tablica.csv -> NULL zamiast błędu int(NaN)
+            zestawienie = "NULL" if pd.isna(r["ID_zestawienia_klubow"]) else int(r["ID_zestawienia_klubow"])
             f.write(
                 f"INSERT INTO liga_KlubWariant (ID_wariantu_klubu, Skrot, Nazwa, ID_zestawienia_klubow) "
-                f"VALUES ({r['ID_wariantu_klubu']}, '{r['Skrot']}', '{r['Nazwa']}', {int(r['ID_zestawienia_klubow'])});\n"
+                f"VALUES ({r['ID_wariantu_klubu']}, '{r['Skrot']}', '{r['Nazwa']}', {zestawienie});\n"
             )
 
     print("Zapisano:", out_csv)
@@ -231,17 +208,49 @@ def save_outputs(df):
 # MAIN
 # ----------------------------------------
 
-def main():
-    raw, seen = scan_clubs()
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Wyciąg wariantów klubów z plików Regaty.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="czytaj tylko pliki zmienione od ostatniego uruchomienia (manifest)")
+    ap.add_argument("--xlsx", nargs="?", const=XLSX_DIR, default=None,
+                    help=f"czytaj też skoroszyty wyników PLŻ (domyślnie {XLSX_DIR})")
+    metrics.dodaj_argumenty(ap)
+    return ap.parse_args(argv)
+
+
+def main(argv=None, katalog: Katalog = None):
+    args = parse_args(argv)
+    metrics.wlacz_z_argumentow(args, "kluby")
+
+    manifest = None
+    if args.incremental:
+        manifest = Manifest(os.path.join(OUT_DIR, MANIFEST_FILE), generator=WERSJA_WYCIAGU)
+
+    if katalog is None and args.xlsx:
+        katalog = Katalog(BASE_DIR, xlsx_dir=args.xlsx)
+
+    with metrics.etap("kluby_skan") as e:
+        raw, seen = scan_clubs(manifest, katalog, etap=e)
+        if manifest is not None:
+            manifest.zapisz()
     print(f"Przeskanowano plików: {seen}, zebrano wierszy: {len(raw)}")
 
-    pairs = build_pairs(raw)
-    mapping = load_mapping()
-    pairs = attach_zestawienie_ids(pairs, mapping)
-    final = add_variant_ids(pairs)
-    save_outputs(final)
+    with metrics.etap("kluby_warianty") as e:
+        pairs = build_pairs(raw)
+        mapping = load_mapping()
+        pairs = attach_zestawienie_ids(pairs, mapping)
+        final = add_variant_ids(pairs)
+        e.dodaj(wiersze_we=len(raw), wiersze_wy=len(final))
+
+    with metrics.etap("kluby_zapis") as e:
+        save_outputs(final)
+        indeks = kluby_index.IndeksKlubow.z_ramek(final, mapping, kluby_index.INDEKS_PATH)
+        indeks.zapisz()
+        print(f"💾 Indeks klubów: {indeks.path} ({len(indeks)} skrótów)")
+        e.dodaj(wiersze_we=len(final), wiersze_wy=len(final))
 
     print("Wierszy po unikalizacji:", len(final))
+    metrics.zakoncz_z_argumentow(args)
 
 
 if __name__ == "__main__":
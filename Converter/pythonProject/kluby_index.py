@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+kluby_index.py – jeden indeks klubów dla skryptów występowań i kluby.py
+
+Zamiast budować w każdym skrypcie słownik Skrot_norm -> ID_wariantu_klubu
+pętlą iterrows() po kluby_wyciag.csv, kluby.py zapisuje raz zwarty indeks .npz:
+✔ skrót (po _norm_key) -> ID_wariantu_klubu (pierwszy wariant z wyciągu, jak dotąd;
+  ostatni=True – ostatni wariant, jak dawna mapa skryptu listy zawodników),
+✔ skrót + ID_Regat -> wariant, który w tych regatach startował (warianty_w_regatach),
+✔ ID_wariantu_klubu -> ID_zestawienia_klubow,
+✔ skrót -> ID_zestawienia_klubow z Kluby_tablica.csv ("AK2;AKA" = dwa skróty),
+✔ komórka "Sport Vita Ski&Sail (SPO)" -> skrót z nawiasu -> wariant,
+✔ warianty(kolumna) – cała kolumna naraz; każdy różny skrót normalizowany raz.
+wczytaj() przebudowuje indeks, gdy wyciąg albo tablica są od niego nowsze.
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from id_registry import _norm_key
+
+INDEKS_PATH = "./mnt/data/output/kluby_index.npz"
+WYCIAG_PATH = "./mnt/data/kluby/kluby_wyciag.csv"
+TABLICA_PATH = "./mnt/data/kluby/Kluby_tablica.csv"
+
+BRAK = -1       # brak ID_zestawienia_klubow w tablicach .npz
+
+
+def wyciagnij_skrot(komorka) -> str:
+    """
+    Skrót klubu z komórki 'Klub', np. 'Sport Vita Ski&Sail (SPO)' -> 'SPO'.
+    Jeśli nie ma nawiasu, zgaduje ostatni wielki token (2–4 znaki).
+    """
+    s = str(komorka or "").strip()
+    m = re.search(r"\(([^)]+)\)\s*$", s)
+    if m:
+        return m.group(1).strip()
+    tokens = re.split(r"[\s,/|-]+", s)
+    for tok in reversed(tokens):
+        if tok.isupper() and 2 <= len(tok) <= 4:
+            return tok
+    return s[:10].upper()
+
+
+def _klucze(kolumna) -> pd.Series:
+    """_norm_key dla całej kolumny – raz na każdą różną wartość."""
+    kolumna = pd.Series(kolumna)
+    unikalne = {v: _norm_key(v) for v in pd.unique(kolumna)}
+    return kolumna.map(unikalne)
+
+
+def wczytaj_tablice(path: str = TABLICA_PATH) -> dict:
+    """Kluby_tablica.csv: {skrót_norm: ID_zestawienia_klubow}, pierwszy wpis wygrywa."""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path)
+    skroty = df["Skrot"].fillna("").astype(str).str.split(";")
+    pary = df.assign(Skrot=skroty).explode("Skrot")
+    pary["Sk_norm"] = _klucze(pary["Skrot"])
+    pary = pary.drop_duplicates("Sk_norm")
+    return dict(zip(pary["Sk_norm"], pary["ID_zestawienia_klubow"].astype("int64").tolist()))
+
+
+class IndeksKlubow:
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._skroty = {}        # skrót_norm -> ID_wariantu_klubu
+        self._wszystkie = {}     # skrót_norm -> [ID_wariantu_klubu, ...] (ostatni z wyciągu na końcu)
+        self._zestawienia = {}   # ID_wariantu_klubu -> ID_zestawienia_klubow
+        self._tablica = {}       # skrót_norm -> ID_zestawienia_klubow (Kluby_tablica.csv)
+        self.niepelny = False    # plik sprzed listy wszystkich wariantów – do przebudowy
+
+        if path and os.path.isfile(path):
+            try:
+                with np.load(path, allow_pickle=False) as dane:
+                    self._skroty = dict(zip(dane["sk_klucze"].tolist(), dane["sk_ids"].tolist()))
+                    self._zestawienia = {
+                        w: z for w, z in zip(dane["war_ids"].tolist(), dane["war_zest"].tolist()) if z != BRAK
+                    }
+                    self._tablica = dict(zip(dane["tab_klucze"].tolist(), dane["tab_zest"].tolist()))
+                    if "wsz_klucze" in dane.files:
+                        for k, w in zip(dane["wsz_klucze"].tolist(), dane["wsz_ids"].tolist()):
+                            self._wszystkie.setdefault(k, []).append(w)
+                    else:
+                        self.niepelny = True
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠ Pomijam uszkodzony indeks klubów {path}: {e}")
+                self._skroty, self._zestawienia, self._tablica, self._wszystkie = {}, {}, {}, {}
+
+    def __len__(self) -> int:
+        return len(self._skroty)
+
+    @classmethod
+    def z_ramek(cls, wyciag: pd.DataFrame, tablica: dict = None, path: str = None) -> "IndeksKlubow":
+        """Indeks z ramki kluby_wyciag (Skrot, ID_wariantu_klubu[, ID_zestawienia_klubow])."""
+        indeks = cls()
+        indeks.path = path
+        df = wyciag.assign(Sk_norm=_klucze(wyciag["Skrot"]))
+
+        pierwsze = df.drop_duplicates("Sk_norm")
+        indeks._skroty = dict(zip(pierwsze["Sk_norm"], pierwsze["ID_wariantu_klubu"].astype("int64").tolist()))
+        # kolejność wg ostatniego wystąpienia – w[-1] to wariant z ostatniego wiersza
+        wszystkie = df.drop_duplicates(["Sk_norm", "ID_wariantu_klubu"], keep="last")
+        for k, w in zip(wszystkie["Sk_norm"], wszystkie["ID_wariantu_klubu"].astype("int64").tolist()):
+            indeks._wszystkie.setdefault(k, []).append(w)
+        if "ID_zestawienia_klubow" in df.columns:
+            z = df[df["ID_zestawienia_klubow"].notna()].drop_duplicates("ID_wariantu_klubu")
+            indeks._zestawienia = dict(zip(z["ID_wariantu_klubu"].astype("int64").tolist(),
+                                           z["ID_zestawienia_klubow"].astype("int64").tolist()))
+        indeks._tablica = dict(tablica or {})
+        return indeks
+
+    # -------------------------------
+    # Pojedyncze wartości
+    # -------------------------------
+
+    def wariant(self, skrot):
+        """ID_wariantu_klubu dla skrótu albo None."""
+        return self._skroty.get(_norm_key(skrot))
+
+    def wariant_z_komorki(self, komorka):
+        """ID_wariantu_klubu dla komórki typu 'Nazwa klubu (SKR)' albo None."""
+        return self.wariant(wyciagnij_skrot(komorka))
+
+    def zestawienie(self, id_wariantu):
+        """ID_zestawienia_klubow wariantu albo None."""
+        return self._zestawienia.get(int(id_wariantu))
+
+    def zestawienie_skrotu(self, skrot):
+        """ID_zestawienia_klubow skrótu wg Kluby_tablica.csv albo None."""
+        return self._tablica.get(_norm_key(skrot))
+
+    # -------------------------------
+    # Całe kolumny
+    # -------------------------------
+
+    def warianty(self, skroty, ostatni: bool = False) -> pd.Series:
+        """
+        ID_wariantu_klubu dla kolumny skrótów (NaN, gdy brak) – jak Series.map(słownik).
+        ostatni=True: ostatni wariant skrótu z wyciągu zamiast pierwszego.
+        """
+        if ostatni:
+            return _klucze(skroty).map({k: w[-1] for k, w in self._wszystkie.items()})
+        return _klucze(skroty).map(self._skroty)
+
+    def warianty_w_regatach(self, skroty, id_regat, startujace: dict) -> pd.Series:
+        """
+        ID_wariantu_klubu dla par (skrót, ID_Regat): wariant skrótu, który
+        startował w tych regatach (startujace: ID_Regat -> zbiór wariantów
+        z all_miejsca), a gdy żaden albo kilka – ostatni z nich / ostatni z wyciągu.
+        """
+        klucze = _klucze(skroty).reset_index(drop=True)
+        regaty = pd.Series(id_regat).reset_index(drop=True)
+        pary = pd.DataFrame({"k": klucze, "r": regaty})
+
+        wybor = {}
+        for k, r in pary.drop_duplicates().itertuples(index=False):
+            kandydaci = self._wszystkie.get(k)
+            if not kandydaci:
+                continue
+            obecne = startujace.get(r, ()) if pd.notna(r) else ()
+            trafione = [w for w in kandydaci if w in obecne]
+            wybor[(k, r)] = (trafione or kandydaci)[-1]
+
+        wynik = pd.Series([wybor.get(p) for p in zip(pary["k"], pary["r"])], dtype="float64")
+        wynik.index = pd.Series(skroty).index
+        return wynik
+
+    def warianty_z_komorek(self, komorki):
+        """(skróty, ID_wariantu_klubu) dla kolumny komórek 'Nazwa klubu (SKR)'."""
+        komorki = pd.Series(komorki)
+        skroty = komorki.map({v: wyciagnij_skrot(v) for v in pd.unique(komorki)})
+        return skroty, self.warianty(skroty)
+
+    def zestawienia(self, id_wariantow) -> pd.Series:
+        return pd.Series(id_wariantow).map(self._zestawienia)
+
+    def zestawienia_skrotow(self, skroty) -> pd.Series:
+        return _klucze(skroty).map(self._tablica)
+
+    # -------------------------------
+    # Zapis
+    # -------------------------------
+
+    def zapisz(self, path: str = None) -> None:
+        path = path or self.path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                sk_klucze=np.array(list(self._skroty), dtype=str),
+                sk_ids=np.array(list(self._skroty.values()), dtype=np.uint32),
+                war_ids=np.array(list(self._zestawienia), dtype=np.uint32),
+                war_zest=np.array(list(self._zestawienia.values()), dtype=np.int64),
+                tab_klucze=np.array(list(self._tablica), dtype=str),
+                tab_zest=np.array(list(self._tablica.values()), dtype=np.int64),
+                wsz_klucze=np.array([k for k, w in self._wszystkie.items() for _ in w], dtype=str),
+                wsz_ids=np.array([i for w in self._wszystkie.values() for i in w], dtype=np.uint32),
+            )
+        os.replace(tmp, path)
+
+
+def _mtime(path: str) -> float:
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+def wczytaj(path: str = INDEKS_PATH, wyciag_path: str = WYCIAG_PATH,
+            tablica_path: str = TABLICA_PATH) -> IndeksKlubow:
+    """
+    Indeks z pliku .npz; gdy go nie ma, jest niepełny (starsza wersja) albo
+    kluby_wyciag.csv / Kluby_tablica.csv są nowsze (np. ręczna poprawka),
+    budowany z nich od nowa i zapisywany.
+    Bez wyciągu – pusty indeks i ostrzeżenie.
+    """
+    if os.path.isfile(path) and _mtime(path) >= max(_mtime(wyciag_path), _mtime(tablica_path)):
+        indeks = IndeksKlubow(path)
+        if not indeks.niepelny:
+            print(f"📚 Załadowano indeks klubów: {len(indeks)} skrótów")
+            return indeks
+
+    if not os.path.exists(wyciag_path):
+        print(f"⚠ Nie znaleziono pliku z wariantami klubów: {wyciag_path}")
+        return IndeksKlubow()
+
+    wyciag = pd.read_csv(wyciag_path)
+    if "Skrot" not in wyciag.columns or "ID_wariantu_klubu" not in wyciag.columns:
+        print("⚠ kluby_wyciag.csv musi mieć kolumny: Skrot, ID_wariantu_klubu")
+        return IndeksKlubow()
+
+    indeks = IndeksKlubow.z_ramek(wyciag, wczytaj_tablice(tablica_path), path)
+    indeks.zapisz()
+    print(f"📚 Zbudowano indeks klubów: {path} ({len(indeks)} skrótów)")
+    return indeks
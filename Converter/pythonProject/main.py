@@ -1,61 +1,48 @@
 import pandas as pd
-import hashlib
+import argparse
 import os
 import re
+import time
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from id_registry import (
+    calc_club_variant_id_int,
+    generate_numeric_id_int,
+    generate_numeric_ids,
+    dodaj_wpisy,
+    indeks,
+    pobierz_nowe_wpisy,
+    wlacz_cache_dyskowy,
+    wlacz_indeks,
+    zapisz_cache_dyskowy,
+    zapisz_indeks,
+    zbieraj_nowe_wpisy,
+)
+import id_index
+import columnar
+import kluby
+import metrics
+import regaty_index
+import schemat
+import xlsx_ingest
+from final_ranking import ranking_z_finalem, wynik_regat_z_rankingu
+from manifest import Manifest
+from source_catalog import Katalog
 
 # ========================================
-#  FUNKCJE POMOCNICZE – WSPÓLNE Z kluby.py
+#  FUNKCJE POMOCNICZE
 # ========================================
 
-def _norm(s: str) -> str:
-    """Podstawowa normalizacja – przycięcie i zbicie wielu spacji w jedną."""
-    if s is None:
-        return ""
-    return re.sub(r"\s+", " ", str(s).strip())
+PENALTY_TAGS = ["(DNF)", "(SCP)", "(DSQ)", "(OCS)", "(DNC)", "(DNE)", "(RET)", "(TLE)"]
 
+SPECIALS = {
+    "2.5 (RDG)": (2.5, 1),
+    "13 (DSQ + SCP)": (13.0, 1),
+    "10 (OCS0": (10.0, 1),
+}
 
-def _norm_key(s: str) -> str:
-    """
-    Normalizacja skrótu klubu:
-    - przycięcie,
-    - zbicie wielu spacji,
-    - USUNIĘCIE wszystkich spacji,
-    - wielkie litery.
-    Dzięki temu 'PJK', 'P J K', ' PJK ' -> 'PJK'.
-    """
-    base = _norm(s)
-    base = base.replace(" ", "")
-    return base.upper()
-
-
-def _norm_name(s: str) -> str:
-    """Normalizacja nazwy klubu – tylko porządkowanie spacji."""
-    return _norm(s)
-
-
-def generate_numeric_id(typ: str, liga_poziom: str, **params) -> str:
-    """
-    Kanoniczne ID: 8 cyfr z SHA1 (ta sama logika co w kluby.py).
-    """
-    param_string = f"liga_poziom={liga_poziom}|" + "|".join(
-        f"{k}={v}" for k, v in sorted(params.items())
-    )
-    base_string = f"{typ}|{param_string}"
-    hash_bytes = hashlib.sha1(base_string.encode()).digest()
-    numeric_id = int.from_bytes(hash_bytes[:4], byteorder="big")
-    return f"{numeric_id % 100_000_000:08d}"
-
-
-def calc_club_variant_id(skrot_raw: str, nazwa_raw: str) -> str:
-    """
-    Jedyny sposób liczenia ID_wariantu_klubu – identyczny w main.py i kluby.py.
-    """
-    return generate_numeric_id(
-        "KLUB_WARIANT", "ALL",
-        Skrot=_norm_key(skrot_raw),
-        Nazwa=_norm_name(nazwa_raw),
-    )
+LICZBA_RE = r'\d+(?:\.\d+)?'
 
 
 def parse_miejsce(raw_val, max_miejsce):
@@ -64,45 +51,61 @@ def parse_miejsce(raw_val, max_miejsce):
 
     s = str(raw_val).strip()
 
-    penalty_tags = ["(DNF)", "(SCP)", "(DSQ)", "(OCS)", "(DNC)", "(DNE)", "(RET)", "(TLE)"]
-    if any(tag in s for tag in penalty_tags):
+    if any(tag in s for tag in PENALTY_TAGS):
         return float(max_miejsce), 1
 
-    specials = {
-        "2.5 (RDG)": (2.5, 1),
-        "13 (DSQ + SCP)": (13.0, 1),
-        "10 (OCS0": (10.0, 1),
-    }
-    if s in specials:
-        return float(specials[s][0]), 1
+    if s in SPECIALS:
+        return float(SPECIALS[s][0]), 1
 
-    m = re.search(r'\d+(\.\d+)?', s)
+    m = re.search(LICZBA_RE, s)
     if m:
         return float(m.group()), 0
 
     return float(max_miejsce), 0
 
 
+def _pierwsza_liczba(s: pd.Series) -> pd.Series:
+    """Pierwsza liczba (int/float) z każdego tekstu – NaN, jeśli brak."""
+    return pd.to_numeric(
+        s.str.extract(f"({LICZBA_RE})", expand=False), errors="coerce"
+    ).astype(float)
+
+
+def parse_miejsca_kolumnowo(raw: pd.Series, max_miejsce):
+    """
+    Wektorowy odpowiednik parse_miejsce dla całej serii komórek.
+    Zwraca (miejsca: float64, kary: int64) – te same wartości co parse_miejsce
+    wołane komórka po komórce.
+    """
+    na = raw.isna().to_numpy()
+    s = raw.astype(object).where(~na, "").astype(str).str.strip()
+
+    kara_tag = s.str.contains("|".join(re.escape(t) for t in PENALTY_TAGS), regex=True).to_numpy()
+    special = s.map({k: v[0] for k, v in SPECIALS.items()}).astype(float).to_numpy()
+    liczba = _pierwsza_liczba(s).to_numpy()
+
+    max_f = float(max_miejsce)
+    miejsca = np.where(np.isnan(liczba), max_f, liczba)
+    miejsca = np.where(~np.isnan(special), special, miejsca)
+    miejsca = np.where(kara_tag | na, max_f, miejsca)
+
+    kary = ((kara_tag | ~np.isnan(special)) & ~na).astype(np.int64)
+    return miejsca.astype(np.float64), kary
+
+
 def ustal_parametry_z_csv(df: pd.DataFrame):
     race_cols = [col for col in df.columns if re.match(r'^[FR]\d+$', col)]
     race_cols.sort(key=lambda x: int(re.search(r'\d+', x).group()))
     has_final = 'FNL' in df.columns
 
-    miejsca_num = []
     scan_cols = race_cols + (['FNL'] if has_final else [])
 
-    for col in scan_cols:
-        for val in df[col]:
-            if pd.isna(val):
-                continue
-            m = re.search(r'\d+(\.\d+)?', str(val))
-            if m:
-                try:
-                    miejsca_num.append(float(m.group()))
-                except:
-                    pass
-
-    max_miejsce = int(np.nanmax(miejsca_num)) if miejsca_num else 0
+    max_miejsce = 0
+    if scan_cols:
+        wartosci = pd.Series(df[scan_cols].to_numpy(dtype=object).ravel()).dropna()
+        liczby = _pierwsza_liczba(wartosci.astype(str)).dropna()
+        if not liczby.empty:
+            max_miejsce = int(liczby.max())
     return race_cols, has_final, max_miejsce
 
 
@@ -127,193 +130,421 @@ def znajdz_kolumne_m_sce(df: pd.DataFrame):
 # ========================================
 
 base_dir = "./mnt/data/Regaty"
+# skoroszyty wyników (--xlsx), <rok>/*.xlsx – leżą w katalogu głównym repozytorium
+xlsx_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "PLŻ wyniki")
 output_dir = "./mnt/data/output/main"
 
-os.makedirs(output_dir, exist_ok=True)
+# manifest trybu --incremental; WERSJA_KONWERSJI podbijamy przy każdej zmianie
+# logiki konwersji, żeby stare wyniki nie zostały uznane za aktualne
+MANIFEST_FILE = ".manifest_main.json"
+WERSJA_KONWERSJI = "main.py/1"
 
-for year_folder in os.listdir(base_dir):
-    year_path = os.path.join(base_dir, year_folder)
-    if not os.path.isdir(year_path):
-        continue
 
-    for liga_folder_raw in os.listdir(year_path):
-        liga_path = os.path.join(year_path, liga_folder_raw)
-        if not os.path.isdir(liga_path):
-            continue
+def generator_manifestu(format: str = "csv", wynik_z_wyscigow: bool = False) -> str:
+    """Napis `generator` manifestu --incremental (wspólny z watch.py)."""
+    generator = f"{WERSJA_KONWERSJI}|{format}"
+    if wynik_z_wyscigow:
+        generator += "|wynik-z-wyscigow"
+    return generator
 
-        if liga_folder_raw and liga_folder_raw[0].isdigit():
-            liga_folder_name = liga_folder_raw[0] + " " + liga_folder_raw[1:]
-        else:
-            liga_folder_name = liga_folder_raw
 
-        for runda_folder in os.listdir(liga_path):
-            runda_path = os.path.join(liga_path, runda_folder)
-            if not os.path.isdir(runda_path):
-                continue
+def znajdz_pliki_rund(katalog: Katalog) -> list:
+    """
+    Lista zadań (słowników) z katalogu źródeł – w tej samej kolejności,
+    w jakiej przetwarzała je pętla szeregowa.
+    """
+    for runda_folder in katalog.foldery_bez_numeru:
+        print(f"⚠ Pomijam folder rundy (brak nr): {runda_folder}")
+
+    return [
+        {
+            "input_file": plik.path,
+            "file": plik.file,
+            "liga": plik.liga,
+            "rok": plik.rok,
+            "runda": plik.numer_rundy,
+        }
+        for plik in katalog.pliki_rund()
+    ]
+
+
+def _warianty_klubow(df: pd.DataFrame, club_col: str) -> np.ndarray:
+    """
+    ID_wariantu_klubu (uint32) dla każdego wiersza pliku. calc_club_variant_id_int
+    liczone jest raz na unikalną parę (skrót, nazwa), a nie raz na wiersz.
+    """
+    skroty = df[club_col].astype(object).tolist()
+    nazwy = df["Klub"].astype(object).tolist() if "Klub" in df.columns else [""] * len(df)
 
-            nr_match = re.search(r"(\d+)$", runda_folder)
-            if not nr_match:
-                print(f"⚠ Pomijam folder rundy (brak nr): {runda_folder}")
-                continue
+    klucze = list(zip(skroty, nazwy))
+    lookup = {
+        k: calc_club_variant_id_int(str(k[0]).strip(), k[1])
+        for k in dict.fromkeys(klucze)
+    }
+    return np.array([lookup[k] for k in klucze], dtype=np.uint32)
 
-            numer_rundy = int(nr_match.group(1))
-            rok_regat = int(year_folder)
 
-            for file in os.listdir(runda_path):
-                if not file.endswith(".csv"):
+def zbuduj_miejsca(df, club_col, race_cols, has_final, max_miejsce, wyscigi) -> pd.DataFrame:
+    """
+    Tabela _miejsca w formacie długim: kolumny R1..Rn (+ FNL) są rozwijane
+    jednorazowo do jednej serii (wiersz pliku × wyścig), a ID wyścigów
+    i wariantów klubów dołączane są z tablic per regaty.
+    Kolejność wierszy jak w dawnej pętli: klub po klubie, wyścigi po kolei, FNL na końcu.
+    """
+    scan_cols = race_cols + (["FNL"] if has_final else [])
+    n_wierszy, n_kolumn = len(df), len(scan_cols)
+    if n_wierszy == 0 or n_kolumn == 0:
+        return pd.DataFrame([])
+
+    # wyscigi ma tę samą kolejność co scan_cols (R1..Rn, potem FNL)
+    id_wyscigow = np.array([w["ID_wyscigu"] for w in wyscigi], dtype=np.uint32)
+
+    raw = pd.Series(df[scan_cols].to_numpy(dtype=object).ravel())
+    miejsce_val, kara = parse_miejsca_kolumnowo(raw, max_miejsce)
+
+    return schemat.typuj(pd.DataFrame({
+        "ID_miejsca": pd.NA,
+        "ID_wyscigu": np.tile(id_wyscigow, n_wierszy),
+        "ID_wariantu_klubu": np.repeat(_warianty_klubow(df, club_col), n_kolumn),
+        "Zajete_miejsce": miejsce_val,
+        "Kary": kara,
+        "Numer_lodki": 0,
+    }), "miejsca")
+
+
+def zbuduj_wynik_regat(df, club_col, m_col, id_regat):
+    """Tabela _wynikRegat z kolumny M-sce; None, jeśli żaden wiersz nie ma miejsca."""
+    raw = df[m_col]
+    na = raw.isna().to_numpy()
+    liczba = raw.astype(object).where(~na, "").astype(str).str.extract(r"(\d+)", expand=False)
+    ok = (~na) & liczba.notna().to_numpy()
+    if not ok.any():
+        return None
+
+    return schemat.typuj(pd.DataFrame({
+        "ID_wynikRegat": pd.NA,
+        "regaty": id_regat,
+        "ID_wariantu_klubu": _warianty_klubow(df, club_col)[ok],
+        "miejsceWRegatach": liczba[ok].astype(np.int64).to_numpy(),
+    }), "wynikRegat")
+
+
+def przetworz_plik_rundy(zadanie: dict, katalog: Katalog = None) -> dict:
+    """
+    Przetwarza jeden plik rundy i zwraca ramki _miejsca/_wyscigi/_regaty/_wynikRegat
+    (bez zapisu na dysk – tym zajmuje się proces główny), typowane wg schemat.TYPY.
+    Funkcja musi być na poziomie modułu, żeby dało się ją wysłać do puli procesów.
+    Z katalogiem plik jest brany z jego pamięci zamiast ponownego read_csv;
+    w puli procesów ramkę z pamięci katalogu przynosi samo zadanie ("ramka").
+    """
+    file = zadanie["file"]
+    liga_folder_name = zadanie["liga"]
+    rok_regat = zadanie["rok"]
+    numer_rundy = zadanie["runda"]
+    start = time.perf_counter()
+
+    try:
+        nazwa = os.path.splitext(file)[0]
+        miasto = nazwa.split("-")[1].strip() if "-" in nazwa else ""
+
+        if zadanie.get("ramka") is not None:
+            df = zadanie["ramka"]
+        elif katalog is not None:
+            df = katalog.wczytaj(zadanie["input_file"])
+        else:
+            df = xlsx_ingest.wczytaj_zrodlo(zadanie["input_file"])
+
+        race_cols, has_final, max_miejsce = ustal_parametry_z_csv(df)
+
+        id_regat = generate_numeric_id_int(
+            "regaty",
+            liga_folder_name,
+            rok=rok_regat,
+            runda=numer_rundy
+        )
+
+        regaty = schemat.typuj(pd.DataFrame([{
+            "ID_Regat": id_regat,
+            "Nazwa": f"{liga_folder_name} - Runda {numer_rundy}",
+            "Liga_Poziom": liga_folder_name,
+            "Miasto": miasto,
+            "Numer_Rundy": numer_rundy,
+            "Rok": rok_regat
+        }]), "regaty")
+
+        numery = [int(re.search(r'\d+', col).group()) for col in race_cols]
+        wyscigi_params = [
+            {"rok": rok_regat, "runda": numer_rundy, "index": idx, "race": col}
+            for idx, col in zip(numery, race_cols)
+        ]
+        if has_final:
+            numery.append(0)
+            wyscigi_params.append({"rok": rok_regat, "runda": numer_rundy, "index": 0, "race": "FNL"})
+
+        id_wyscigow = generate_numeric_ids("wyscig", liga_folder_name, wyscigi_params, as_int=True)
+        wyscigi = [
+            {
+                "ID_wyscigu": id_wys,
+                "ID_Regat": id_regat,
+                "Numer_wyscigu": idx,
+                "Finalowy": idx == 0,
+            }
+            for id_wys, idx in zip(id_wyscigow, numery)
+        ]
+        tabela_wyscigow = schemat.typuj(pd.DataFrame(wyscigi), "wyscigi")
+
+        club_col = "Skrót" if "Skrót" in df.columns else ("Zespół" if "Zespół" in df.columns else None)
+        if club_col is None:
+            raise ValueError("Brak kolumny 'Skrót' lub 'Zespół' w pliku.")
+
+        miejsca = zbuduj_miejsca(df, club_col, race_cols, has_final, max_miejsce, wyscigi)
+
+        wynik_rows = None
+        try:
+            m_col = znajdz_kolumne_m_sce(df)
+        except:
+            m_col = None
+
+        if m_col is not None:
+            wynik_rows = zbuduj_wynik_regat(df, club_col, m_col, id_regat)
+
+        # brak M-sce -> opcjonalnie klasyfikacja z wyścigów (GOLD/SILVER + finał)
+        if wynik_rows is None and zadanie.get("wynik_z_wyscigow") and not miejsca.empty:
+            ranking = ranking_z_finalem(miejsca, tabela_wyscigow)
+            if not ranking.empty:
+                wynik_rows = schemat.typuj(wynik_regat_z_rankingu(ranking), "wynikRegat")
+
+        return {
+            "file": file,
+            "input_file": zadanie["input_file"],
+            "liga": liga_folder_name,
+            "rok": rok_regat,
+            "runda": numer_rundy,
+            "prefix": f"{output_dir}/{liga_folder_name}_{rok_regat}_{numer_rundy}",
+            "miejsca": miejsca,
+            "wyscigi": tabela_wyscigow,
+            "regaty": regaty,
+            "wynikRegat": wynik_rows,
+            "error": None,
+            "wiersze_we": len(df),
+            "czas_s": time.perf_counter() - start,
+        }
+
+    except Exception as e:
+        return {"file": file, "input_file": zadanie["input_file"], "error": e,
+                "czas_s": time.perf_counter() - start}
+
+
+def _przetworz_w_puli(zadanie: dict) -> dict:
+    """przetworz_plik_rundy + nowe wpisy cache ID (do scalenia w procesie głównym)."""
+    wynik = przetworz_plik_rundy(zadanie)
+    wynik["nowe_id"] = pobierz_nowe_wpisy()
+    return wynik
+
+
+def zapisz_wynik_rundy(wynik: dict, format: str = "csv"):
+    """
+    Zapisuje ramki rundy do CSV (output/main) i/lub Parquet (output/parquet).
+    W CSV ID są 8-cyfrowymi tekstami z zerami wiodącymi (schemat.do_csv).
+    Zwraca listę zapisanych plików albo None przy błędzie.
+    """
+    if wynik["error"] is not None:
+        print(f"❌ Błąd przy pliku {wynik['file']}: {wynik['error']}")
+        return None
+
+    prefix = wynik["prefix"]
+    try:
+        zapisane = []
+        if format in ("csv", "oba"):
+            for tabela in columnar.TABELE:
+                if wynik[tabela] is None:
                     continue
+                path = f"{prefix}_{tabela}.csv"
+                schemat.do_csv(wynik[tabela], path, tabela)
+                zapisane.append(path)
 
-                try:
-                    miasto = file.split("-")[1].replace(".csv", "").strip() if "-" in file else ""
-
-                    input_file = os.path.join(runda_path, file)
-                    df = pd.read_csv(input_file)
-
-                    race_cols, has_final, max_miejsce = ustal_parametry_z_csv(df)
-
-                    prefix = f"{output_dir}/{liga_folder_name}_{rok_regat}_{numer_rundy}"
-                    os.makedirs(output_dir, exist_ok=True)
-
-                    id_regat = generate_numeric_id(
-                        "regaty",
-                        liga_folder_name,
-                        rok=rok_regat,
-                        runda=numer_rundy
-                    )
-
-                    regaty = pd.DataFrame([{
-                        "ID_Regat": id_regat,
-                        "Nazwa": f"{liga_folder_name} - Runda {numer_rundy}",
-                        "Liga_Poziom": liga_folder_name,
-                        "Miasto": miasto,
-                        "Numer_Rundy": numer_rundy,
-                        "Rok": rok_regat
-                    }])
-
-                    wyscigi = []
-                    for col in race_cols:
-                        idx = int(re.search(r'\d+', col).group())
-                        wyscigi.append({
-                            "ID_wyscigu": generate_numeric_id(
-                                "wyscig", liga_folder_name,
-                                rok=rok_regat, runda=numer_rundy,
-                                index=idx, race=col
-                            ),
-                            "ID_Regat": id_regat,
-                            "Numer_wyscigu": idx,
-                            "Finalowy": False
-                        })
-
-                    if has_final:
-                        wyscigi.append({
-                            "ID_wyscigu": generate_numeric_id(
-                                "wyscig", liga_folder_name,
-                                rok=rok_regat, runda=numer_rundy,
-                                index=0, race="FNL"
-                            ),
-                            "ID_Regat": id_regat,
-                            "Numer_wyscigu": 0,
-                            "Finalowy": True
-                        })
-
-                    club_col = "Skrót" if "Skrót" in df.columns else ("Zespół" if "Zespół" in df.columns else None)
-                    if club_col is None:
-                        raise ValueError("Brak kolumny 'Skrót' lub 'Zespół' w pliku.")
-
-                    miejsca = []
-                    for _, row in df.iterrows():
-                        skrot = str(row[club_col]).strip()
-
-                        # nazwa klubu z pliku (jeśli jest)
-                        if "Klub" in df.columns:
-                            nazwa_klubu = row["Klub"]
-                        else:
-                            nazwa_klubu = ""
-
-                        id_wariantu = calc_club_variant_id(skrot, nazwa_klubu)
-
-                        for col in race_cols:
-                            idx = int(re.search(r'\d+', col).group())
-                            raw_val = row[col] if col in df.columns else np.nan
-                            miejsce_val, kara = parse_miejsce(raw_val, max_miejsce)
-
-                            id_wys = generate_numeric_id(
-                                "wyscig", liga_folder_name,
-                                rok=rok_regat, runda=numer_rundy,
-                                index=idx, race=col
-                            )
-
-                            miejsca.append({
-                                "ID_miejsca": "",
-                                "ID_wyscigu": id_wys,
-                                "ID_wariantu_klubu": id_wariantu,
-                                "Zajete_miejsce": miejsce_val,
-                                "Kary": kara,
-                                "Numer_lodki": 0
-                            })
-
-                        if has_final:
-                            raw_fnl = row["FNL"] if "FNL" in df.columns else np.nan
-                            miejsce_fnl, kara_fnl = parse_miejsce(raw_fnl, max_miejsce)
-
-                            id_fnl = generate_numeric_id(
-                                "wyscig", liga_folder_name,
-                                rok=rok_regat, runda=numer_rundy,
-                                index=0, race="FNL"
-                            )
-
-                            miejsca.append({
-                                "ID_miejsca": "",
-                                "ID_wyscigu": id_fnl,
-                                "ID_wariantu_klubu": id_wariantu,
-                                "Zajete_miejsce": miejsce_fnl,
-                                "Kary": kara_fnl,
-                                "Numer_lodki": 0
-                            })
-
-                    wynik_rows = []
-                    try:
-                        m_col = znajdz_kolumne_m_sce(df)
-                    except:
-                        m_col = None
-
-                    if m_col is not None:
-                        for _, row in df.iterrows():
-                            skrot = str(row[club_col]).strip()
-
-                            if "Klub" in df.columns:
-                                nazwa_klubu = row["Klub"]
-                            else:
-                                nazwa_klubu = ""
-
-                            id_wariantu = calc_club_variant_id(skrot, nazwa_klubu)
-
-                            raw_m = row[m_col]
-                            if pd.isna(raw_m):
-                                continue
-
-                            m = re.search(r'\d+', str(raw_m))
-                            if not m:
-                                continue
-
-                            miejsce_w_reg = int(m.group())
-
-                            wynik_rows.append({
-                                "ID_wynikRegat": "",
-                                "regaty": id_regat,
-                                "ID_wariantu_klubu": id_wariantu,
-                                "miejsceWRegatach": miejsce_w_reg
-                            })
-
-                    pd.DataFrame(miejsca).to_csv(f"{prefix}_miejsca.csv", index=False)
-                    pd.DataFrame(wyscigi).to_csv(f"{prefix}_wyscigi.csv", index=False)
-                    regaty.to_csv(f"{prefix}_regaty.csv", index=False)
-
-                    if wynik_rows:
-                        pd.DataFrame(wynik_rows).to_csv(f"{prefix}_wynikRegat.csv", index=False)
-
-                    print(f"✅ Przetworzono: {file}")
-
-                except Exception as e:
-                    print(f"❌ Błąd przy pliku {file}: {e}")
+        if format in ("parquet", "oba"):
+            zapisane += columnar.zapisz_runde(wynik, wynik["rok"], wynik["liga"], wynik["runda"])
+
+        print(f"✅ Przetworzono: {wynik['file']}")
+        return zapisane
+
+    except Exception as e:
+        print(f"❌ Błąd przy pliku {wynik['file']}: {e}")
+        return None
+
+
+def _inicjuj_proces(id_cache: str, zbieraj: bool) -> None:
+    """Inicjalizacja procesu roboczego: cache ID i zbieranie ID dla indeksu."""
+    if id_cache:
+        wlacz_cache_dyskowy(id_cache)
+    if zbieraj:
+        zbieraj_nowe_wpisy()
+
+
+def przetworz_zadania(zadania: list, workers: int = 1, id_cache: str = None, katalog: Katalog = None):
+    """
+    Generator wyników przetworz_plik_rundy w kolejności zadań – szeregowo
+    albo w puli procesów (workers > 1). Pliki wczytane już przez katalog
+    (np. przez --kluby) jadą do procesów jako ramki, pozostałe procesy czytają same.
+    """
+    if workers == 1 or len(zadania) < 2:
+        for zadanie in zadania:
+            yield przetworz_plik_rundy(zadanie, katalog)
+        return
+
+    if katalog is not None:
+        zadania = [dict(z, ramka=katalog.w_pamieci(z["input_file"])) for z in zadania]
+
+    chunksize = max(1, len(zadania) // (workers * 4))
+    initargs = (id_cache, indeks() is not None)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_inicjuj_proces, initargs=initargs) as pool:
+        for wynik in pool.map(_przetworz_w_puli, zadania, chunksize=chunksize):
+            dodaj_wpisy(wynik.pop("nowe_id"))
+            yield wynik
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Konwersja plików rund (Regaty) do tabel liga_*.")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="liczba procesów; 1 = tryb szeregowy, 0 = liczba rdzeni")
+    ap.add_argument("--id-cache", default=None,
+                    help="plik JSON z cache ID (id_registry), trwały między uruchomieniami")
+    ap.add_argument("--id-index", nargs="?", const=id_index.INDEKS_PATH, default=None,
+                    help=f"globalny indeks ID z wykrywaniem kolizji (domyślnie {id_index.INDEKS_PATH})")
+    ap.add_argument("--incremental", action="store_true",
+                    help="przetwarzaj tylko pliki zmienione od ostatniego uruchomienia (manifest)")
+    ap.add_argument("--format", choices=["csv", "parquet", "oba"], default="csv",
+                    help="format wyjścia: CSV w output/main, Parquet (rok=/liga=) w output/parquet, albo oba")
+    ap.add_argument("--kluby", action="store_true",
+                    help="najpierw odśwież wyciąg klubów (kluby.py) na tym samym katalogu plików")
+    ap.add_argument("--xlsx", nargs="?", const=xlsx_dir, default=None,
+                    help=f"czytaj też skoroszyty wyników PLŻ bez eksportu do CSV (domyślnie {xlsx_dir})")
+    ap.add_argument("--wynik-z-wyscigow", action="store_true",
+                    help="gdy plik nie ma kolumny M-sce, policz _wynikRegat z wyścigów (GOLD/SILVER + finał)")
+    metrics.dodaj_argumenty(ap)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if args.format != "csv" and not columnar.dostepny():
+        print("❌ Format parquet wymaga pakietu pyarrow (pip install pyarrow).")
+        return
+
+    if args.xlsx and not xlsx_ingest.dostepny():
+        print("❌ Skoroszyty .xlsx wymagają pakietu openpyxl (pip install openpyxl).")
+        return
+
+    metrics.wlacz_z_argumentow(args, "main")
+
+    if args.id_cache:
+        n = wlacz_cache_dyskowy(args.id_cache)
+        print(f"📚 Cache ID: {args.id_cache} ({n} wpisów)")
+
+    if args.id_index:
+        n = len(wlacz_indeks(args.id_index))
+        print(f"📚 Indeks ID: {args.id_index} ({n} wpisów)")
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    katalog = Katalog(base_dir, xlsx_dir=args.xlsx, workers=workers)
+    if args.kluby:
+        kluby.main(["--incremental"] if args.incremental else [], katalog=katalog)
+
+    with metrics.etap("katalog") as e:
+        zadania = znajdz_pliki_rund(katalog)
+        e.dodaj(wiersze_wy=len(zadania))
+    for zadanie in zadania:
+        zadanie["wynik_z_wyscigow"] = args.wynik_z_wyscigow
+
+    manifest = None
+    info_zrodel = {}
+    if args.incremental:
+        with metrics.etap("manifest") as e:
+            manifest = Manifest(os.path.join(output_dir, MANIFEST_FILE),
+                                generator=generator_manifestu(args.format, args.wynik_z_wyscigow))
+            do_zrobienia = []
+            for zadanie in zadania:
+                bez_zmian, info = manifest.sprawdz(zadanie["input_file"])
+                if bez_zmian:
+                    print(f"⏭️ Bez zmian: {zadanie['file']}")
+                    e.plik(zadanie["input_file"], status="pominiety")
                     continue
+                info_zrodel[zadanie["input_file"]] = info
+                do_zrobienia.append(zadanie)
+        print(f"ℹ Zmienione pliki: {len(do_zrobienia)} z {len(zadania)}")
+    else:
+        do_zrobienia = zadania
+
+    # indeks regat dla skryptów występowań; przy --incremental dopisujemy
+    # do istniejącego (rundy bez zmian nie są przetwarzane)
+    if manifest is not None:
+        indeks_regat = regaty_index.wczytaj(regaty_index.INDEKS_PATH, output_dir)
+    else:
+        indeks_regat = regaty_index.IndeksRegat()
+        indeks_regat.path = regaty_index.INDEKS_PATH
+
+    # ID regat z dawnych wyników przeliczanych źródeł – po konwersji te,
+    # których już nie ma (zmiana ID_Regat), wypadają z indeksu
+    stare_wyniki = []
+    if manifest is not None:
+        for zadanie in do_zrobienia:
+            stare_wyniki += manifest.wyniki(zadanie["input_file"])
+    kandydaci = regaty_index.id_regat_z_wynikow(stare_wyniki)
+
+    # Zapis zostaje w procesie głównym i idzie w kolejności zadań,
+    # więc pliki wynikowe są identyczne jak w trybie szeregowym.
+    with metrics.etap("konwersja") as e:
+        for wynik in przetworz_zadania(do_zrobienia, workers, args.id_cache, katalog):
+            start = time.perf_counter()
+            zapisane = zapisz_wynik_rundy(wynik, args.format)
+            if manifest is not None and zapisane is not None:
+                manifest.zapisz_wpis(wynik["input_file"], info_zrodel[wynik["input_file"]], zapisane)
+            if zapisane is not None:
+                indeks_regat.dodaj_ramke(wynik["regaty"])
+            e.plik(
+                wynik["input_file"],
+                czas_s=wynik["czas_s"] + time.perf_counter() - start,
+                wiersze_we=wynik.get("wiersze_we", 0),
+                wiersze_wy=0 if zapisane is None else sum(
+                    len(wynik[t]) for t in columnar.TABELE if wynik[t] is not None),
+                status="ok" if zapisane is not None else "blad",
+                blad=wynik["error"],
+            )
+
+    if manifest is not None:
+        obecne = {z["input_file"] for z in zadania}
+        for src in set(manifest.zrodla) - obecne:
+            pliki = manifest.wyniki(src)
+            kandydaci |= regaty_index.id_regat_z_wynikow(pliki)
+            stare_wyniki += pliki
+        for src in manifest.usun_nieaktualne(obecne):
+            print(f"🗑️ Źródło zniknęło: {src}")
+        manifest.zapisz()
+
+        for id_regat in regaty_index.usun_nieaktualne(indeks_regat, kandydaci, stare_wyniki):
+            print(f"🗑️ Regaty {id_regat} usunięte z indeksu regat")
+
+    if indeks_regat.zmieniony or not os.path.isfile(indeks_regat.path):
+        indeks_regat.zapisz()
+        print(f"💾 Indeks regat: {indeks_regat.path} ({len(indeks_regat)} regat)")
+
+    zapisz_cache_dyskowy()
+
+    if args.id_index:
+        zapisz_indeks()
+        kolizje = indeks().kolizje
+        if kolizje:
+            print(f"❌ Kolizje ID w indeksie: {len(kolizje)}")
+            for numeric_id, stary, nowy in kolizje:
+                print(f"   {numeric_id:08d}: '{stary}' / '{nowy}'")
+        else:
+            print(f"✅ Indeks ID: {len(indeks())} wpisów, brak kolizji")
+
+    metrics.zakoncz_z_argumentow(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+manifest.py – manifest plików źródłowych dla trybu przyrostowego (main.py, kluby.py)
+
+Dla każdego pliku źródłowego trzymamy: rozmiar, mtime, SHA1 treści
+i listę plików wynikowych, które z niego powstały (+ opcjonalne dane skryptu).
+✔ plik bez zmian (rozmiar+mtime albo ten sam SHA1) -> pomijamy, stare wyniki zostają,
+✔ plik zmieniony -> przeliczamy, wyniki których już nie ma są kasowane,
+✔ plik usunięty/przemianowany -> jego wyniki są sprzątane.
+"""
+
+import hashlib
+import json
+import os
+
+WERSJA_MANIFESTU = 1
+
+# źródłem może być arkusz skoroszytu: "plik.xlsx::Arkusz" (xlsx_ingest.py);
+# rozmiar, mtime i SHA1 liczymy wtedy dla całego pliku .xlsx
+SEPARATOR_ARKUSZA = "::"
+
+
+def plik_zrodla(src: str) -> str:
+    return src.split(SEPARATOR_ARKUSZA, 1)[0]
+
+
+def sha1_pliku(path: str, blok: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for kawalek in iter(lambda: f.read(blok), b""):
+            h.update(kawalek)
+    return h.hexdigest()
+
+
+class Manifest:
+    """
+    Manifest w JSON: {"wersja": ..., "generator": ..., "zrodla": {ścieżka: wpis}}.
+    `generator` to napis od skryptu – gdy się zmieni (np. nowa logika konwersji),
+    manifest jest ignorowany i wszystko przeliczamy od zera.
+    """
+
+    def __init__(self, path: str, generator: str = ""):
+        self.path = path
+        self.generator = generator
+        self.zrodla = {}
+
+        if not os.path.isfile(path):
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                dane = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoruję uszkodzony manifest {path}: {e}")
+            return
+
+        if dane.get("wersja") == WERSJA_MANIFESTU and dane.get("generator") == generator:
+            self.zrodla = dane.get("zrodla", {})
+
+    # -------------------------------
+    # Sprawdzanie źródeł
+    # -------------------------------
+
+    def sprawdz(self, src: str):
+        """
+        Zwraca (bez_zmian, info). `info` to aktualny {size, mtime_ns, sha1}
+        do przekazania później do zapisz_wpis().
+        """
+        st = os.stat(plik_zrodla(src))
+        info = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        wpis = self.zrodla.get(src)
+
+        wyniki_sa = wpis is not None and all(os.path.exists(p) for p in wpis.get("outputs", []))
+        if not wyniki_sa:
+            return False, info
+
+        if wpis["size"] == info["size"] and wpis["mtime_ns"] == info["mtime_ns"]:
+            info["sha1"] = wpis["sha1"]
+            return True, info
+
+        # mtime się zmienił (np. checkout, kopia) – decyduje treść
+        info["sha1"] = sha1_pliku(plik_zrodla(src)) if wpis["size"] == info["size"] else None
+        if info["sha1"] == wpis["sha1"]:
+            wpis["mtime_ns"] = info["mtime_ns"]
+            return True, info
+
+        return False, info
+
+    def dane(self, src: str):
+        """Dodatkowe dane zapisane przy źródle (np. pary klubów w kluby.py)."""
+        wpis = self.zrodla.get(src)
+        return None if wpis is None else wpis.get("dane")
+
+    def wyniki(self, src: str) -> list:
+        wpis = self.zrodla.get(src)
+        return [] if wpis is None else list(wpis.get("outputs", []))
+
+    # -------------------------------
+    # Aktualizacja
+    # -------------------------------
+
+    def zapisz_wpis(self, src: str, info: dict, outputs: list, dane=None) -> None:
+        """
+        Zapamiętuje źródło z jego wynikami. Wyniki z poprzedniej wersji źródła,
+        których tym razem nie wyprodukowano, są kasowane.
+        """
+        stare = set(self.wyniki(src)) - set(outputs)
+        self.zrodla[src] = {
+            "size": info["size"],
+            "mtime_ns": info["mtime_ns"],
+            "sha1": info.get("sha1") or sha1_pliku(plik_zrodla(src)),
+            "outputs": list(outputs),
+        }
+        if dane is not None:
+            self.zrodla[src]["dane"] = dane
+        self._usun_pliki(stare)
+
+    def usun_nieaktualne(self, obecne_zrodla) -> list:
+        """
+        Usuwa wpisy źródeł, których już nie ma, oraz ich wyniki – o ile żadne
+        aktualne źródło nie produkuje tego samego pliku. Zwraca usunięte źródła.
+        """
+        obecne = set(obecne_zrodla)
+        zniknely = [src for src in self.zrodla if src not in obecne]
+
+        wpisy_zniknietych = [self.zrodla.pop(src) for src in zniknely]
+        for wpis in wpisy_zniknietych:
+            self._usun_pliki(set(wpis.get("outputs", [])))
+        return zniknely
+
+    def _usun_pliki(self, pliki) -> None:
+        uzywane = {p for wpis in self.zrodla.values() for p in wpis.get("outputs", [])}
+        for p in sorted(set(pliki) - uzywane):
+            if os.path.exists(p):
+                os.remove(p)
+                print(f"🗑️ Usunięto nieaktualny wynik: {p}")
+
+    def zapisz(self) -> None:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"wersja": WERSJA_MANIFESTU, "generator": self.generator, "zrodla": self.zrodla},
+                f, ensure_ascii=False, indent=1,
+            )
+        os.replace(tmp, self.path)
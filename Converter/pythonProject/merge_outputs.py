@@ -1,28 +1,185 @@
 import pandas as pd
+import argparse
 import os
 import glob
+import time
+
+import columnar
+import id_index
+import metrics
+import schemat
 
 output_dir = "./mnt/data/output/main"
 
+CHUNKSIZE = 50_000
+
+
+class DuplicateTracker:
+    """
+    Wykrywanie powtórzeń klucza bez trzymania całej tabeli: zbiór widzianych
+    kluczy + licznik tylko dla tych, które się powtórzyły.
+    `wiersze` = liczba wierszy z powtórzonym kluczem (jak duplicated(keep=False)).
+    """
+
+    def __init__(self):
+        self.widziane = set()
+        self.powtorzone = {}
+
+    def dodaj(self, klucze) -> None:
+        for k in klucze:
+            if k in self.powtorzone:
+                self.powtorzone[k] += 1
+            elif k in self.widziane:
+                self.powtorzone[k] = 2
+            else:
+                self.widziane.add(k)
+
+    @property
+    def wiersze(self) -> int:
+        return sum(self.powtorzone.values())
 
-def merge_csv_files(pattern, output_file, id_column=None):
+
+def _dopasuj_typy(chunk, typy):
+    """
+    Rzutuje kawałek na typy z pierwszego kawałka, kolumna po kolumnie.
+    Kolumna całkowita z brakami w tym kawałku -> Int64 (zapis "2", nie "2.0");
+    kolumna, której nie da się rzutować, zostaje z typem z pliku. Kategorie
+    (schemat) zostają własne – kategorie pierwszego pliku zgubiłyby wartości.
+    """
+    zmiany = {}
+    for kol, typ in typy.items():
+        if chunk[kol].dtype == typ or isinstance(typ, pd.CategoricalDtype):
+            continue
+        try:
+            zmiany[kol] = chunk[kol].astype(typ)
+        except (TypeError, ValueError):
+            if pd.api.types.is_integer_dtype(typ):
+                try:
+                    zmiany[kol] = chunk[kol].astype("Int64")
+                except (TypeError, ValueError):
+                    pass
+    return chunk.assign(**zmiany) if zmiany else chunk
+
+
+def _do_zapisu(df, tabela):
+    """Ramka do to_csv: ID tabeli schematu bez zer wiodących (jak dotąd w all_*.csv)."""
+    return schemat.do_tekstu(df, tabela, zera=False) if tabela else df
+
+
+def stream_merge(files, out_path, przygotuj=None, klucz=None, chunksize=CHUNKSIZE, etap=None, tabela=None):
+    """
+    Dopisuje pliki do out_path kawałek po kawałku (stała pamięć).
+    tabela – nazwa tabeli schematu (schemat.TYPY): kawałki typowane schemat.typuj.
+    Nagłówek i typy kolumn ustala pierwszy wczytany kawałek; kolejne są do
+    niego dopasowywane (brakujące kolumny = puste, nadmiarowe pomijane).
+    `przygotuj(df)` – opcjonalna normalizacja kawałka, `klucz` – lista kolumn
+    do wykrywania powtórzeń. Zwraca (liczba_wierszy, DuplicateTracker | None).
+    etap (metrics.Etap) dostaje czas i liczbę wierszy każdego pliku.
+    Plik z błędem w połowie jest wycofywany w całości: wyjście obcinane do
+    stanu sprzed niego, jego wiersze i klucze nie są liczone.
+    """
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    # nigdy nie czytamy pliku, do którego właśnie piszemy
+    files = [f for f in files if os.path.abspath(f) != os.path.abspath(out_path)]
+    kolumny, typy = None, None
+    wiersze = 0
+    naglowek = True
+    duplikaty = DuplicateTracker() if klucz else None
+
+    with open(out_path, "w", encoding="utf-8", newline="") as out:
+        for file in files:
+            start, wiersze_przed = time.perf_counter(), wiersze
+            pozycja, stan = out.tell(), (kolumny, typy, naglowek)
+            klucze = []
+            try:
+                for chunk in pd.read_csv(file, chunksize=chunksize):
+                    if przygotuj is not None:
+                        chunk = przygotuj(chunk)
+                    if tabela:
+                        chunk = schemat.typuj(chunk, tabela)
+
+                    if kolumny is None:
+                        kolumny, typy = list(chunk.columns), chunk.dtypes.to_dict()
+                    else:
+                        nadmiarowe = set(chunk.columns) - set(kolumny)
+                        if nadmiarowe:
+                            print(f"⚠ {file}: pomijam kolumny spoza schematu {sorted(nadmiarowe)}")
+                        chunk = _dopasuj_typy(chunk.reindex(columns=kolumny), typy)
+
+                    if duplikaty is not None and set(klucz).issubset(chunk.columns):
+                        if len(klucz) == 1:
+                            klucze.extend(chunk[klucz[0]].dropna().tolist())
+                        else:
+                            klucze.extend(chunk[klucz].dropna().itertuples(index=False, name=None))
+
+                    _do_zapisu(chunk, tabela).to_csv(out, header=naglowek, index=False)
+                    naglowek = False
+                    wiersze += len(chunk)
+            except Exception as e:
+                # wycofanie kawałków już zapisanych z tego pliku
+                out.seek(pozycja)
+                out.truncate()
+                kolumny, typy, naglowek = stan
+                wiersze = wiersze_przed
+                print(f"❌ Błąd przy wczytywaniu {file}: {e}")
+                if etap is not None:
+                    etap.plik(file, czas_s=time.perf_counter() - start, status="blad", blad=e)
+                continue
+            if duplikaty is not None:
+                duplikaty.dodaj(klucze)
+            if etap is not None:
+                n = wiersze - wiersze_przed
+                etap.plik(file, czas_s=time.perf_counter() - start, wiersze_we=n, wiersze_wy=n)
+
+    return wiersze, duplikaty
+
+
+def merge_csv_files(pattern, output_file, id_column=None, stream=False, etap=None, tabela=None):
     """
     Łączy pliki z output_dir pasujące do pattern i zapisuje do output_file
     (ścieżka względna względem output_dir).
+    tabela – nazwa tabeli schematu: pliki czytane przez schemat.wczytaj_csv.
     Jeśli id_column = None → nie sprawdza duplikatów ID.
+    stream=True → dopisywanie plik po pliku (stała pamięć, zob. stream_merge).
+    etap (metrics.Etap) dostaje czas i liczbę wierszy każdego pliku.
     """
     files = glob.glob(os.path.join(output_dir, pattern))
     if not files:
         print(f"⚠ Brak plików pasujących do wzorca: {pattern}")
         return
 
+    if stream:
+        out_path = os.path.join(output_dir, output_file)
+        wiersze, duplikaty = stream_merge(files, out_path, klucz=[id_column] if id_column else None,
+                                          etap=etap, tabela=tabela)
+        if wiersze == 0:
+            print(f"⚠ Nie wczytano żadnych danych dla {pattern}")
+            return
+        print(f"✅ Zapisano połączony plik: {out_path} ({wiersze} rekordów)")
+        if duplikaty is None:
+            return
+        if duplikaty.powtorzone:
+            print(f"❌ UWAGA: {duplikaty.wiersze} powtórzonych ID w {output_file} (kolumna {id_column})")
+            print(pd.DataFrame({id_column: sorted(duplikaty.powtorzone)}))
+        elif duplikaty.widziane:
+            print(f"✅ Brak duplikatów w {output_file} dla ID: {id_column}")
+        else:
+            print(f"⚠ Kolumna {id_column} nie istnieje w {output_file}")
+        return
+
     dfs = []
     for file in files:
+        start = time.perf_counter()
         try:
-            df = pd.read_csv(file)
+            df = schemat.wczytaj_csv(file, tabela) if tabela else pd.read_csv(file)
             dfs.append(df)
         except Exception as e:
             print(f"❌ Błąd przy wczytywaniu {file}: {e}")
+            if etap is not None:
+                etap.plik(file, czas_s=time.perf_counter() - start, status="blad", blad=e)
+            continue
+        if etap is not None:
+            etap.plik(file, czas_s=time.perf_counter() - start, wiersze_we=len(df))
 
     if not dfs:
         print(f"⚠ Nie wczytano żadnych danych dla {pattern}")
@@ -34,8 +191,10 @@ def merge_csv_files(pattern, output_file, id_column=None):
     out_path = os.path.join(output_dir, output_file)
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
 
-    merged_df.to_csv(out_path, index=False)
+    _do_zapisu(merged_df, tabela).to_csv(out_path, index=False)
     print(f"✅ Zapisano połączony plik: {out_path} ({len(merged_df)} rekordów)")
+    if etap is not None:
+        etap.dodaj(wiersze_wy=len(merged_df))
 
     # Sprawdzanie unikalności ID – tylko jeśli podano id_column
     if id_column is None:
@@ -52,7 +211,56 @@ def merge_csv_files(pattern, output_file, id_column=None):
         print(f"⚠ Kolumna {id_column} nie istnieje w {output_file}")
 
 
-def merge_wynik_regat(output_file="all_wynikRegat.csv"):
+def merge_parquet_table(tabela, output_file, id_column=None, etap=None):
+    """
+    Odpowiednik merge_csv_files dla wyjścia main.py --format parquet:
+    czyta tabelę z output/parquet (tylko kolumny schematu, bez kolumn partycji)
+    i zapisuje połączony CSV do output_dir/output_file.
+    """
+    if not columnar.istnieje(tabela):
+        print(f"⚠ Brak tabeli parquet: {tabela}")
+        return
+
+    kolumny = columnar.SCHEMATY[tabela].names
+    merged_df = columnar.wczytaj_tabele(tabela, columns=kolumny)
+
+    out_path = os.path.join(output_dir, output_file)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    merged_df.to_csv(out_path, index=False)
+    print(f"✅ Zapisano połączony plik: {out_path} ({len(merged_df)} rekordów)")
+    if etap is not None:
+        etap.dodaj(wiersze_we=len(merged_df), wiersze_wy=len(merged_df))
+
+    if id_column is None:
+        return
+
+    duplicates = merged_df[merged_df.duplicated(subset=[id_column], keep=False)]
+    if not duplicates.empty:
+        print(f"❌ UWAGA: {len(duplicates)} powtórzonych ID w {output_file} (kolumna {id_column})")
+        print(duplicates[[id_column]].drop_duplicates())
+    else:
+        print(f"✅ Brak duplikatów w {output_file} dla ID: {id_column}")
+
+
+def _normalizuj_wynik_regat(df):
+    """Ujednolica nazwy kolumn jednego pliku wyników regat."""
+    # Uporządkuj nazwy kolumn, jeśli różnią się wielkością liter
+    cols_lower = {c.lower(): c for c in df.columns}
+    rename_map = {}
+    if 'id' in cols_lower:                 rename_map[cols_lower['id']] = 'ID'
+    if 'regaty' in cols_lower:             rename_map[cols_lower['regaty']] = 'regaty'
+    if 'klub' in cols_lower:               rename_map[cols_lower['klub']] = 'klub'
+    if 'miejscowregatach' in cols_lower:   rename_map[cols_lower['miejscowregatach']] = 'miejsceWRegatach'
+    if rename_map:
+        df = df.rename(columns=rename_map)
+
+    # Jeśli są wszystkie cztery kolumny – wybierz je, jeśli nie, zostaw jak jest
+    if set(['ID', 'regaty', 'klub', 'miejsceWRegatach']).issubset(df.columns):
+        df = df[['ID', 'regaty', 'klub', 'miejsceWRegatach']]
+    return df
+
+
+def merge_wynik_regat(output_file="all_wynikRegat.csv", stream=False, etap=None):
     """
     Łączy wszystkie pliki wyników regat w output_dir.
     Wspiera dwa układy:
@@ -61,6 +269,7 @@ def merge_wynik_regat(output_file="all_wynikRegat.csv"):
 
     🔁 NIE sprawdzamy już duplikatów po kolumnie ID (bo w DB jest AUTO_INCREMENT).
     Opcjonalnie sprawdzamy tylko duplikaty po (regaty, klub).
+    stream=True → dopisywanie plik po pliku (stała pamięć, zob. stream_merge).
     """
     # Zbierz kandydatów rekursywnie
     files = set(glob.glob(os.path.join(output_dir, "**", "*_wynikRegat.csv"), recursive=True))
@@ -70,31 +279,42 @@ def merge_wynik_regat(output_file="all_wynikRegat.csv"):
     if os.path.isdir(wyniki_dir):
         files.update(glob.glob(os.path.join(wyniki_dir, "*.csv")))
 
-    files = sorted(files)
+    # wynik poprzedniego łączenia (merge/all_wynikRegat.csv) też pasuje do wzorca
+    out_abs = os.path.abspath(os.path.join(output_dir, output_file))
+    files = sorted(f for f in files if os.path.abspath(f) != out_abs)
     if not files:
         print("⚠ Brak plików wyników regat (szukałem *_wynikRegat.csv oraz ./wynikiRegat/*.csv)")
         return
 
+    if stream:
+        out_path = os.path.join(output_dir, output_file)
+        wiersze, duplikaty = stream_merge(files, out_path, przygotuj=_normalizuj_wynik_regat,
+                                          klucz=['regaty', 'klub'], etap=etap, tabela="wynikRegat")
+        if wiersze == 0:
+            print("⚠ Nie wczytano żadnych danych dla wyników regat")
+            return
+        print(f"✅ Zapisano połączony plik: {out_path} ({wiersze} rekordów)")
+        if duplikaty.powtorzone:
+            print(f"⚠ Info: {duplikaty.wiersze} powtórzeń kombinacji (regaty, klub) w {output_file}")
+            print(pd.DataFrame(sorted(duplikaty.powtorzone), columns=['regaty', 'klub']))
+        elif duplikaty.widziane:
+            print("✅ Brak duplikatów po (regaty, klub) w all_wynikRegat.csv")
+        else:
+            print("ℹ Pomijam sprawdzanie duplikatów – brak kolumn (regaty, klub)")
+        return
+
     dfs = []
     for f in files:
+        start = time.perf_counter()
         try:
-            df = pd.read_csv(f)
-            # Uporządkuj nazwy kolumn, jeśli różnią się wielkością liter
-            cols_lower = {c.lower(): c for c in df.columns}
-            rename_map = {}
-            if 'id' in cols_lower:                 rename_map[cols_lower['id']] = 'ID'
-            if 'regaty' in cols_lower:             rename_map[cols_lower['regaty']] = 'regaty'
-            if 'klub' in cols_lower:               rename_map[cols_lower['klub']] = 'klub'
-            if 'miejscowregatach' in cols_lower:   rename_map[cols_lower['miejscowregatach']] = 'miejsceWRegatach'
-            if rename_map:
-                df = df.rename(columns=rename_map)
-
-            # Jeśli są wszystkie cztery kolumny – wybierz je, jeśli nie, zostaw jak jest
-            if set(['ID', 'regaty', 'klub', 'miejsceWRegatach']).issubset(df.columns):
-                df = df[['ID', 'regaty', 'klub', 'miejsceWRegatach']]
-            dfs.append(df)
+            dfs.append(_normalizuj_wynik_regat(schemat.wczytaj_csv(f, "wynikRegat")))
         except Exception as e:
             print(f"❌ Błąd przy wczytywaniu {f}: {e}")
+            if etap is not None:
+                etap.plik(f, czas_s=time.perf_counter() - start, status="blad", blad=e)
+            continue
+        if etap is not None:
+            etap.plik(f, czas_s=time.perf_counter() - start, wiersze_we=len(dfs[-1]))
 
     if not dfs:
         print("⚠ Nie wczytano żadnych danych dla wyników regat")
@@ -113,8 +333,10 @@ def merge_wynik_regat(output_file="all_wynikRegat.csv"):
     # Zapis
     out_path = os.path.join(output_dir, output_file)
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    merged_df.to_csv(out_path, index=False)
+    _do_zapisu(merged_df, "wynikRegat").to_csv(out_path, index=False)
     print(f"✅ Zapisano połączony plik: {out_path} ({len(merged_df)} rekordów)")
+    if etap is not None:
+        etap.dodaj(wiersze_wy=len(merged_df))
 
     # 🔍 Duplikaty – już NIE po ID, tylko opcjonalnie po (regaty, klub)
     if set(['regaty', 'klub']).issubset(merged_df.columns):
@@ -128,21 +350,91 @@ def merge_wynik_regat(output_file="all_wynikRegat.csv"):
         print("ℹ Pomijam sprawdzanie duplikatów – brak kolumn (regaty, klub)")
 
 
+def sprawdz_z_indeksem(indeks, output_file, tabela,
+                       kolumny=("ID_Regat", "ID_wyscigu", "ID_wariantu_klubu", "regaty")):
+    """
+    Sprawdza kolumny ID połączonego pliku z globalnym indeksem ID (main.py --id-index):
+    ID nieznane indeksowi i wiersze z ID, które w indeksie ma kolizję.
+    Czyta tylko kolumny ID tabeli schematu, kawałkami.
+    """
+    out_path = os.path.join(output_dir, output_file)
+    if not os.path.exists(out_path):
+        return
+    naglowek = pd.read_csv(out_path, nrows=0).columns
+    kolumny = [k for k in kolumny if k in naglowek and k in schemat.kolumny_id(tabela)]
+    if not kolumny:
+        return
+
+    kolizyjne = {k[0] for k in indeks.kolizje}
+    nieznane = {k: set() for k in kolumny}
+    wiersze_z_kolizja = 0
+    for chunk in pd.read_csv(out_path, usecols=kolumny, chunksize=CHUNKSIZE):
+        chunk = schemat.typuj(chunk, tabela)
+        for k in kolumny:
+            ids = chunk[k].dropna().astype("int64")
+            nieznane[k].update(indeks.nieznane(ids).tolist())
+            if kolizyjne:
+                wiersze_z_kolizja += int(ids.isin(kolizyjne).sum())
+
+    for k, brak in nieznane.items():
+        if brak:
+            print(f"⚠ {output_file}: {len(brak)} ID z kolumny {k} nie ma w indeksie ID")
+    if wiersze_z_kolizja:
+        print(f"❌ {output_file}: {wiersze_z_kolizja} wierszy z ID objętym kolizją w indeksie")
+
+
 if __name__ == "__main__":
-    # wyscigi – sprawdzamy duplikaty po ID_wyscigu
-    merge_csv_files(pattern="*_wyscigi.csv",
-                    output_file="merge/all_wyscigi.csv",
-                    id_column="ID_wyscigu")
-
-    # regaty – sprawdzamy duplikaty po ID_Regat
-    merge_csv_files(pattern="*_regaty.csv",
-                    output_file="merge/all_regaty.csv",
-                    id_column="ID_Regat")
-
-    # miejsca – NIE sprawdzamy duplikatów ID (id_column=None)
-    merge_csv_files(pattern="*_miejsca.csv",
-                    output_file="merge/all_miejsca.csv",
-                    id_column=None)
-
-    # wyniki regat – brak sprawdzania duplikatów po ID
-    merge_wynik_regat("merge/all_wynikRegat.csv")
+    ap = argparse.ArgumentParser(description="Łączenie wyjść main.py w pliki all_*.csv.")
+    ap.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                    help="skąd czytać wyniki main.py: CSV z output/main albo Parquet z output/parquet")
+    ap.add_argument("--stream", action="store_true",
+                    help="łącz pliki CSV strumieniowo (stała pamięć zamiast pd.concat całej historii)")
+    ap.add_argument("--id-index", nargs="?", const=id_index.INDEKS_PATH, default=None,
+                    help=f"sprawdź połączone ID z globalnym indeksem ID (domyślnie {id_index.INDEKS_PATH})")
+    metrics.dodaj_argumenty(ap)
+    args = ap.parse_args()
+    metrics.wlacz_z_argumentow(args, "merge_outputs")
+
+    if args.format == "parquet":
+        for tabela, id_column in (("wyscigi", "ID_wyscigu"), ("regaty", "ID_Regat"),
+                                  ("miejsca", None), ("wynikRegat", None)):
+            with metrics.etap(f"merge_{tabela}") as e:
+                merge_parquet_table(tabela, f"merge/all_{tabela}.csv", id_column=id_column, etap=e)
+
+    else:
+        # wyscigi – sprawdzamy duplikaty po ID_wyscigu
+        with metrics.etap("merge_wyscigi") as e:
+            merge_csv_files(pattern="*_wyscigi.csv",
+                            output_file="merge/all_wyscigi.csv",
+                            id_column="ID_wyscigu",
+                            stream=args.stream, etap=e, tabela="wyscigi")
+
+        # regaty – sprawdzamy duplikaty po ID_Regat
+        with metrics.etap("merge_regaty") as e:
+            merge_csv_files(pattern="*_regaty.csv",
+                            output_file="merge/all_regaty.csv",
+                            id_column="ID_Regat",
+                            stream=args.stream, etap=e, tabela="regaty")
+
+        # miejsca – NIE sprawdzamy duplikatów ID (id_column=None)
+        with metrics.etap("merge_miejsca") as e:
+            merge_csv_files(pattern="*_miejsca.csv",
+                            output_file="merge/all_miejsca.csv",
+                            id_column=None,
+                            stream=args.stream, etap=e, tabela="miejsca")
+
+        # wyniki regat – brak sprawdzania duplikatów po ID
+        with metrics.etap("merge_wynikRegat") as e:
+            merge_wynik_regat("merge/all_wynikRegat.csv", stream=args.stream, etap=e)
+
+    if args.id_index:
+        with metrics.etap("indeks_id"):
+            indeks = id_index.IndeksID(args.id_index)
+            if not len(indeks):
+                print(f"⚠ Pusty lub brakujący indeks ID: {args.id_index} (uruchom main.py --id-index)")
+            else:
+                print(f"📚 Indeks ID: {len(indeks)} wpisów, {len(indeks.kolizje)} kolizji")
+                for tabela in ("regaty", "wyscigi", "miejsca", "wynikRegat"):
+                    sprawdz_z_indeksem(indeks, f"merge/all_{tabela}.csv", tabela)
+
+    metrics.zakoncz_z_argumentow(args)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py – wspólne pomiary etapów dla skryptów konwertera
+
+Skrypt dzieli pracę na etapy (`with metrics.etap("konwersja") as e:`), a etap zbiera:
+✔ czas, wiersze na wejściu / wyjściu, wiersze na sekundę,
+✔ pliki przetworzone / pominięte / z błędem – każdy plik z własnym czasem,
+  żeby było widać, który plik źródłowy spowolnił przebieg,
+✔ szczyt pamięci Pythona (tracemalloc) – tylko z --pamiec, bo spowalnia kilkukrotnie,
+✔ opcjonalnie profil cProfile całego przebiegu (--profil).
+Na koniec raport JSON (--raport) i plik tekstowy Prometheusa (--prometheus,
+format textfile collectora). Bez tych opcji pomiary nic nie wypisują ani nie zapisują.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+RAPORT_DIR = "./mnt/data/output/metryki"
+PREFIKS_PROMETHEUS = "liga_konwerter"
+
+
+class Etap:
+
+    def __init__(self, nazwa: str):
+        self.nazwa = nazwa
+        self.czas_s = 0.0
+        self.wiersze_we = 0
+        self.wiersze_wy = 0
+        self.pominiete = 0
+        self.bledy = 0
+        self.pamiec_szczyt = None      # bajty; None bez tracemalloc
+        self.pliki = []                # {plik, czas_s, wiersze_we, wiersze_wy, status}
+
+    def dodaj(self, wiersze_we: int = 0, wiersze_wy: int = 0) -> None:
+        self.wiersze_we += int(wiersze_we)
+        self.wiersze_wy += int(wiersze_wy)
+
+    def plik(self, path: str, czas_s: float = None, wiersze_we: int = 0, wiersze_wy: int = 0,
+             status: str = "ok", blad: str = None) -> None:
+        """Wynik jednego pliku źródłowego; status: ok / pominiety / blad."""
+        wpis = {"plik": str(path), "czas_s": None if czas_s is None else round(czas_s, 4),
+                "wiersze_we": int(wiersze_we), "wiersze_wy": int(wiersze_wy), "status": status}
+        if blad:
+            wpis["blad"] = str(blad)
+        self.pliki.append(wpis)
+        if status == "pominiety":
+            self.pominiete += 1
+        elif status == "blad":
+            self.bledy += 1
+        self.dodaj(wiersze_we, wiersze_wy)
+
+    @property
+    def wiersze_na_s(self) -> float:
+        return self.wiersze_we / self.czas_s if self.czas_s > 0 else 0.0
+
+    def slownik(self) -> dict:
+        return {
+            "etap": self.nazwa,
+            "czas_s": round(self.czas_s, 4),
+            "wiersze_we": self.wiersze_we,
+            "wiersze_wy": self.wiersze_wy,
+            "wiersze_na_s": round(self.wiersze_na_s, 1),
+            "pliki": len(self.pliki),
+            "pominiete": self.pominiete,
+            "bledy": self.bledy,
+            "pamiec_szczyt_bajty": self.pamiec_szczyt,
+            "pamiec_szczyt_mb": None if self.pamiec_szczyt is None else round(self.pamiec_szczyt / (1024 * 1024), 2),
+            "najwolniejsze_pliki": sorted(
+                (p for p in self.pliki if p["czas_s"] is not None), key=lambda p: p["czas_s"], reverse=True
+            )[:10],
+            "pliki_szczegoly": self.pliki,
+        }
+
+
+class Przebieg:
+    """Jedno uruchomienie skryptu: lista etapów + ustawienia raportu."""
+
+    def __init__(self, skrypt: str, pamiec: bool = False, profil: str = None):
+        self.skrypt = skrypt
+        self.start = datetime.now()
+        self._t0 = time.perf_counter()
+        self.etapy = []
+        self._stos = []                # otwarte etapy (etapy mogą być zagnieżdżone)
+        self.pamiec = pamiec
+        self.profil = profil
+        self._profiler = None
+
+        if pamiec and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if profil:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextmanager
+    def etap(self, nazwa: str):
+        e = Etap(nazwa)
+        self.etapy.append(e)
+        self._stos.append([e, 0])      # [etap, szczyt pamięci w etapach zagnieżdżonych]
+        if self.pamiec:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield e
+        finally:
+            e.czas_s = time.perf_counter() - start
+            _, szczyt_dzieci = self._stos.pop()
+            if self.pamiec:
+                # reset_peak() w etapie zagnieżdżonym zeruje szczyt – bierzemy max z obu
+                e.pamiec_szczyt = max(tracemalloc.get_traced_memory()[1], szczyt_dzieci)
+                if self._stos:
+                    self._stos[-1][1] = max(self._stos[-1][1], e.pamiec_szczyt)
+
+    def raport(self) -> dict:
+        return {
+            "skrypt": self.skrypt,
+            "start": self.start.isoformat(timespec="seconds"),
+            "czas_s": round(time.perf_counter() - self._t0, 4),
+            "argv": sys.argv[1:],
+            "etapy": [e.slownik() for e in self.etapy],
+        }
+
+    def prometheus(self, raport: dict = None) -> str:
+        """Metryki w formacie tekstowym Prometheusa (gauge z etykietami skrypt/etap)."""
+        raport = raport or self.raport()
+        miary = [
+            ("etap_czas_sekundy", "Czas etapu", "czas_s"),
+            ("etap_wiersze_wejscie", "Wiersze na wejściu etapu", "wiersze_we"),
+            ("etap_wiersze_wyjscie", "Wiersze na wyjściu etapu", "wiersze_wy"),
+            ("etap_wiersze_na_sekunde", "Przepustowość etapu", "wiersze_na_s"),
+            ("etap_pliki", "Pliki obsłużone w etapie", "pliki"),
+            ("etap_pliki_pominiete", "Pliki pominięte w etapie", "pominiete"),
+            ("etap_pliki_bledy", "Pliki z błędem w etapie", "bledy"),
+            ("etap_pamiec_szczyt_bajty", "Szczyt pamięci Pythona w etapie (tracemalloc)", "pamiec_szczyt_bajty"),
+        ]
+        linie = []
+        for nazwa, opis, klucz in miary:
+            wartosci = [(e["etap"], e[klucz]) for e in raport["etapy"] if e[klucz] is not None]
+            if not wartosci:
+                continue
+            pelna = f"{PREFIKS_PROMETHEUS}_{nazwa}"
+            linie.append(f"# HELP {pelna} {opis}")
+            linie.append(f"# TYPE {pelna} gauge")
+            for etap, v in wartosci:
+                linie.append(f'{pelna}{{skrypt="{_etykieta(self.skrypt)}",etap="{_etykieta(etap)}"}} {v:g}')
+
+        pelna = f"{PREFIKS_PROMETHEUS}_przebieg_czas_sekundy"
+        linie += [f"# HELP {pelna} Czas całego przebiegu skryptu", f"# TYPE {pelna} gauge",
+                  f'{pelna}{{skrypt="{_etykieta(self.skrypt)}"}} {raport["czas_s"]:g}']
+        pelna = f"{PREFIKS_PROMETHEUS}_przebieg_koniec_timestamp_sekundy"
+        linie += [f"# HELP {pelna} Koniec ostatniego przebiegu (unix)", f"# TYPE {pelna} gauge",
+                  f'{pelna}{{skrypt="{_etykieta(self.skrypt)}"}} {time.time():.0f}']
+        return "\n".join(linie) + "\n"
+
+    def zakoncz(self, raport_path: str = None, prometheus_path: str = None) -> dict:
+        """Zatrzymuje profiler, zapisuje raport JSON / Prometheus i wypisuje podsumowanie."""
+        if self._profiler is not None:
+            self._profiler.disable()
+            _zapisz_atomowo(self.profil, None, dump=self._profiler.dump_stats)
+            print(f"📈 Profil cProfile: {self.profil} (python -m pstats {self.profil})")
+            self._profiler = None
+
+        raport = self.raport()
+        if raport_path:
+            _zapisz_atomowo(raport_path, json.dumps(raport, ensure_ascii=False, indent=2))
+            print(f"📊 Raport przebiegu: {raport_path}")
+        if prometheus_path:
+            _zapisz_atomowo(prometheus_path, self.prometheus(raport))
+            print(f"📊 Metryki Prometheus: {prometheus_path}")
+        if raport_path or prometheus_path or self.pamiec or self.profil:
+            wypisz_podsumowanie(raport)
+        return raport
+
+
+def _etykieta(s: str) -> str:
+    return str(s).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _zapisz_atomowo(path: str, tekst: str = None, dump=None) -> None:
+    """tmp + os.replace – scheduler / collector nigdy nie widzi połowy pliku."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.tmp"
+    if dump is not None:
+        dump(tmp)
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(tekst)
+    os.replace(tmp, path)
+
+
+def wypisz_podsumowanie(raport: dict) -> None:
+    print(f"⏱️ {raport['skrypt']}: {raport['czas_s']:.2f} s")
+    for e in raport["etapy"]:
+        pamiec = f", pamięć {e['pamiec_szczyt_mb']:.1f} MB" if e["pamiec_szczyt_mb"] is not None else ""
+        problemy = f", pominięte {e['pominiete']}, błędy {e['bledy']}" if e["pominiete"] or e["bledy"] else ""
+        print(f"   {e['etap']:<26} {e['czas_s']:>8.3f} s  {e['wiersze_we']:>9} → {e['wiersze_wy']:>9} wierszy "
+              f"({e['wiersze_na_s']:.0f}/s){problemy}{pamiec}")
+        if e["najwolniejsze_pliki"] and e["pliki"] > 1:
+            p = e["najwolniejsze_pliki"][0]
+            print(f"      najwolniejszy plik: {p['plik']} ({p['czas_s']:.3f} s)")
+
+
+# -------------------------------
+# Przebieg bieżącego procesu
+# -------------------------------
+
+_przebieg = None
+_otwarte = 0                   # wlacz_z_argumentow() bez zakoncz_z_argumentow()
+
+
+def wlacz(skrypt: str = None, pamiec: bool = False, profil: str = None) -> Przebieg:
+    """Nowy przebieg dla bieżącego procesu (skrypt = nazwa w raporcie i etykietach)."""
+    global _przebieg
+    skrypt = skrypt or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+    _przebieg = Przebieg(skrypt, pamiec=pamiec, profil=profil)
+    return _przebieg
+
+
+def przebieg() -> Przebieg:
+    """Bieżący przebieg – jeśli skrypt nie wywołał wlacz(), zakładany bez pamięci i profilu."""
+    return _przebieg or wlacz()
+
+
+def etap(nazwa: str):
+    """with metrics.etap("nazwa") as e: ... – etap bieżącego przebiegu."""
+    return przebieg().etap(nazwa)
+
+
+def dodaj_argumenty(ap) -> None:
+    """Wspólne opcje pomiarów dla argparse każdego skryptu."""
+    g = ap.add_argument_group("pomiary")
+    g.add_argument("--raport", nargs="?", const="", default=None,
+                   help=f"zapisz raport JSON przebiegu (domyślnie {RAPORT_DIR}/<skrypt>.json)")
+    g.add_argument("--prometheus", default=None, help="zapisz metryki w formacie tekstowym Prometheusa")
+    g.add_argument("--pamiec", action="store_true", help="szczyt pamięci na etap (tracemalloc, wolniej)")
+    g.add_argument("--profil", default=None, help="zrzut cProfile przebiegu do pliku (tylko proces główny, bez puli --workers)")
+
+
+def wlacz_z_argumentow(args, skrypt: str) -> Przebieg:
+    """
+    Przebieg wg opcji dodaj_argumenty(). Skrypt wywołany z wnętrza innego (kluby.main
+    z main.py --kluby) bez własnych opcji dopisuje etapy do przebiegu wywołującego.
+    """
+    global _otwarte
+    wlasne = args.raport is not None or args.prometheus or args.pamiec or args.profil
+    args.metryki_wlasne = _otwarte == 0 or bool(wlasne)
+    _otwarte += 1
+    if not args.metryki_wlasne:
+        return _przebieg
+
+    if args.raport == "":
+        args.raport = os.path.join(RAPORT_DIR, f"{skrypt}.json")
+    return wlacz(skrypt, pamiec=args.pamiec, profil=args.profil)
+
+
+def zakoncz_z_argumentow(args):
+    global _otwarte
+    _otwarte = max(0, _otwarte - 1)
+    if not getattr(args, "metryki_wlasne", True):
+        return None
+    return przebieg().zakoncz(args.raport, args.prometheus)
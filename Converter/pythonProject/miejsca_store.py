@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+miejsca_store.py – binarny magazyn miejsc w wyścigach (memmap, stała szerokość rekordu)
+
+Jeden plik ./mnt/data/output/miejsca.bin budowany z wyjścia main.py (*_miejsca.csv
++ *_wyscigi.csv albo partycje Parquet):
+✔ rekord miejsca o stałej szerokości, typy jak w columnar.SCHEMATY:
+    ID_wyscigu uint32, ID_wariantu_klubu uint32, Zajete_miejsce float32, Kary uint8, Numer_lodki uint16,
+✔ rekordy posortowane po (ID_Regat, Numer_wyscigu, ID_wyscigu) – wyścig i regaty
+  to ciągłe wycinki tablicy,
+✔ indeksy przesunięć (CSR): regaty -> wycinek miejsc i wyścigów, wyścig -> wycinek miejsc,
+  wariant klubu -> lista numerów rekordów,
+✔ otwarcie = odczyt nagłówka i mmap pliku; tablice to widoki bez kopiowania, więc
+  pamięć nie rośnie z historią, a parsowanie tekstu odpada.
+
+Układ pliku: MAGIC (8 B), długość nagłówka (uint32 LE), nagłówek JSON (sekcje: dtype,
+kształt, przesunięcie), potem sekcje wyrównane do 64 B.
+"""
+
+import argparse
+import glob
+import json
+import os
+import struct
+import time
+
+import numpy as np
+import pandas as pd
+
+import columnar
+
+MAGAZYN_PATH = "./mnt/data/output/miejsca.bin"
+MAIN_DIR = "./mnt/data/output/main"
+
+MAGIC = b"PLZMIEJ1"
+WERSJA = 1
+WYROWNANIE = 64
+
+REKORD = np.dtype([
+    ("ID_wyscigu", "<u4"),
+    ("ID_wariantu_klubu", "<u4"),
+    ("Zajete_miejsce", "<f4"),
+    ("Kary", "u1"),
+    ("Numer_lodki", "<u2"),
+])
+WYSCIG = np.dtype([
+    ("ID_wyscigu", "<u4"),
+    ("ID_Regat", "<u4"),
+    ("Numer_wyscigu", "<u2"),
+    ("Finalowy", "?"),
+])
+
+
+# -------------------------------
+# Budowa
+# -------------------------------
+
+def _wczytaj_wyjscie_main(main_dir: str = MAIN_DIR):
+    """(miejsca, wyscigi) z wyjścia main.py: Parquet, jeśli nie jest starszy od CSV, inaczej pliki CSV rund."""
+    if columnar.aktualny(("miejsca", "wyscigi"), main_dir):
+        return (columnar.wczytaj_tabele("miejsca", columns=list(REKORD.names)),
+                columnar.wczytaj_tabele("wyscigi", columns=list(WYSCIG.names)))
+
+    ramki = {}
+    for tabela, dtype in (("miejsca", REKORD), ("wyscigi", WYSCIG)):
+        dfs = []
+        for plik in sorted(glob.glob(os.path.join(main_dir, f"*_{tabela}.csv"))):
+            try:
+                dfs.append(pd.read_csv(plik, usecols=lambda c: c in dtype.names))
+            except pd.errors.EmptyDataError:
+                continue            # pusta runda (np. plik bez wyścigów)
+        ramki[tabela] = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame(columns=list(dtype.names))
+    return ramki["miejsca"], ramki["wyscigi"]
+
+
+def _tablica(df: pd.DataFrame, dtype: np.dtype) -> np.ndarray:
+    out = np.zeros(len(df), dtype=dtype)
+    for pole in dtype.names:
+        if pole in df.columns:
+            kolumna = df[pole]
+            if dtype[pole].kind != "f":
+                kolumna = kolumna.fillna(0)
+            out[pole] = kolumna.to_numpy(dtype=dtype[pole])
+    return out
+
+
+def _csr(klucze: np.ndarray):
+    """Posortowane klucze -> (unikalne, przesunięcia len+1)."""
+    unikalne, start = np.unique(klucze, return_index=True)
+    return unikalne, np.append(start, len(klucze)).astype(np.uint32)
+
+
+def zbuduj(miejsca: pd.DataFrame, wyscigi: pd.DataFrame) -> dict:
+    """Sekcje magazynu {nazwa: tablica} z ramek jak all_miejsca / all_wyscigi."""
+    wys = _tablica(wyscigi.drop_duplicates("ID_wyscigu"), WYSCIG)
+    wys = wys[np.lexsort((wys["ID_wyscigu"], wys["Numer_wyscigu"], wys["ID_Regat"]))]
+
+    rek = _tablica(miejsca, REKORD)
+    poz_wyscigu = pd.Index(wys["ID_wyscigu"]).get_indexer(rek["ID_wyscigu"])
+    sieroty = int((poz_wyscigu < 0).sum())
+    if sieroty:
+        print(f"⚠ Pomijam {sieroty} miejsc z wyścigów spoza tabeli wyścigów")
+        rek, poz_wyscigu = rek[poz_wyscigu >= 0], poz_wyscigu[poz_wyscigu >= 0]
+
+    # kolejność rekordów = kolejność wyścigów (stabilnie, w wyścigu jak w pliku)
+    kolejnosc = np.argsort(poz_wyscigu, kind="stable")
+    rek, poz_wyscigu = rek[kolejnosc], poz_wyscigu[kolejnosc]
+
+    # wyścig -> wycinek rekordów (także wyścigi bez miejsc)
+    wys_ptr = np.searchsorted(poz_wyscigu, np.arange(len(wys) + 1)).astype(np.uint32)
+
+    # regaty -> wycinek wyścigów i wycinek rekordów
+    regaty_ids, regaty_wys_ptr = _csr(wys["ID_Regat"])
+    regaty_ptr = wys_ptr[regaty_wys_ptr]
+
+    # wyścig po ID -> pozycja w tablicy wyścigów
+    wys_poz = np.argsort(wys["ID_wyscigu"], kind="stable").astype(np.uint32)
+    wys_klucze = wys["ID_wyscigu"][wys_poz]
+
+    # wariant klubu -> numery rekordów
+    klub_wiersze = np.argsort(rek["ID_wariantu_klubu"], kind="stable").astype(np.uint32)
+    klub_ids, klub_ptr = _csr(rek["ID_wariantu_klubu"][klub_wiersze])
+
+    return {
+        "miejsca": rek, "wyscigi": wys, "wys_ptr": wys_ptr,
+        "wys_klucze": wys_klucze, "wys_poz": wys_poz,
+        "regaty_ids": regaty_ids, "regaty_ptr": regaty_ptr, "regaty_wys_ptr": regaty_wys_ptr,
+        "klub_ids": klub_ids, "klub_ptr": klub_ptr, "klub_wiersze": klub_wiersze,
+    }
+
+
+def zapisz(sekcje: dict, path: str = MAGAZYN_PATH) -> None:
+    """
+    Zapis atomowy (tmp + os.replace) – otwarte mmapy starego pliku zostają ważne.
+    Plik tymczasowy per proces: równoległe przebudowy nie piszą do jednego tmp.
+    """
+    opis, przesuniecie = {}, 0
+    for nazwa, tablica in sekcje.items():
+        dtype = tablica.dtype.descr if tablica.dtype.names else tablica.dtype.str
+        opis[nazwa] = {"dtype": dtype, "ksztalt": list(tablica.shape), "przesuniecie": przesuniecie}
+        przesuniecie += -(-tablica.nbytes // WYROWNANIE) * WYROWNANIE
+
+    naglowek = json.dumps({"wersja": WERSJA, "sekcje": opis}).encode("utf-8")
+    poczatek = -(-(len(MAGIC) + 4 + len(naglowek)) // WYROWNANIE) * WYROWNANIE
+    naglowek += b" " * (poczatek - len(MAGIC) - 4 - len(naglowek))
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(naglowek)) + naglowek)
+        for nazwa, tablica in sekcje.items():
+            f.seek(poczatek + opis[nazwa]["przesuniecie"])
+            f.write(np.ascontiguousarray(tablica).tobytes())
+        f.truncate(poczatek + przesuniecie)
+    os.replace(tmp, path)
+
+
+# -------------------------------
+# Odczyt
+# -------------------------------
+
+def _dtype(descr) -> np.dtype:
+    if isinstance(descr, str):
+        return np.dtype(descr)
+    return np.dtype([tuple(pole) for pole in descr])
+
+
+class MagazynMiejsc:
+    """
+    Otwarty magazyn: wszystkie tablice to widoki na jeden mmap pliku (tylko do odczytu).
+    wyscig()/regaty() zwracają wycinki bez kopiowania; klub() zbiera rekordy
+    po indeksie (kopia tylko rekordów tego klubu).
+    """
+
+    def __init__(self, path: str = MAGAZYN_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} nie jest magazynem miejsc (zły nagłówek)")
+            (dlugosc,) = struct.unpack("<I", f.read(4))
+            naglowek = json.loads(f.read(dlugosc))
+        if naglowek.get("wersja") != WERSJA:
+            raise ValueError(f"{path}: wersja {naglowek.get('wersja')}, oczekiwana {WERSJA}")
+
+        poczatek = len(MAGIC) + 4 + dlugosc
+        self._mmap = np.memmap(path, dtype=np.uint8, mode="r")
+        for nazwa, s in naglowek["sekcje"].items():
+            dtype = _dtype(s["dtype"])
+            n = int(np.prod(s["ksztalt"]))
+            tablica = np.frombuffer(self._mmap, dtype=dtype, count=n, offset=poczatek + s["przesuniecie"])
+            setattr(self, nazwa, tablica.reshape(s["ksztalt"]))
+
+    def __len__(self) -> int:
+        return len(self.miejsca)
+
+    @staticmethod
+    def _pozycja(klucze: np.ndarray, wartosc: int):
+        i = int(np.searchsorted(klucze, wartosc))
+        return i if i < len(klucze) and klucze[i] == wartosc else None
+
+    def wyscig(self, id_wyscigu: int) -> np.ndarray:
+        """Miejsca jednego wyścigu (widok; pusty, gdy wyścigu nie ma)."""
+        i = self._pozycja(self.wys_klucze, id_wyscigu)
+        if i is None:
+            return self.miejsca[:0]
+        w = self.wys_poz[i]
+        return self.miejsca[self.wys_ptr[w]:self.wys_ptr[w + 1]]
+
+    def regaty(self, id_regat: int) -> np.ndarray:
+        """Miejsca wszystkich wyścigów regat (widok), po Numer_wyscigu."""
+        i = self._pozycja(self.regaty_ids, id_regat)
+        if i is None:
+            return self.miejsca[:0]
+        return self.miejsca[self.regaty_ptr[i]:self.regaty_ptr[i + 1]]
+
+    def wyscigi_regat(self, id_regat: int) -> np.ndarray:
+        i = self._pozycja(self.regaty_ids, id_regat)
+        if i is None:
+            return self.wyscigi[:0]
+        return self.wyscigi[self.regaty_wys_ptr[i]:self.regaty_wys_ptr[i + 1]]
+
+    def wiersze_klubu(self, id_wariantu: int) -> np.ndarray:
+        """Numery rekordów wariantu klubu (widok), w kolejności magazynu."""
+        i = self._pozycja(self.klub_ids, id_wariantu)
+        if i is None:
+            return self.klub_wiersze[:0]
+        return self.klub_wiersze[self.klub_ptr[i]:self.klub_ptr[i + 1]]
+
+    def klub(self, id_wariantu: int) -> np.ndarray:
+        return self.miejsca[self.wiersze_klubu(id_wariantu)]
+
+    def ramki(self, rekordy: np.ndarray = None):
+        """(miejsca, wyscigi) jako DataFrame z kolumnami all_miejsca / all_wyscigi."""
+        rekordy = self.miejsca if rekordy is None else rekordy
+        return pd.DataFrame(rekordy), pd.DataFrame(self.wyscigi)
+
+
+def _zrodla(main_dir: str) -> list:
+    if columnar.aktualny(("miejsca", "wyscigi"), main_dir):
+        return columnar.pliki_tabeli("miejsca") + columnar.pliki_tabeli("wyscigi")
+    return glob.glob(os.path.join(main_dir, "*_miejsca.csv")) + glob.glob(os.path.join(main_dir, "*_wyscigi.csv"))
+
+
+def wczytaj(path: str = MAGAZYN_PATH, main_dir: str = MAIN_DIR) -> MagazynMiejsc:
+    """Magazyn z pliku; gdy go nie ma albo wyjście main.py jest nowsze – przebudowa."""
+    zrodla = _zrodla(main_dir)
+    if os.path.isfile(path) and os.path.getmtime(path) >= max(map(os.path.getmtime, zrodla), default=0):
+        return MagazynMiejsc(path)
+
+    miejsca, wyscigi = _wczytaj_wyjscie_main(main_dir)
+    zapisz(zbuduj(miejsca, wyscigi), path)
+    magazyn = MagazynMiejsc(path)
+    print(f"💾 Zbudowano magazyn miejsc: {path} ({len(magazyn)} miejsc, {len(magazyn.wyscigi)} wyścigów)")
+    return magazyn
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Binarny magazyn miejsc (memmap) z wyjścia main.py.")
+    ap.add_argument("--out", default=MAGAZYN_PATH)
+    ap.add_argument("--main-dir", default=MAIN_DIR)
+    ap.add_argument("--klub", type=int, nargs="+", help="pokaż statystyki wariantów klubu (ID_wariantu_klubu)")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    miejsca, wyscigi = _wczytaj_wyjscie_main(args.main_dir)
+    sekcje = zbuduj(miejsca, wyscigi)
+    zapisz(sekcje, args.out)
+    rozmiar = os.path.getsize(args.out)
+    print(f"✅ Magazyn miejsc: {args.out} – {len(sekcje['miejsca'])} miejsc, {len(sekcje['wyscigi'])} wyścigów, "
+          f"{len(sekcje['regaty_ids'])} regat, {len(sekcje['klub_ids'])} wariantów klubów "
+          f"({rozmiar / 1024:.0f} KB, {time.perf_counter() - start:.2f} s)")
+
+    start = time.perf_counter()
+    magazyn = MagazynMiejsc(args.out)
+    print(f"📂 Otwarcie (mmap): {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    for id_wariantu in args.klub or ():
+        rek = magazyn.klub(id_wariantu)
+        if not len(rek):
+            print(f"⚠ {id_wariantu:08d}: brak miejsc")
+            continue
+        print(f"📊 {id_wariantu:08d}: {len(rek)} wyścigów, średnie miejsce {rek['Zajete_miejsce'].mean():.2f}, "
+              f"kary {int(rek['Kary'].sum())}")
+
+
+if __name__ == "__main__":
+    main()
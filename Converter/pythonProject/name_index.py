@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+name_index.py – indeks do rozmytego dopasowania nazwisk zawodników (build_roster.py)
+
+Nazwy są sprowadzane do tokenów bez polskich znaków i interpunkcji, posortowanych
+("Królik Marta," == "marta krolik"). Kandydaci do porównania pochodzą tylko
+z bloków (pierwsze / ostatnie 3 litery każdego tokenu), a z nich bierzemy co
+najwyżej MAX_KANDYDATOW z największą liczbą wspólnych bloków – nigdy wszystkie pary.
+Wynik = współczynnik Dice na trigramach tokenów (0..1) jako pewność dopasowania.
+"""
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+MAX_KANDYDATOW = 50
+PROG_PEWNOSCI = 0.85      # poniżej – tylko propozycja do ręcznej weryfikacji
+MIN_PRZEWAGA = 0.05       # tyle musi dzielić najlepszego kandydata od drugiego
+
+# litery, których NFKD nie rozkłada na literę bazową + znak diakrytyczny
+_ZAMIANY = str.maketrans({"ł": "l", "Ł": "L", "ø": "o", "Ø": "O", "ß": "ss"})
+
+
+def tokeny(nazwa: str) -> tuple:
+    """'Kamińska-Skrzypczak  Anna,' -> ('anna', 'kaminska', 'skrzypczak')"""
+    s = str(nazwa or "").translate(_ZAMIANY)
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii").lower()
+    return tuple(sorted(t for t in re.split(r"[^a-z0-9]+", s) if t))
+
+
+def trigramy(tok: tuple) -> set:
+    """Trigramy każdego tokenu osobno (z dopełnieniem) – niezależne od kolejności tokenów."""
+    wynik = set()
+    for t in tok:
+        t = f"  {t} "
+        wynik.update(t[i:i + 3] for i in range(len(t) - 2))
+    return wynik
+
+
+def bloki(tok: tuple) -> set:
+    """Klucze blokujące: prefiks i sufiks (3 litery) każdego tokenu."""
+    wynik = set()
+    for t in tok:
+        if len(t) < 2:
+            continue
+        wynik.add("p:" + t[:3])
+        wynik.add("s:" + t[-3:])
+    return wynik
+
+
+def dice(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class IndeksNazwisk:
+    """
+    Nazwa -> ID (np. Zawodnik -> ID_Zawodnika). Jedna pozycja na znormalizowaną
+    nazwę; jeśli ta sama nazwa ma różne ID, pozycja jest niejednoznaczna.
+    """
+
+    def __init__(self, pary=()):
+        self._ids = []          # pozycja -> set ID
+        self._nazwy = []        # pozycja -> pierwsza oryginalna nazwa
+        self._trigramy = []     # pozycja -> set trigramów
+        self._pozycja = {}      # tokeny -> pozycja
+        self._bloki = defaultdict(list)
+        for nazwa, id_ in pary:
+            self.dodaj(nazwa, id_)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def dodaj(self, nazwa: str, id_) -> None:
+        tok = tokeny(nazwa)
+        if not tok:
+            return
+        poz = self._pozycja.get(tok)
+        if poz is not None:
+            self._ids[poz].add(id_)
+            return
+
+        poz = len(self._ids)
+        self._pozycja[tok] = poz
+        self._ids.append({id_})
+        self._nazwy.append(nazwa)
+        self._trigramy.append(trigramy(tok))
+        for b in bloki(tok):
+            self._bloki[b].append(poz)
+
+    def kandydaci(self, tok: tuple, limit: int = MAX_KANDYDATOW) -> list:
+        """Pozycje z co najmniej jednym wspólnym blokiem – najwyżej `limit` najlepszych."""
+        licznik = Counter()
+        for b in bloki(tok):
+            licznik.update(self._bloki.get(b, ()))
+        return [poz for poz, _ in licznik.most_common(limit)]
+
+    def znajdz(self, nazwa: str, limit: int = MAX_KANDYDATOW) -> dict:
+        """
+        Najlepsze dopasowanie: {ID, Wzorzec, Pewnosc, Druga_pewnosc, Metoda}.
+        Metoda: 'tokeny' (te same tokeny, np. inna kolejność / bez ogonków),
+        'trigramy', 'niejednoznaczne' (kilka ID) albo 'brak'.
+        """
+        tok = tokeny(nazwa)
+        brak = {"ID": None, "Wzorzec": None, "Pewnosc": 0.0, "Druga_pewnosc": 0.0, "Metoda": "brak"}
+        if not tok:
+            return brak
+
+        poz = self._pozycja.get(tok)
+        if poz is not None:
+            wynik = {"Wzorzec": self._nazwy[poz], "Pewnosc": 1.0, "Druga_pewnosc": 0.0}
+            if len(self._ids[poz]) > 1:
+                return {**wynik, "ID": None, "Metoda": "niejednoznaczne"}
+            return {**wynik, "ID": next(iter(self._ids[poz])), "Metoda": "tokeny"}
+
+        tri = trigramy(tok)
+        oceny = sorted(
+            ((dice(tri, self._trigramy[p]), p) for p in self.kandydaci(tok, limit)),
+            reverse=True,
+        )
+        if not oceny:
+            return brak
+
+        pewnosc, poz = oceny[0]
+        druga = oceny[1][0] if len(oceny) > 1 else 0.0
+        wynik = {"Wzorzec": self._nazwy[poz], "Pewnosc": round(pewnosc, 3), "Druga_pewnosc": round(druga, 3)}
+        if len(self._ids[poz]) > 1:
+            return {**wynik, "ID": None, "Metoda": "niejednoznaczne"}
+        return {**wynik, "ID": next(iter(self._ids[poz])), "Metoda": "trigramy"}
+
+
+def pewne(dopasowanie: dict, prog: float = PROG_PEWNOSCI, przewaga: float = MIN_PRZEWAGA) -> bool:
+    """Czy dopasowanie można przyjąć automatycznie."""
+    if dopasowanie["ID"] is None:
+        return False
+    if dopasowanie["Metoda"] == "tokeny":
+        return True
+    return (dopasowanie["Pewnosc"] >= prog
+            and dopasowanie["Pewnosc"] - dopasowanie["Druga_pewnosc"] >= przewaga)
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline.py – uruchamia etapy konwertera we właściwej kolejności, tylko gdy trzeba
+
+Każdy etap deklaruje skrypt, wejścia, wyjścia i etapy, od których zależy:
+✔ etap jest aktualny, gdy wszystkie wyjścia istnieją i są nowsze od wejść
+  (i od samego skryptu) – wtedy jest pomijany, jak w make,
+✔ etap po zależności, która właśnie się wykonała, wykonuje się zawsze,
+✔ niezależne gałęzie (np. trzy skrypty tworzenie_wystepowania_*) idą równolegle,
+  każdy etap w osobnym procesie z logiem w output/pipeline/logi,
+✔ błąd etapu = etapy zależne są pomijane, reszta idzie dalej.
+Wyjście z wzorcem (np. output/main/*_regaty.csv) liczy się jako świeże wg najnowszego
+pasującego pliku – stare pliki po usuniętych źródłach nie wymuszają ponownego przebiegu.
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+
+KOD_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA = "./mnt/data"
+OUT_DIR = "./mnt/data/output/pipeline"
+MANIFEST_FILE = ".manifest_pipeline.json"     # wynik ostatniego przebiegu każdego etapu
+
+
+@dataclass(frozen=True)
+class Etap:
+    nazwa: str
+    skrypt: str
+    wejscia: tuple                 # wzorce glob (rekurencyjne **), względem cwd
+    wyjscia: tuple
+    zalezy: tuple = ()
+    bez: tuple = ()                # foldery wyłączone z wejść
+    metryki: bool = False          # skrypt przyjmuje --raport (metrics.py)
+
+
+KLUBY_WYCIAG = f"{DATA}/kluby/kluby_wyciag.csv"
+PLIKI_RUND = f"{DATA}/Regaty/**/*.csv"
+REGATY_MAIN = f"{DATA}/output/main/*_regaty.csv"
+REGATY_INDEKS = f"{DATA}/output/regaty_index.npz"
+MERGE = f"{DATA}/output/main/merge"
+MAGAZYN_MIEJSC = f"{DATA}/output/miejsca.bin"
+
+ETAPY = (
+    Etap("kluby", "kluby.py",
+         wejscia=(PLIKI_RUND, f"{DATA}/kluby/Kluby_tablica.csv"),
+         wyjscia=(KLUBY_WYCIAG, f"{DATA}/kluby/kluby_insert.sql", f"{DATA}/output/kluby_index.npz"),
+         metryki=True),
+    Etap("main", "main.py",
+         wejscia=(PLIKI_RUND,),
+         wyjscia=(REGATY_MAIN, f"{DATA}/output/main/*_wyscigi.csv", f"{DATA}/output/main/*_miejsca.csv",
+                  REGATY_INDEKS),
+         metryki=True),
+    Etap("merge", "merge_outputs.py",
+         wejscia=(f"{DATA}/output/main/*.csv",),
+         wyjscia=tuple(f"{MERGE}/all_{t}.csv" for t in ("wyscigi", "regaty", "miejsca", "wynikRegat")),
+         zalezy=("main",), metryki=True),
+    Etap("magazyn_miejsc", "miejsca_store.py",
+         wejscia=(f"{DATA}/output/main/*_miejsca.csv", f"{DATA}/output/main/*_wyscigi.csv"),
+         wyjscia=(MAGAZYN_MIEJSC,),
+         zalezy=("main",)),
+    # build_roster.py czyta wszystkie CSV z mnt/data (także kluby_wyciag.csv) poza output/
+    Etap("roster", "build_roster.py",
+         wejscia=(f"{DATA}/**/*.csv",),
+         wyjscia=(f"{DATA}/output/roster/roster.csv",),
+         zalezy=("kluby",), bez=(f"{DATA}/output",), metryki=True),
+    # wariant klubu wybierany wg startów w regatach – czyta magazyn miejsc
+    Etap("wystepowanie_lista", "tworzenie_wystepowania_z_listy_zawodnikow.py",
+         wejscia=(f"{DATA}/występowanie/Zawodnicy_Ekstraklsa_2024.csv", f"{DATA}/zawodnicy/zawodnicy.csv",
+                  KLUBY_WYCIAG, REGATY_INDEKS, MAGAZYN_MIEJSC),
+         wyjscia=(f"{DATA}/output/wystepowanie/wystepowanie_z_listy/wystepowanie_*.csv",),
+         zalezy=("kluby", "main", "magazyn_miejsc"), metryki=True),
+    Etap("wystepowanie_xlsx", "tworzenie_wystepowania_z_xlsx.py",
+         wejscia=(f"{DATA}/występowanie/PLZ_uczestnicy_2025.xlsx", KLUBY_WYCIAG, REGATY_INDEKS),
+         wyjscia=(f"{DATA}/output/wystepowanie/xlsx/wystepowanie_all.csv",),
+         zalezy=("kluby", "main"), metryki=True),
+    Etap("wystepowanie_ankieta", "tworzenie_wystepowania_z_ankiety.py",
+         wejscia=(f"{DATA}/występowanie/wystepowania_z_ankiety_completed.csv",
+                  f"{DATA}/wystepowania_z_ankiety_completed.csv", KLUBY_WYCIAG),
+         wyjscia=(f"{DATA}/output/wystepowanie/ankieta/wystepowania_z_ankiety_all.csv",),
+         zalezy=("kluby",), metryki=True),
+    Etap("ranking_sezonow", "standings.py",
+         wejscia=(f"{MERGE}/all_wynikRegat.csv", f"{MERGE}/all_regaty.csv", KLUBY_WYCIAG),
+         wyjscia=(f"{DATA}/output/ranking/ranking_sezonow.csv",),
+         zalezy=("merge", "kluby")),
+    Etap("ranking_z_finalem", "final_ranking.py",
+         wejscia=(f"{MERGE}/all_miejsca.csv", f"{MERGE}/all_wyscigi.csv"),
+         wyjscia=(f"{DATA}/output/ranking/ranking_z_finalem.csv",),
+         zalezy=("merge",)),
+)
+
+
+# -------------------------------
+# Aktualność etapu
+# -------------------------------
+
+def _pliki(wzorzec: str, bez=()) -> list:
+    bez = [os.path.normpath(b) + os.sep for b in bez]
+    return [p for p in glob.glob(wzorzec, recursive=True)
+            if os.path.isfile(p) and not any(os.path.normpath(p).startswith(b) for b in bez)]
+
+
+def najnowsze_wejscie(etap: Etap) -> float:
+    """Najnowszy mtime spośród wejść etapu i jego skryptu."""
+    czasy = [os.path.getmtime(os.path.join(KOD_DIR, etap.skrypt))]
+    for wzorzec in etap.wejscia:
+        czasy.extend(os.path.getmtime(p) for p in _pliki(wzorzec, etap.bez))
+    return max(czasy)
+
+
+def najstarsze_wyjscie(etap: Etap):
+    """Najstarszy z wzorców wyjścia (wzorzec = najnowszy pasujący plik); None, gdy czegoś brak."""
+    czasy = []
+    for wzorzec in etap.wyjscia:
+        pliki = _pliki(wzorzec)
+        if not pliki:
+            return None
+        czasy.append(max(os.path.getmtime(p) for p in pliki))
+    return min(czasy)
+
+
+def powod_uruchomienia(etap: Etap, stan_poprzedni: dict, wykonane: set, wymus: bool = False):
+    """Dlaczego etap trzeba wykonać (tekst) albo None, gdy jest aktualny."""
+    if wymus:
+        return "wymuszony"
+    zmienione = [z for z in etap.zalezy if z in wykonane]
+    if zmienione:
+        return f"wykonano {', '.join(zmienione)}"
+    if stan_poprzedni.get(etap.nazwa, {}).get("status") == "blad":
+        return "poprzedni przebieg zakończył się błędem"
+    wyjscie = najstarsze_wyjscie(etap)
+    if wyjscie is None:
+        return "brak wyjść"
+    if najnowsze_wejscie(etap) > wyjscie:
+        return "wejścia nowsze niż wyjścia"
+    return None
+
+
+# -------------------------------
+# Wykonanie
+# -------------------------------
+
+def uruchom_etap(etap: Etap, log_dir: str, metryki: bool = False) -> dict:
+    """Skrypt etapu w osobnym procesie (cwd bez zmian), stdout+stderr do logu."""
+    cmd = [sys.executable, os.path.join(KOD_DIR, etap.skrypt)]
+    if metryki and etap.metryki:
+        cmd.append("--raport")
+    log_path = os.path.join(log_dir, f"{etap.nazwa}.log")
+
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT,
+                              env=dict(os.environ, PYTHONIOENCODING="utf-8"))
+    return {
+        "status": "ok" if proc.returncode == 0 else "blad",
+        "kod": proc.returncode,
+        "czas_s": round(time.perf_counter() - start, 3),
+        "koniec": datetime.now().isoformat(timespec="seconds"),
+        "log": log_path,
+    }
+
+
+def _z_zaleznosciami(etapy, cele) -> list:
+    """Wybrane etapy + wszystko, od czego zależą (w kolejności deklaracji)."""
+    po_nazwie = {e.nazwa: e for e in etapy}
+    potrzebne = set()
+    do_sprawdzenia = list(cele)
+    while do_sprawdzenia:
+        nazwa = do_sprawdzenia.pop()
+        if nazwa not in potrzebne:
+            potrzebne.add(nazwa)
+            do_sprawdzenia.extend(po_nazwie[nazwa].zalezy)
+    return [e for e in etapy if e.nazwa in potrzebne]
+
+
+def sprawdz_kolejnosc(etapy) -> None:
+    """Zależności muszą być zadeklarowane wcześniej (to wyklucza cykle)."""
+    znane = set()
+    for e in etapy:
+        for z in e.zalezy:
+            if z not in znane:
+                raise ValueError(f"Etap {e.nazwa} zależy od {z}, który nie jest zadeklarowany przed nim")
+        znane.add(e.nazwa)
+
+
+def uruchom(etapy=ETAPY, jobs: int = None, wymus=(), na_sucho: bool = False, metryki: bool = False,
+            out_dir: str = OUT_DIR) -> dict:
+    """
+    Wykonuje nieaktualne etapy; niezależne równolegle (najwyżej `jobs` naraz).
+    wymus – nazwy etapów do wykonania mimo aktualności (True = wszystkie).
+    Zwraca {etap: status}: ok / blad / aktualny / pominiety.
+    """
+    sprawdz_kolejnosc(etapy)
+    log_dir = os.path.join(out_dir, "logi")
+    os.makedirs(log_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    stan_poprzedni = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            stan_poprzedni = json.load(f)
+
+    status, wykonane = {}, set()
+    oczekujace = list(etapy)
+    jobs = jobs or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        biegnace = {}
+        while oczekujace or biegnace:
+            for etap in list(oczekujace):
+                zal = [status.get(z) for z in etap.zalezy]
+                if any(s in ("blad", "pominiety") for s in zal):
+                    oczekujace.remove(etap)
+                    status[etap.nazwa] = "pominiety"
+                    print(f"⏭️ {etap.nazwa}: pominięty – nie powiodła się zależność")
+                    continue
+                if not all(s in ("ok", "aktualny") for s in zal):
+                    continue
+
+                oczekujace.remove(etap)
+                powod = powod_uruchomienia(etap, stan_poprzedni, wykonane,
+                                           wymus is True or etap.nazwa in wymus)
+                if powod is None:
+                    status[etap.nazwa] = "aktualny"
+                    print(f"✔ {etap.nazwa}: aktualny")
+                elif na_sucho:
+                    status[etap.nazwa] = "ok"
+                    wykonane.add(etap.nazwa)
+                    print(f"▶ {etap.nazwa}: do wykonania ({powod})")
+                else:
+                    print(f"▶ {etap.nazwa}: start ({powod})")
+                    biegnace[pool.submit(uruchom_etap, etap, log_dir, metryki)] = etap
+
+            if not biegnace:
+                continue
+            gotowe, _ = wait(biegnace, return_when=FIRST_COMPLETED)
+            for fut in gotowe:
+                etap = biegnace.pop(fut)
+                wynik = fut.result()
+                status[etap.nazwa] = wynik["status"]
+                stan_poprzedni[etap.nazwa] = wynik
+                if wynik["status"] == "ok":
+                    wykonane.add(etap.nazwa)
+                    print(f"✅ {etap.nazwa}: {wynik['czas_s']:.1f} s")
+                else:
+                    print(f"❌ {etap.nazwa}: kod {wynik['kod']} – zobacz {wynik['log']}")
+
+    if not na_sucho:
+        tmp = f"{manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stan_poprzedni, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, manifest_path)
+    return status
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    nazwy = [e.nazwa for e in ETAPY]
+    ap = argparse.ArgumentParser(description="Uruchamia etapy konwertera wg zależności, pomijając aktualne.")
+    ap.add_argument("etapy", nargs="*", metavar="ETAP",
+                    help=f"etapy do zbudowania (z zależnościami); domyślnie wszystkie: {', '.join(nazwy)}")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="ile etapów naraz (domyślnie liczba rdzeni)")
+    ap.add_argument("--wymus", nargs="*", choices=nazwy, default=None, metavar="ETAP",
+                    help="wykonaj mimo aktualności: wybrane etapy, a bez nazw – wszystkie")
+    ap.add_argument("-n", "--na-sucho", action="store_true", help="tylko pokaż, co zostałoby wykonane")
+    ap.add_argument("--metryki", action="store_true",
+                    help="etapy z metrics.py zapisują raport JSON (output/metryki/<skrypt>.json)")
+    args = ap.parse_args(argv)
+    nieznane = [e for e in args.etapy if e not in nazwy]
+    if nieznane:
+        ap.error(f"nieznane etapy: {', '.join(nieznane)} (dostępne: {', '.join(nazwy)})")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    etapy = _z_zaleznosciami(ETAPY, args.etapy) if args.etapy else list(ETAPY)
+    wymus = () if args.wymus is None else (args.wymus or True)
+
+    start = time.perf_counter()
+    status = uruchom(etapy, jobs=args.jobs, wymus=wymus, na_sucho=args.na_sucho, metryki=args.metryki)
+
+    licznik = {s: sum(1 for v in status.values() if v == s) for s in ("ok", "aktualny", "blad", "pominiety")}
+    print(f"\n📦 Etapy: {'do wykonania' if args.na_sucho else 'wykonane'} {licznik['ok']}, aktualne {licznik['aktualny']}, "
+          f"błędy {licznik['blad']}, pominięte {licznik['pominiety']} ({time.perf_counter() - start:.1f} s)")
+    if licznik["blad"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+regaty_index.py – trwały indeks regat (Liga_Poziom, Rok, Numer_Rundy) <-> ID_Regat
+
+main.py zapisuje go po każdej konwersji, a skrypty występowań wczytują jeden
+mały plik .npz zamiast czytać, sklejać i deduplikować wszystkie *_regaty.csv:
+✔ id_regat(liga, rok, runda) – O(1) w słowniku,
+✔ regaty(id) – odwrotnie: ID_Regat -> (liga, rok, runda, miasto),
+✔ rundy(liga, rok) – wszystkie rundy sezonu ligi (zamiast zgadywania rund 1..12),
+✔ ramka(rok=, liga=) – DataFrame do merge, jak dawne load_regaty_map(),
+✔ usun(id) – regaty, których źródło zniknęło albo dostało inne ID_Regat (--incremental).
+Gdy indeksu jeszcze nie ma, wczytaj() buduje go raz z output/main (CSV albo Parquet).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import columnar
+
+INDEKS_PATH = "./mnt/data/output/regaty_index.npz"
+REGATY_DIR = "./mnt/data/output/main"
+
+KOLUMNY = ["ID_Regat", "Liga_Poziom", "Numer_Rundy", "Rok"]
+
+
+class IndeksRegat:
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._id = {}            # (liga, rok, runda) -> ID_Regat
+        self._regaty = {}        # ID_Regat -> (liga, rok, runda, miasto)
+        self.zmieniony = False
+
+        if path and os.path.isfile(path):
+            try:
+                with np.load(path, allow_pickle=False) as dane:
+                    for id_, liga, rok, runda, miasto in zip(
+                        dane["ids"].tolist(), dane["ligi"].tolist(), dane["lata"].tolist(),
+                        dane["rundy"].tolist(), dane["miasta"].tolist(),
+                    ):
+                        self._id[(liga, rok, runda)] = id_
+                        self._regaty[id_] = (liga, rok, runda, miasto)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠ Pomijam uszkodzony indeks regat {path}: {e}")
+                self._id, self._regaty = {}, {}
+
+    def __len__(self) -> int:
+        return len(self._regaty)
+
+    def dodaj(self, id_regat: int, liga: str, rok: int, runda: int, miasto: str = "") -> None:
+        id_regat, rok, runda = int(id_regat), int(rok), int(runda)
+        klucz = (str(liga), rok, runda)
+        stare = self._id.get(klucz)
+        if stare == id_regat and self._regaty[stare][3] == miasto:
+            return
+        if stare is not None:
+            self._regaty.pop(stare, None)
+        self._id[klucz] = id_regat
+        self._regaty[id_regat] = klucz + (str(miasto),)
+        self.zmieniony = True
+
+    def dodaj_ramke(self, df: pd.DataFrame) -> None:
+        """Wiersze tabeli regaty (ID_Regat, Liga_Poziom, Numer_Rundy, Rok[, Miasto])."""
+        miasta = df["Miasto"].astype(object).fillna("").astype(str) if "Miasto" in df.columns else [""] * len(df)
+        for id_, liga, runda, rok, miasto in zip(
+            df["ID_Regat"], df["Liga_Poziom"], df["Numer_Rundy"], df["Rok"], miasta
+        ):
+            self.dodaj(id_, liga, rok, runda, miasto)
+
+    def usun(self, id_regat: int) -> None:
+        """Usuwa regaty z indeksu (nieznane ID – bez zmian)."""
+        wpis = self._regaty.pop(int(id_regat), None)
+        if wpis is None:
+            return
+        if self._id.get(wpis[:3]) == int(id_regat):
+            del self._id[wpis[:3]]
+        self.zmieniony = True
+
+    # -------------------------------
+    # Odczyt
+    # -------------------------------
+
+    def id_regat(self, liga: str, rok: int, runda: int):
+        """ID_Regat dla rundy albo None."""
+        return self._id.get((str(liga), int(rok), int(runda)))
+
+    def regaty(self, id_regat: int):
+        """(liga, rok, runda, miasto) dla ID_Regat albo None."""
+        return self._regaty.get(int(id_regat))
+
+    def rundy(self, liga: str, rok: int) -> list:
+        """[(runda, ID_Regat), ...] sezonu ligi, po numerze rundy."""
+        liga, rok = str(liga), int(rok)
+        return sorted((r, id_) for (l, y, r), id_ in self._id.items() if l == liga and y == rok)
+
+    def ramka(self, rok=None, liga=None) -> pd.DataFrame:
+        """Kolumny ID_Regat, Liga_Poziom, Numer_Rundy, Rok (int64) – opcjonalnie tylko rok / liga."""
+        wiersze = [
+            (id_, l, r, y) for (l, y, r), id_ in self._id.items()
+            if (rok is None or y == int(rok)) and (liga is None or l == liga)
+        ]
+        df = pd.DataFrame(wiersze, columns=KOLUMNY)
+        return df.astype({"ID_Regat": "int64", "Numer_Rundy": "int64", "Rok": "int64"})
+
+    # -------------------------------
+    # Zapis
+    # -------------------------------
+
+    def zapisz(self, path: str = None) -> None:
+        path = path or self.path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        ids = sorted(self._regaty)
+        wpisy = [self._regaty[i] for i in ids]
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                ids=np.array(ids, dtype=np.uint32),
+                ligi=np.array([w[0] for w in wpisy], dtype=str),
+                lata=np.array([w[1] for w in wpisy], dtype=np.uint16),
+                rundy=np.array([w[2] for w in wpisy], dtype=np.uint16),
+                miasta=np.array([w[3] for w in wpisy], dtype=str),
+            )
+        os.replace(tmp, path)
+        self.zmieniony = False
+
+
+# -------------------------------
+# Budowa z wyjścia main.py
+# -------------------------------
+
+def id_regat_z_wynikow(pliki) -> set:
+    """
+    ID_Regat z plików wynikowych main.py (manifest.wyniki): *_regaty.csv
+    i partycje Parquet tabeli regaty. Pliki, których już nie ma, są pomijane.
+    """
+    ids = set()
+    for path in pliki:
+        if not os.path.isfile(path):
+            continue
+        if path.endswith("_regaty.csv"):
+            ids.update(pd.read_csv(path, usecols=["ID_Regat"])["ID_Regat"].tolist())
+        elif path.endswith(".parquet") and f"{os.sep}regaty{os.sep}" in os.path.normpath(path) \
+                and columnar.dostepny():
+            ids.update(pd.read_parquet(path, columns=["ID_Regat"])["ID_Regat"].tolist())
+    return {int(i) for i in ids}
+
+
+def usun_nieaktualne(indeks: IndeksRegat, kandydaci: set, stare_wyniki) -> list:
+    """
+    Po konwersji przyrostowej: usuwa z indeksu ID z `kandydaci` (regaty
+    przekonwertowanych i znikniętych źródeł, zebrane przed konwersją), których
+    nie ma już w żadnym z ich dawnych plików wynikowych. Ta sama runda ma
+    zawsze ten sam plik, więc przepisana runda z tym samym ID zostaje.
+    Zwraca usunięte ID.
+    """
+    usuniete = sorted(set(kandydaci) - id_regat_z_wynikow(stare_wyniki))
+    for id_regat in usuniete:
+        indeks.usun(id_regat)
+    return usuniete
+
+
+def zbuduj(regaty_dir: str = REGATY_DIR, path: str = None) -> IndeksRegat:
+    """Indeks z tabel regat main.py: Parquet (jeśli nie jest starszy od CSV) albo wszystkie *_regaty.csv."""
+    indeks = IndeksRegat()
+    indeks.path = path
+
+    if columnar.aktualny(("regaty",), regaty_dir):
+        indeks.dodaj_ramke(columnar.wczytaj_tabele("regaty", columns=KOLUMNY + ["Miasto"]))
+        return indeks
+
+    if not os.path.isdir(regaty_dir):
+        return indeks
+
+    for fname in sorted(os.listdir(regaty_dir)):
+        if not fname.endswith("_regaty.csv"):
+            continue
+        src = os.path.join(regaty_dir, fname)
+        try:
+            df = pd.read_csv(src)
+        except Exception as e:
+            print(f"⏭️ Pomijam {src}: {e}")
+            continue
+        if not set(KOLUMNY).issubset(df.columns):
+            print(f"⚠ Plik {src} nie ma wymaganych kolumn {KOLUMNY}, pomijam.")
+            continue
+        indeks.dodaj_ramke(df)
+    return indeks
+
+
+def wczytaj(path: str = INDEKS_PATH, regaty_dir: str = REGATY_DIR) -> IndeksRegat:
+    """
+    Indeks z pliku; jeśli pliku nie ma (main.py sprzed indeksu), budowany
+    jednorazowo z output/main i zapisywany.
+    """
+    if os.path.isfile(path):
+        return IndeksRegat(path)
+
+    indeks = zbuduj(regaty_dir, path)
+    if len(indeks):
+        indeks.zapisz()
+        print(f"📚 Zbudowano indeks regat: {path} ({len(indeks)} regat)")
+    return indeks
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+schemat.py – typy kolumn tabel konwertera w pamięci (pandas)
+
+Jedno miejsce, w którym zapisane jest, jak skrypty trzymają tabele w pamięci:
+✔ ID_* jako uint32 (puste ID_miejsca / ID_wynikRegat i braki – UInt32 z <NA>),
+✔ skróty i nazwy klubów, ligi, miasta i ścieżki źródeł jako category,
+✔ Zajete_miejsce jako float32, Kary uint8, numery wyścigów / rund / rok uint16,
+✔ tekst dopiero na granicy CSV/SQL: do_csv() zapisuje ID jako 8 cyfr z zerami
+  wiodącymi (dokładnie jak dawne ID-teksty z generate_numeric_id), do_sql()
+  daje wartości Pythona dla executemany().
+Te same typy ma schemat Parquet w columnar.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+SZEROKOSC_ID = 8
+
+TYPY = {
+    "miejsca": {
+        "ID_miejsca": "uint32",
+        "ID_wyscigu": "uint32",
+        "ID_wariantu_klubu": "uint32",
+        "Zajete_miejsce": "float32",
+        "Kary": "uint8",
+        "Numer_lodki": "uint16",
+    },
+    "wyscigi": {
+        "ID_wyscigu": "uint32",
+        "ID_Regat": "uint32",
+        "Numer_wyscigu": "uint16",
+        "Finalowy": "bool",
+    },
+    "regaty": {
+        "ID_Regat": "uint32",
+        "Nazwa": "category",
+        "Liga_Poziom": "category",
+        "Miasto": "category",
+        "Numer_Rundy": "uint16",
+        "Rok": "uint16",
+    },
+    "wynikRegat": {
+        "ID_wynikRegat": "uint32",
+        "regaty": "uint32",
+        "ID_wariantu_klubu": "uint32",
+        "miejsceWRegatach": "uint16",
+    },
+    "kluby": {
+        "Skrot": "category",
+        "Nazwa": "category",
+        "ID_zestawienia_klubow": "uint32",
+        "ID_wariantu_klubu": "uint32",
+    },
+    "roster": {
+        "Skrot": "category",
+        "__src__": "category",
+    },
+    "wystepowanie": {
+        "ID_wystepowania": "uint32",
+        "ID_Zawodnika": "uint32",
+        "ID_Regat": "uint32",
+        "ID_wariantu_klubu": "uint32",
+        "WynikWRegatach": "uint16",
+    },
+}
+
+# typ całkowity z brakami -> odpowiednik nullable
+_Z_BRAKAMI = {"uint8": "UInt8", "uint16": "UInt16", "uint32": "UInt32"}
+
+
+def kolumny_id(tabela: str) -> list:
+    """Kolumny z ID (uint32) tabeli – te dostają zera wiodące w do_csv()."""
+    return [k for k, typ in TYPY[tabela].items() if typ == "uint32"]
+
+
+def _rzutuj(col: pd.Series, typ: str) -> pd.Series:
+    if typ == "category":
+        return col if isinstance(col.dtype, pd.CategoricalDtype) else col.astype("category")
+    if typ == "bool":
+        return col.astype(bool)
+
+    # ramki z dawnych ścieżek mają jeszcze ID-teksty i "" zamiast braku
+    if col.dtype == object or isinstance(col.dtype, pd.CategoricalDtype):
+        col = pd.to_numeric(col.astype(object).replace("", None), errors="coerce")
+    if typ.startswith("float"):
+        return col.astype(typ)
+    if col.isna().any():
+        return col.astype(_Z_BRAKAMI[typ])
+    return col.astype(typ)
+
+
+def typuj(df: pd.DataFrame, tabela: str) -> pd.DataFrame:
+    """
+    Ramka z kolumnami rzutowanymi na typy TYPY[tabela] (tylko kolumny, które
+    w niej są; pozostałe bez zmian). Całkowite z brakami -> UInt8/16/32.
+    """
+    if df is None:
+        return None
+    zmiany = {
+        k: _rzutuj(df[k], typ)
+        for k, typ in TYPY[tabela].items()
+        if k in df.columns and str(df[k].dtype) != typ
+    }
+    return df.assign(**zmiany) if zmiany else df
+
+
+def wczytaj_csv(path: str, tabela: str, usecols=None, **kwargs) -> pd.DataFrame:
+    """pd.read_csv + typuj: kategorie i float32 już przy parsowaniu, ID po wczytaniu."""
+    typy = {k: t for k, t in TYPY[tabela].items() if t in ("category", "float32")}
+    if usecols is not None:
+        typy = {k: t for k, t in typy.items() if k in usecols}
+    df = pd.read_csv(path, usecols=usecols, dtype=typy, **kwargs)
+    return typuj(df, tabela)
+
+
+# -------------------------------
+# Granica CSV/SQL
+# -------------------------------
+
+def id_tekst(col: pd.Series, zera: bool = True) -> pd.Series:
+    """Kolumna ID jako tekst: 8 cyfr z zerami wiodącymi (zera=False – bez), brak -> ""."""
+    col = col.astype("UInt32")
+    tekst = col.fillna(0).to_numpy(dtype=np.uint32).astype(str)
+    if zera:
+        tekst = np.char.zfill(tekst, SZEROKOSC_ID)
+    return pd.Series(tekst, index=col.index, dtype=object).where(col.notna().to_numpy(), "")
+
+
+def do_tekstu(df: pd.DataFrame, tabela: str, zera: bool = True) -> pd.DataFrame:
+    """Kopia ramki do zapisu: ID jako tekst (id_tekst), reszta bez zmian."""
+    zmiany = {k: id_tekst(df[k], zera) for k in kolumny_id(tabela) if k in df.columns}
+    return df.assign(**zmiany)
+
+
+def do_csv(df: pd.DataFrame, path: str, tabela: str, zera: bool = True) -> None:
+    """Zapis ramki typowanej do CSV – ID formatowane dopiero tutaj."""
+    do_tekstu(df, tabela, zera).to_csv(path, index=False)
+
+
+def do_sql(df: pd.DataFrame, tabela: str) -> pd.DataFrame:
+    """
+    Kopia ramki typowanej do executemany(): kategorie jako object, float32
+    przez tekst (2.2, nie 2.200000047683716). Braki zostają jako NaN/<NA>.
+    """
+    zmiany = {}
+    for k, typ in TYPY[tabela].items():
+        if k not in df.columns:
+            continue
+        if typ == "category":
+            zmiany[k] = df[k].astype(object)
+        elif typ == "float32":
+            zmiany[k] = pd.to_numeric(df[k].astype(str), errors="coerce")
+    return df.assign(**zmiany) if zmiany else df
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+source_catalog.py – jeden katalog plików źródłowych ./mnt/data/Regaty dla main.py i kluby.py
+
+✔ drzewo <rok>/<liga>/<Runda N>/*.csv przechodzone jest raz,
+✔ każdy plik parsowany jest raz (pd.read_csv) i trzymany w pamięci,
+✔ oba skrypty widzą dokładnie ten sam zestaw plików, w tej samej kolejności,
+✔ opcjonalnie (xlsx_dir) arkusze skoroszytów wyników PLŻ (<rok>/*.xlsx) są
+  rundami tak jak pliki CSV – bez ręcznego eksportu do Regaty. Rok i liga pochodzą
+  z opisu nad tabelą, numer rundy z kolejności arkuszy; runda, która jest już
+  w CSV, ma pierwszeństwo.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+import xlsx_ingest
+
+
+def liga_z_folderu(liga_folder_raw: str) -> str:
+    """'1Liga' -> '1 Liga', pozostałe nazwy folderów bez zmian."""
+    if liga_folder_raw and liga_folder_raw[0].isdigit():
+        return liga_folder_raw[0] + " " + liga_folder_raw[1:]
+    return liga_folder_raw
+
+
+@dataclass(frozen=True)
+class PlikRundy:
+    path: str
+    file: str
+    rok_folder: str
+    liga_folder: str
+    runda_folder: str
+
+    @property
+    def liga(self) -> str:
+        return liga_z_folderu(self.liga_folder)
+
+    @property
+    def rok(self) -> int:
+        return int(self.rok_folder)
+
+    @property
+    def numer_rundy(self) -> Optional[int]:
+        """Numer z końca nazwy folderu rundy; None dla np. 'Qualifications'."""
+        nr_match = re.search(r"(\d+)$", self.runda_folder)
+        return int(nr_match.group(1)) if nr_match else None
+
+    @property
+    def miasto(self) -> str:
+        nazwa = os.path.splitext(self.file)[0]
+        return nazwa.split("-")[1].strip() if "-" in nazwa else ""
+
+
+def _z_opisu(meta: list, klucz: str) -> str:
+    """'POZIOM:    1 LIGA' -> '1 LIGA' (pusty napis, jeśli brak)."""
+    for tekst in meta:
+        if tekst.upper().startswith(klucz + ":"):
+            return re.sub(r"\s+", " ", tekst.split(":", 1)[1]).strip()
+    return ""
+
+
+def plik_rundy_z_arkusza(path: str, arkusz: str, meta: list, rok_folder: str,
+                        numer: int = None) -> Optional[PlikRundy]:
+    """
+    Arkusz skoroszytu wyników PLŻ jako plik rundy; None dla arkuszy bez
+    'RUNDA:' (np. SEZON – klasyfikacja generalna).
+      RUNDA: Szczecin (3)         -> folder 'Runda <numer>'
+      RUNDA: Sopot (Q)            -> 'Qualifications' (bez numeru, jak w Regaty)
+      POZIOM: EKSTRAKLASA / 1 LIGA / KWALIFIKACJE 1 LIGA -> 'Ekstraklasa' / '1Liga'
+    <numer> to kolejność arkusza rundy w skoroszycie (podaje go wołający) –
+    numer w opisie bywa błędny (2018: dwa arkusze '(2)').
+    """
+    runda = _z_opisu(meta, "RUNDA")
+    if not runda:
+        return None
+    poziom = _z_opisu(meta, "POZIOM").upper()
+    rok = _z_opisu(meta, "SEZON") or rok_folder
+
+    poziom = re.sub(r"^KWALIFIKACJE\s+", "", poziom)
+    m = re.fullmatch(r"(\d+)\s*LIGA", poziom)
+    if m:
+        liga_folder = f"{m.group(1)}Liga"
+    else:
+        liga_folder = poziom.capitalize()
+
+    oznaczenie = re.search(r"\(([^)]*)\)\s*$", runda)
+    oznaczenie = oznaczenie.group(1).strip() if oznaczenie else ""
+    if oznaczenie.isdigit():
+        runda_folder = f"Runda {numer or oznaczenie}"
+    elif oznaczenie.upper() == "Q":
+        runda_folder = "Qualifications"
+    else:
+        runda_folder = oznaczenie or runda
+
+    return PlikRundy(
+        path=xlsx_ingest.sciezka_arkusza(path, arkusz),
+        file=f"{rok} {liga_z_folderu(liga_folder)} - {arkusz}.xlsx",
+        rok_folder=rok,
+        liga_folder=liga_folder,
+        runda_folder=runda_folder,
+    )
+
+
+class Katalog:
+    """
+    Wynik jednego przejścia po drzewie Regaty + pamięć wczytanych ramek.
+    Ramki z wczytaj() są współdzielone – konsumenci nie mogą ich modyfikować.
+    xlsx_dir: katalog skoroszytów wyników (<rok>/*.xlsx), workers: procesy
+    do parsowania arkuszy skoroszytu, którego nie ma jeszcze w cache.
+    """
+
+    def __init__(self, base_dir: str, xlsx_dir: str = None, workers: int = 1):
+        self.base_dir = base_dir
+        self.pliki = []
+        self.foldery_bez_numeru = []
+        self._ramki = {}
+
+        for year_folder in os.listdir(base_dir):
+            year_path = os.path.join(base_dir, year_folder)
+            if not os.path.isdir(year_path):
+                continue
+
+            for liga_folder_raw in os.listdir(year_path):
+                liga_path = os.path.join(year_path, liga_folder_raw)
+                if not os.path.isdir(liga_path):
+                    continue
+
+                for runda_folder in os.listdir(liga_path):
+                    runda_path = os.path.join(liga_path, runda_folder)
+                    if not os.path.isdir(runda_path):
+                        continue
+
+                    if not re.search(r"(\d+)$", runda_folder):
+                        self.foldery_bez_numeru.append(runda_folder)
+
+                    for file in os.listdir(runda_path):
+                        if not file.endswith(".csv"):
+                            continue
+
+                        self.pliki.append(PlikRundy(
+                            path=os.path.join(runda_path, file),
+                            file=file,
+                            rok_folder=year_folder,
+                            liga_folder=liga_folder_raw,
+                            runda_folder=runda_folder,
+                        ))
+
+        if xlsx_dir:
+            self._dodaj_skoroszyty(xlsx_dir, workers)
+
+    def _dodaj_skoroszyty(self, xlsx_dir: str, workers: int) -> None:
+        if not os.path.isdir(xlsx_dir):
+            print(f"⚠ Katalog skoroszytów nie istnieje: {xlsx_dir}")
+            return
+
+        def klucz(p):
+            return p.rok_folder, p.liga_folder.lower(), p.runda_folder.lower()
+
+        z_csv = {klucz(p) for p in self.pliki}
+        dodane = pominiete = 0
+        for rok_folder in sorted(os.listdir(xlsx_dir)):
+            rok_path = os.path.join(xlsx_dir, rok_folder)
+            if not os.path.isdir(rok_path):
+                continue
+
+            for file in sorted(os.listdir(rok_path)):
+                if not file.endswith(".xlsx") or file.startswith("~$"):
+                    continue
+                path = os.path.join(rok_path, file)
+                try:
+                    # arkusze wyników PLŻ: tabela do pierwszego pustego wiersza
+                    arkusze = xlsx_ingest.wczytaj_skoroszyt(path, workers, do_pustego=True)
+                except Exception as e:
+                    print(f"⏭️ Pomijam {path}: {e}")
+                    continue
+
+                st = os.stat(path)
+                numer = 0
+                for arkusz, meta, df in arkusze:
+                    plik = plik_rundy_z_arkusza(path, arkusz, meta, rok_folder, numer + 1)
+                    if plik is None:
+                        continue
+                    if plik.numer_rundy is not None:
+                        numer += 1
+                    if klucz(plik) in z_csv:
+                        pominiete += 1
+                        continue
+                    if plik.numer_rundy is None:
+                        self.foldery_bez_numeru.append(plik.runda_folder)
+                    self.pliki.append(plik)
+                    self._ramki[plik.path] = ((st.st_size, st.st_mtime_ns), df)
+                    dodane += 1
+
+        print(f"📚 Skoroszyty {xlsx_dir}: {dodane} arkuszy rund, {pominiete} już w CSV")
+
+    def pliki_rund(self) -> list:
+        """Tylko pliki z folderów rund z numerem (to, co konwertuje main.py)."""
+        return [p for p in self.pliki if p.numer_rundy is not None]
+
+    @staticmethod
+    def _sygnatura(path: str) -> tuple:
+        st = os.stat(xlsx_ingest.rozdziel_sciezke(path)[0])
+        return (st.st_size, st.st_mtime_ns)
+
+    def w_pamieci(self, plik):
+        """Ramka pliku, jeśli jest już wczytana i aktualna – inaczej None (bez czytania)."""
+        path = plik.path if isinstance(plik, PlikRundy) else plik
+        cached = self._ramki.get(path)
+        if cached is None:
+            return None
+        try:
+            sygnatura = self._sygnatura(path)
+        except OSError:
+            return None
+        return cached[1] if cached[0] == sygnatura else None
+
+    def wczytaj(self, plik) -> pd.DataFrame:
+        """
+        pd.read_csv pliku (arkusz .xlsx – z cache xlsx_ingest) – tylko przy pierwszym
+        wywołaniu (lub gdy plik zmienił się na dysku). Wyjątki z read_csv przechodzą do wołającego.
+        """
+        path = plik.path if isinstance(plik, PlikRundy) else plik
+        sygnatura = self._sygnatura(path)
+
+        cached = self._ramki.get(path)
+        if cached is not None and cached[0] == sygnatura:
+            return cached[1]
+
+        df = xlsx_ingest.wczytaj_zrodlo(path)
+        self._ramki[path] = (sygnatura, df)
+        return df
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+standings.py – ranking sezonu (wszystkie Rok × Liga_Poziom naraz) z połączonych wyników regat
+
+Odpowiednik zapytania z "wyniki z sezonu sql dobry.txt":
+    Punkty        = 19 - miejsceWRegatach dla miejsc 1..18, inaczej 0 (punktacja wymienna),
+    PunktySezon   = suma punktów klubu w sezonie,
+    best1..best4  = najlepsze, drugie najlepsze, ... miejsce w rundzie,
+    MiejsceWSezonie = ROW_NUMBER() po (PunktySezon DESC, best1..best4 ASC, Klub ASC).
+✔ NULL w bestN (klub z mniejszą liczbą rund) – na początku przy ASC, jak w MySQL,
+✔ jedno sortowanie wielokluczowe zamiast zapytania okienkowego na każdy sezon.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import columnar
+import schemat
+
+MERGE_DIR = "./mnt/data/output/main/merge"
+CLUBS_FILE = "./mnt/data/kluby/kluby_wyciag.csv"
+OUT_DIR = "./mnt/data/output/ranking"
+
+TIE_BREAK = 4            # best1..best4
+KLUCZ_SEZONU = ["Rok", "Liga_Poziom"]
+
+
+# -------------------------------
+# Punktacje (wymienne)
+# -------------------------------
+
+def punktacja_liniowa(max_miejsce: int = 18):
+    """(max_miejsce + 1) - miejsce dla miejsc 1..max_miejsce, inaczej 0."""
+    def punkty(miejsca: pd.Series) -> pd.Series:
+        m = miejsca.to_numpy(dtype="float64")
+        ok = (m >= 1) & (m <= max_miejsce)
+        return pd.Series(np.where(ok, max_miejsce + 1 - m, 0).astype("int64"), index=miejsca.index)
+    return punkty
+
+
+def punktacja_tabela(tabela: dict):
+    """Punkty wprost z tabeli {miejsce: punkty}; miejsca spoza tabeli = 0."""
+    def punkty(miejsca: pd.Series) -> pd.Series:
+        return miejsca.map(tabela).fillna(0).astype("int64")
+    return punkty
+
+
+PUNKTACJE = {
+    "19-miejsce": punktacja_liniowa(18),
+}
+
+
+# -------------------------------
+# Ranking
+# -------------------------------
+
+def ranking_sezonow(wynik_regat: pd.DataFrame, regaty: pd.DataFrame,
+                    punktacja=PUNKTACJE["19-miejsce"], klub: str = "ID_wariantu_klubu",
+                    tie_break: int = TIE_BREAK) -> pd.DataFrame:
+    """
+    wynik_regat: regaty, <klub>, miejsceWRegatach (all_wynikRegat.csv)
+    regaty:      ID_Regat, Rok, Liga_Poziom       (all_regaty.csv)
+    Zwraca: Rok, Liga_Poziom, Klub, PunktySezon, best1..bestN, MiejsceWSezonie –
+    posortowane po (Rok, Liga_Poziom, MiejsceWSezonie).
+    """
+    best_cols = [f"best{i}" for i in range(1, tie_break + 1)]
+    wyjscie = KLUCZ_SEZONU + ["Klub", "PunktySezon"] + best_cols + ["MiejsceWSezonie"]
+
+    # JOIN liga_Regaty r ON r.ID_Regat = m.regaty
+    df = wynik_regat[["regaty", klub, "miejsceWRegatach"]].rename(columns={klub: "Klub"})
+    df = df.merge(regaty[["ID_Regat"] + KLUCZ_SEZONU], left_on="regaty", right_on="ID_Regat", how="inner")
+    if df.empty:
+        return pd.DataFrame(columns=wyjscie)
+
+    grupa = KLUCZ_SEZONU + ["Klub"]
+    df["Punkty"] = punktacja(df["miejsceWRegatach"])
+
+    # PunktySezon
+    sezon = df.groupby(grupa, sort=False, observed=True)["Punkty"].sum().rename("PunktySezon")
+
+    # ROW_NUMBER() OVER (PARTITION BY Rok, Liga_Poziom, Klub ORDER BY miejsceWRegatach)
+    df = df.sort_values(grupa + ["miejsceWRegatach"], kind="mergesort")
+    df["rn"] = df.groupby(grupa, sort=False, observed=True).cumcount() + 1
+    best = (
+        df[df["rn"] <= tie_break]
+        .set_index(grupa + ["rn"])["miejsceWRegatach"]
+        .unstack("rn")
+        .reindex(columns=range(1, tie_break + 1))
+    )
+    best.columns = best_cols
+
+    tabela = sezon.to_frame().join(best).reset_index()
+
+    # ORDER BY PunktySezon DESC, best1..bestN ASC (NULL najpierw), Klub ASC
+    tabela = tabela.sort_values(
+        KLUCZ_SEZONU + ["PunktySezon"] + best_cols + ["Klub"],
+        ascending=[True] * len(KLUCZ_SEZONU) + [False] + [True] * (tie_break + 1),
+        na_position="first",
+        kind="mergesort",
+    )
+    tabela["MiejsceWSezonie"] = tabela.groupby(KLUCZ_SEZONU, sort=False, observed=True).cumcount() + 1
+
+    for col in best_cols:
+        tabela[col] = tabela[col].astype("Int64")
+    return tabela[wyjscie].reset_index(drop=True)
+
+
+def dolacz_nazwy_klubow(ranking: pd.DataFrame, clubs_file: str = CLUBS_FILE) -> pd.DataFrame:
+    """Skrot/Nazwa z kluby_wyciag.csv – tylko do czytania wyniku, nie wpływa na ranking."""
+    if not os.path.exists(clubs_file):
+        return ranking
+    kluby = pd.read_csv(clubs_file, usecols=["ID_wariantu_klubu", "Skrot", "Nazwa"])
+    kluby = kluby.drop_duplicates("ID_wariantu_klubu")
+    out = ranking.merge(kluby, left_on="Klub", right_on="ID_wariantu_klubu", how="left")
+    return out.drop(columns=["ID_wariantu_klubu"])
+
+
+# -------------------------------
+# Wejście
+# -------------------------------
+
+def wczytaj_wejscie(format: str = "csv", merge_dir: str = MERGE_DIR):
+    """(wynik_regat, regaty) z połączonych CSV albo z partycji Parquet."""
+    if format == "parquet":
+        wynik_regat = columnar.wczytaj_tabele("wynikRegat", columns=["regaty", "ID_wariantu_klubu", "miejsceWRegatach"])
+        regaty = columnar.wczytaj_tabele("regaty", columns=["ID_Regat", "Rok", "Liga_Poziom"])
+        return wynik_regat, regaty
+
+    wynik_regat = schemat.wczytaj_csv(os.path.join(merge_dir, "all_wynikRegat.csv"), "wynikRegat",
+                                      usecols=["regaty", "ID_wariantu_klubu", "miejsceWRegatach"])
+    regaty = schemat.wczytaj_csv(os.path.join(merge_dir, "all_regaty.csv"), "regaty",
+                                 usecols=["ID_Regat", "Rok", "Liga_Poziom"])
+    return wynik_regat, regaty
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Ranking sezonu dla wszystkich lat i lig z wyników regat.")
+    ap.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                    help="połączone CSV z merge_outputs.py albo partycje Parquet z main.py")
+    ap.add_argument("--punktacja", choices=sorted(PUNKTACJE), default="19-miejsce")
+    ap.add_argument("--rok", type=int, nargs="+", help="pokaż tylko wybrane lata")
+    ap.add_argument("--liga", nargs="+", help="pokaż tylko wybrane ligi (Liga_Poziom)")
+    ap.add_argument("--out", default=os.path.join(OUT_DIR, "ranking_sezonow.csv"))
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    wynik_regat, regaty = wczytaj_wejscie(args.format)
+    if args.rok:
+        regaty = regaty[regaty["Rok"].isin(args.rok)]
+    if args.liga:
+        regaty = regaty[regaty["Liga_Poziom"].isin(args.liga)]
+
+    start = time.perf_counter()
+    ranking = ranking_sezonow(wynik_regat, regaty, punktacja=PUNKTACJE[args.punktacja])
+    czas_ms = (time.perf_counter() - start) * 1000
+
+    ranking = dolacz_nazwy_klubow(ranking)
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    ranking.to_csv(args.out, index=False)
+
+    sezony = ranking[KLUCZ_SEZONU].drop_duplicates().shape[0]
+    print(f"✅ Ranking: {sezony} sezonów (Rok × Liga), {len(ranking)} klubów w {czas_ms:.1f} ms")
+    print(f"Zapisano: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
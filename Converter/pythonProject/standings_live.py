@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+standings_live.py – przyrostowy ranking na żywo: wyścig po wyścigu, bez przeliczania historii
+
+Stan w pamięci trzyma bieżące sumy dla każdego wariantu klubu:
+✔ na regaty: miejsca w każdym wyścigu -> Suma_Przefinalem, finał, Miejsce_Koncowe
+  (GOLD/SILVER jak final_ranking.ranking_z_finalem),
+✔ na sezon (Rok × Liga_Poziom): miejsca w regatach -> PunktySezon, best1..best4,
+  MiejsceWSezonie (jak standings.ranking_sezonow).
+zastosuj_wyscig() dokłada jeden wyścig jako deltę: przeliczane są tylko te regaty
+i ten sezon (praca rzędu liczby klubów, nie historii), a zwracane są tylko wiersze
+rankingu, które się zmieniły. pelne_przeliczenie() liczy to samo od zera
+(final_ranking + standings) – sprawdz() porównuje oba wyniki.
+
+Regaty, które dostały deltę wyścigu, klasyfikowane są z wyścigów (jak main.py
+--wynik-z-wyscigow); pozostałe zachowują miejsca z all_wynikRegat.csv (kolumna M-sce).
+zastosuj_runde(wynik) przyjmuje wynik main.przetworz_plik_rundy – z M-sce bierze
+miejsca regat wprost, bez M-sce rozbija rundę na delty zmienionych wyścigów.
+"""
+
+import argparse
+import math
+import os
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+import final_ranking
+import schemat
+import standings
+
+KOLUMNY_REGAT = ["ID_Regat", "Klub", "Miejsce_Koncowe"]
+
+
+@dataclass
+class Zmiany:
+    regaty: pd.DataFrame       # KOLUMNY_REGAT – kluby, którym zmieniło się miejsce w regatach
+    sezon: pd.DataFrame        # kolumny standings.ranking_sezonow – zmienione wiersze rankingu
+
+    def __bool__(self) -> bool:
+        return not (self.regaty.empty and self.sezon.empty)
+
+
+def klasyfikacja_regat(wyscigi) -> dict:
+    """
+    [(finalowy, {klub: miejsce}), ...] -> {klub: Miejsce_Koncowe}; te same reguły
+    co final_ranking.ranking_z_finalem, na słownikach jednej regaty.
+    """
+    przed, final = {}, {}
+    for finalowy, miejsca in wyscigi:
+        for klub, miejsce in miejsca.items():
+            if finalowy:
+                final[klub] = min(final.get(klub, miejsce), miejsce)
+            else:
+                przed[klub] = przed.get(klub, 0) + miejsce
+
+    kolejnosc = sorted(przed, key=lambda k: (przed[k], k))
+    half = (len(kolejnosc) + 1) // 2
+    po_finale = lambda k: (przed[k] + final.get(k, 0), k)
+
+    wynik = {}
+    for i, klub in enumerate(sorted(kolejnosc[:half], key=po_finale), 1):
+        wynik[klub] = i
+    for i, klub in enumerate(sorted(kolejnosc[half:], key=po_finale), 1):
+        wynik[klub] = half + i
+    return wynik
+
+
+class StanRankingu:
+
+    def __init__(self, wynik_regat: pd.DataFrame, regaty: pd.DataFrame,
+                 miejsca: pd.DataFrame = None, wyscigi: pd.DataFrame = None,
+                 punktacja=standings.PUNKTACJE["19-miejsce"], tie_break: int = standings.TIE_BREAK,
+                 klub: str = "ID_wariantu_klubu"):
+        """
+        wynik_regat/regaty – jak standings.ranking_sezonow (all_wynikRegat, all_regaty),
+        miejsca/wyscigi – jak final_ranking.ranking_z_finalem (all_miejsca, all_wyscigi).
+        Jedyne pełne przejście po historii jest tutaj.
+        """
+        self.punktacja = punktacja
+        self.tie_break = tie_break
+        self.klub = klub
+
+        self._sezon_regat = {}        # ID_Regat -> (Rok, Liga_Poziom)
+        self._wyscigi = {}            # ID_wyscigu -> (ID_Regat, finalowy, {klub: miejsce})
+        self._wyscigi_regat = {}      # ID_Regat -> {ID_wyscigu}
+        self._z_wyscigow = set()      # regaty klasyfikowane z wyścigów (po delcie)
+        self._miejsca_regat = {}      # ID_Regat -> {klub: [miejsceWRegatach]}
+        self._sezony = {}             # (Rok, Liga_Poziom) -> {ID_Regat}
+        self._tabele = {}             # (Rok, Liga_Poziom) -> {klub: wiersz rankingu}
+
+        for id_regat, rok, liga in zip(regaty["ID_Regat"], regaty["Rok"], regaty["Liga_Poziom"]):
+            self.dodaj_regaty(id_regat, rok, liga)
+
+        for id_regat, k, miejsce in zip(wynik_regat["regaty"], wynik_regat[klub], wynik_regat["miejsceWRegatach"]):
+            self._miejsca_regat.setdefault(int(id_regat), {}).setdefault(int(k), []).append(miejsce)
+
+        if miejsca is not None and wyscigi is not None and not wyscigi.empty:
+            finalowe = pd.to_numeric(wyscigi["Numer_wyscigu"], errors="coerce").fillna(0) == 0
+            for id_wys, id_regat, finalowy in zip(wyscigi["ID_wyscigu"], wyscigi["ID_Regat"], finalowe):
+                self._ustaw_wyscig(int(id_wys), int(id_regat), bool(finalowy), {})
+            m = miejsca.dropna(subset=["Zajete_miejsce"])
+            m = m[m["ID_wyscigu"].isin(self._wyscigi)]
+            uniq = m.groupby(["ID_wyscigu", klub], sort=False)["Zajete_miejsce"].min()
+            for (id_wys, k), miejsce in uniq.items():
+                self._wyscigi[int(id_wys)][2][int(k)] = float(miejsce)
+
+        for sezon in self._sezony:
+            self._tabele[sezon] = self._tabela_sezonu(sezon)
+
+    # -------------------------------
+    # Delty
+    # -------------------------------
+
+    def dodaj_regaty(self, id_regat: int, rok: int, liga: str) -> None:
+        """Rejestruje regaty w sezonie (nowa runda na żywo nie ma jeszcze wiersza w all_regaty)."""
+        id_regat, sezon = int(id_regat), (int(rok), str(liga))
+        stary = self._sezon_regat.get(id_regat)
+        if stary is not None and stary != sezon:
+            self._sezony[stary].discard(id_regat)
+        self._sezon_regat[id_regat] = sezon
+        self._sezony.setdefault(sezon, set()).add(id_regat)
+
+    def _ustaw_wyscig(self, id_wyscigu: int, id_regat: int, finalowy: bool, miejsca: dict) -> None:
+        self._wyscigi[id_wyscigu] = (id_regat, finalowy, miejsca)
+        self._wyscigi_regat.setdefault(id_regat, set()).add(id_wyscigu)
+
+    def _usun_wyscig(self, id_wyscigu: int) -> None:
+        id_regat, _, _ = self._wyscigi.pop(id_wyscigu)
+        self._wyscigi_regat[id_regat].discard(id_wyscigu)
+
+    def zastosuj_wyscig(self, id_regat: int, id_wyscigu: int, numer_wyscigu: int, miejsca: dict) -> Zmiany:
+        """
+        Jeden wyścig (nowy albo poprawiony): {klub: Zajete_miejsce}. Numer_wyscigu 0 = finał.
+        Regaty muszą być znane (all_regaty albo dodaj_regaty).
+        """
+        id_regat = int(id_regat)
+        if id_regat not in self._sezon_regat:
+            raise KeyError(f"Nieznane regaty {id_regat} – najpierw dodaj_regaty(id, rok, liga)")
+        miejsca = {int(k): float(m) for k, m in miejsca.items() if not pd.isna(m)}
+        self._ustaw_wyscig(int(id_wyscigu), id_regat, int(numer_wyscigu) == 0, miejsca)
+        return self._odswiez_z_wyscigow(id_regat)
+
+    def usun_wyscig(self, id_regat: int, id_wyscigu: int) -> Zmiany:
+        """Wycofanie wyścigu (np. kolumna zniknęła z pliku rundy)."""
+        self._usun_wyscig(int(id_wyscigu))
+        return self._odswiez_z_wyscigow(int(id_regat))
+
+    def usun_regaty(self, id_regat: int) -> Zmiany:
+        """Regaty znikają z rankingu (plik rundy usunięty)."""
+        id_regat = int(id_regat)
+        if id_regat not in self._sezon_regat:
+            return Zmiany(pd.DataFrame(columns=KOLUMNY_REGAT), self._ramka([]))
+        for id_wys in list(self._wyscigi_regat.pop(id_regat, ())):
+            del self._wyscigi[id_wys]
+        self._z_wyscigow.discard(id_regat)
+        zmiany = self._odswiez(id_regat, {})
+        self._miejsca_regat.pop(id_regat)
+        self._sezony[self._sezon_regat.pop(id_regat)].discard(id_regat)
+        return zmiany
+
+    def zastosuj_runde(self, wynik: dict) -> Zmiany:
+        """
+        Wynik main.przetworz_plik_rundy. Z _wynikRegat (M-sce) – miejsca regat wprost;
+        bez niego – delty tylko tych wyścigów, które są nowe, zmienione albo zniknęły.
+        """
+        r = wynik["regaty"].iloc[0]
+        id_regat = int(r["ID_Regat"])
+        self.dodaj_regaty(id_regat, r["Rok"], r["Liga_Poziom"])
+
+        # plik bez kolumn wyścigów -> puste ramki bez kolumn
+        wyscigi = wynik["wyscigi"].reindex(columns=["ID_wyscigu", "Numer_wyscigu"])
+        miejsca = wynik["miejsca"].reindex(columns=["ID_wyscigu", self.klub, "Zajete_miejsce"])
+        miejsca = miejsca.dropna(subset=["Zajete_miejsce"])
+        uniq = miejsca.groupby(["ID_wyscigu", self.klub], sort=False)["Zajete_miejsce"].min()
+        nowe = {int(w): {} for w in wyscigi["ID_wyscigu"]}
+        for (id_wys, k), miejsce in uniq.items():
+            nowe[int(id_wys)][int(k)] = float(miejsce)
+
+        for id_wys in self._wyscigi_regat.get(id_regat, set()) - set(nowe):
+            self._usun_wyscig(id_wys)
+        for id_wys, numer in zip(wyscigi["ID_wyscigu"], wyscigi["Numer_wyscigu"]):
+            stary = self._wyscigi.get(int(id_wys))
+            if stary is None or stary[2] != nowe[int(id_wys)]:
+                self._ustaw_wyscig(int(id_wys), id_regat, int(numer) == 0, nowe[int(id_wys)])
+
+        if wynik.get("wynikRegat") is None:
+            return self._odswiez_z_wyscigow(id_regat)
+
+        self._z_wyscigow.discard(id_regat)
+        w = wynik["wynikRegat"]
+        miejsca_regat = {}
+        for k, miejsce in zip(w[self.klub], w["miejsceWRegatach"]):
+            miejsca_regat.setdefault(int(k), []).append(miejsce)
+        return self._odswiez(id_regat, miejsca_regat)
+
+    # -------------------------------
+    # Przeliczenie jednej regaty i jej sezonu
+    # -------------------------------
+
+    def _odswiez_z_wyscigow(self, id_regat: int) -> Zmiany:
+        self._z_wyscigow.add(id_regat)
+        wyscigi = [self._wyscigi[w][1:] for w in self._wyscigi_regat.get(id_regat, ())]
+        miejsca = {k: [m] for k, m in klasyfikacja_regat(wyscigi).items()}
+        return self._odswiez(id_regat, miejsca)
+
+    def _odswiez(self, id_regat: int, miejsca_regat: dict) -> Zmiany:
+        stare = self._miejsca_regat.get(id_regat, {})
+        self._miejsca_regat[id_regat] = miejsca_regat
+        zmienione_regaty = [
+            (id_regat, k, m[0]) for k, m in sorted(miejsca_regat.items()) if stare.get(k) != m
+        ]
+        zmienione_regaty += [(id_regat, k, None) for k in sorted(set(stare) - set(miejsca_regat))]
+
+        sezon = self._sezon_regat[id_regat]
+        stara_tabela = self._tabele.get(sezon, {})
+        tabela = self._tabela_sezonu(sezon)
+        self._tabele[sezon] = tabela
+
+        wiersze = [(k, w) for k, w in tabela.items() if stara_tabela.get(k) != w]
+        wiersze += [(k, None) for k in set(stara_tabela) - set(tabela)]
+        wiersze.sort(key=lambda kw: (kw[1] is None, kw[1][-1] if kw[1] else 0, kw[0]))
+        return Zmiany(
+            regaty=pd.DataFrame(zmienione_regaty, columns=KOLUMNY_REGAT),
+            sezon=self._ramka([(sezon, k, w) for k, w in wiersze]),
+        )
+
+    def _tabela_sezonu(self, sezon) -> dict:
+        """{klub: (PunktySezon, best1..bestN, MiejsceWSezonie)} – jedno sortowanie klubów sezonu."""
+        pary = [
+            (k, m)
+            for id_regat in self._sezony.get(sezon, ())
+            for k, miejsca in self._miejsca_regat.get(id_regat, {}).items()
+            for m in miejsca
+        ]
+        if not pary:
+            return {}
+        punkty = self.punktacja(pd.Series([m for _, m in pary], dtype="float64")).tolist()
+
+        kluby = {}
+        for (k, m), p in zip(pary, punkty):
+            suma, miejsca = kluby.setdefault(k, [0, []])
+            kluby[k][0] = suma + p
+            miejsca.append(m)
+
+        wiersze = {}
+        for k, (suma, miejsca) in kluby.items():
+            best = sorted(miejsca, key=lambda m: (math.isnan(m), m))[:self.tie_break]
+            best = [None if math.isnan(m) else m for m in best]
+            wiersze[k] = (int(suma), *(best + [None] * (self.tie_break - len(best))))
+
+        # ORDER BY PunktySezon DESC, best1..bestN ASC (NULL najpierw), Klub ASC
+        klucz = lambda k: (-wiersze[k][0], *[(0, 0) if b is None else (1, b) for b in wiersze[k][1:]], k)
+        return {k: wiersze[k] + (i,) for i, k in enumerate(sorted(wiersze, key=klucz), 1)}
+
+    # -------------------------------
+    # Odczyt i weryfikacja
+    # -------------------------------
+
+    def _ramka(self, wiersze) -> pd.DataFrame:
+        best_cols = [f"best{i}" for i in range(1, self.tie_break + 1)]
+        kolumny = standings.KLUCZ_SEZONU + ["Klub", "PunktySezon"] + best_cols + ["MiejsceWSezonie"]
+        puste = (None,) * (self.tie_break + 2)
+        df = pd.DataFrame(
+            [(rok, liga, k, *(w if w is not None else puste)) for (rok, liga), k, w in wiersze],
+            columns=kolumny,
+        )
+        for col in ["PunktySezon", "MiejsceWSezonie"] + best_cols:
+            df[col] = df[col].astype("Int64")
+        return df
+
+    def ranking(self) -> pd.DataFrame:
+        """Cały ranking z bieżącego stanu, w układzie standings.ranking_sezonow."""
+        wiersze = [
+            (sezon, k, w)
+            for sezon in sorted(self._tabele)
+            for k, w in sorted(self._tabele[sezon].items(), key=lambda kw: kw[1][-1])
+        ]
+        return self._ramka(wiersze)
+
+    def pelne_przeliczenie(self) -> pd.DataFrame:
+        """To samo co ranking(), ale od zera: final_ranking dla regat z wyścigów + standings."""
+        zapisane = [
+            (id_regat, k, m)
+            for id_regat, miejsca in self._miejsca_regat.items() if id_regat not in self._z_wyscigow
+            for k, lista in miejsca.items() for m in lista
+        ]
+        wynik_regat = [pd.DataFrame(zapisane, columns=["regaty", self.klub, "miejsceWRegatach"])]
+
+        wyscigi = [(w, r, 0 if f else 1) for w, (r, f, _) in self._wyscigi.items() if r in self._z_wyscigow]
+        if wyscigi:
+            miejsca = pd.DataFrame(
+                [(w, k, m) for w, _, _ in wyscigi for k, m in self._wyscigi[w][2].items()],
+                columns=["ID_wyscigu", self.klub, "Zajete_miejsce"],
+            )
+            ranking = final_ranking.ranking_z_finalem(
+                miejsca, pd.DataFrame(wyscigi, columns=["ID_wyscigu", "ID_Regat", "Numer_wyscigu"]), klub=self.klub)
+            if not ranking.empty:
+                wynik_regat.append(final_ranking.wynik_regat_z_rankingu(ranking))
+
+        regaty = pd.DataFrame(
+            [(id_regat, rok, liga) for id_regat, (rok, liga) in self._sezon_regat.items()],
+            columns=["ID_Regat", "Rok", "Liga_Poziom"],
+        )
+        wynik = standings.ranking_sezonow(pd.concat(wynik_regat, ignore_index=True), regaty,
+                                          punktacja=self.punktacja, klub=self.klub, tie_break=self.tie_break)
+        for col in ["PunktySezon", "MiejsceWSezonie"]:
+            wynik[col] = wynik[col].astype("Int64")
+        return wynik
+
+    def sprawdz(self) -> bool:
+        """ranking() == pelne_przeliczenie() (wartości, kolejność wierszy)."""
+        a = self.ranking().astype(str).reset_index(drop=True)
+        b = self.pelne_przeliczenie().astype(str).reset_index(drop=True)
+        return a.equals(b)
+
+
+def wczytaj(merge_dir: str = standings.MERGE_DIR, **kwargs) -> StanRankingu:
+    """Stan z połączonych tabel merge_outputs.py (all_wynikRegat, all_regaty, all_miejsca, all_wyscigi)."""
+    czytaj = lambda tabela, kolumny: schemat.wczytaj_csv(
+        os.path.join(merge_dir, f"all_{tabela}.csv"), tabela, usecols=kolumny)
+    return StanRankingu(
+        czytaj("wynikRegat", ["regaty", "ID_wariantu_klubu", "miejsceWRegatach"]),
+        czytaj("regaty", ["ID_Regat", "Rok", "Liga_Poziom"]),
+        czytaj("miejsca", ["ID_wyscigu", "ID_wariantu_klubu", "Zajete_miejsce"]),
+        czytaj("wyscigi", ["ID_wyscigu", "ID_Regat", "Numer_wyscigu"]),
+        **kwargs,
+    )
+
+
+# -------------------------------
+# MAIN – odtworzenie regat wyścig po wyścigu z weryfikacją
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(
+        description="Weryfikacja rankingu na żywo: regaty odtwarzane wyścig po wyścigu vs pełne przeliczenie.")
+    ap.add_argument("--merge-dir", default=standings.MERGE_DIR)
+    ap.add_argument("--regaty", type=int, default=3,
+                    help="ile ostatnich regat (po Rok, ID) odtworzyć od zera (domyślnie 3)")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    stan = wczytaj(args.merge_dir)
+    print(f"📚 Stan rankingu: {len(stan._sezony)} sezonów, {len(stan._wyscigi)} wyścigów "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    start = time.perf_counter()
+    stan.pelne_przeliczenie()
+    pelne_ms = (time.perf_counter() - start) * 1000
+
+    ostatnie = sorted(stan._wyscigi_regat, key=lambda r: (stan._sezon_regat.get(r, (0, ""))[0], r))
+    delty, czas, bledy = 0, 0.0, 0
+    for id_regat in ostatnie[-args.regaty:]:
+        wyscigi = sorted(stan._wyscigi_regat[id_regat],
+                         key=lambda w: (stan._wyscigi[w][1], w))     # finał na końcu
+        zapis = [(w, stan._wyscigi[w]) for w in wyscigi]
+        for w in wyscigi:
+            stan._usun_wyscig(w)
+
+        for w, (_, finalowy, miejsca) in zapis:
+            start = time.perf_counter()
+            zmiany = stan.zastosuj_wyscig(id_regat, w, 0 if finalowy else 1, miejsca)
+            czas += time.perf_counter() - start
+            delty += 1
+            if not stan.sprawdz():
+                bledy += 1
+                print(f"❌ Regaty {id_regat:08d}, wyścig {w:08d}: ranking różni się od pełnego przeliczenia")
+        print(f"✔ Regaty {id_regat:08d}: {len(zapis)} wyścigów, ostatnia delta zmieniła "
+              f"{len(zmiany.sezon)} wierszy rankingu")
+
+    if not delty:
+        print("⚠ Brak regat z wyścigami do odtworzenia")
+        return
+    print(f"📊 Delta: {czas / delty * 1000:.2f} ms na wyścig, pełne przeliczenie: {pelne_ms:.1f} ms")
+    if bledy:
+        print(f"❌ {bledy} z {delty} delt niezgodnych z pełnym przeliczeniem")
+    else:
+        print(f"✅ Wszystkie {delty} delt zgodne z pełnym przeliczeniem")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+synthetic_data.py – generator sztucznych danych w układzie ./mnt/data (do benchmark.py)
+
+Pliki rund wyglądają jak prawdziwe eksporty wyników:
+    Regaty/<rok>/<liga>/Runda N/"<rok> <Liga> - <Miasto>.csv"
+    M-sce, Skrót, Klub, R1..Rn, [FNL], Σ
+✔ w każdym wyścigu płynie tylko część drużyn – reszta ma pustą komórkę,
+✔ kary jako "10 (OCS)" / "7 (DNF)" (liczba + znacznik), Σ i M-sce liczone z punktów,
+✔ do tego pasujące dane wejściowe pozostałych skryptów: Kluby_tablica.csv,
+  zawodnicy.csv, lista zawodników (Ekstraklasa 2024), PLZ_uczestnicy_2025.xlsx
+  i ankieta z ID_Regat liczonym tak samo jak w main.py.
+Objętość: lata × ligi × rundy × drużyny × wyścigi; skala N mnoży liczbę rund.
+Ten sam seed = te same pliki.
+"""
+
+import argparse
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from id_registry import generate_numeric_id_int
+from source_catalog import liga_z_folderu
+
+# 1x ≈ prawdziwe dane: 88 plików rund, ~16 tys. komórek miejsc
+LATA = tuple(range(2015, 2026))
+LIGI = ("Ekstraklasa", "1Liga")
+RUNDY = 4
+DRUZYNY = 12
+WYSCIGI = 15
+LODZIE = 6                  # drużyn w jednym wyścigu
+ZAWODNICY_NA_KLUB = 6
+FINAL = 0.1                 # odsetek rund z kolumną FNL
+KARY = 0.02                 # odsetek startów z karą
+ANKIETA = 0.3               # odsetek (zawodnik, regaty) zgłoszonych w ankiecie
+
+ZNACZNIKI_KAR = ("OCS", "DNF", "DNS", "DNC", "DSQ", "SCP")
+MIASTA = ("Sopot", "Gdynia", "Szczecin", "Nowy Sztynort", "Puck", "Giżycko",
+          "Wolin", "Gdańsk", "Poznań", "Warszawa", "Kraków", "Wrocław")
+PRZEDROSTKI = ("Yacht Club", "JK", "KS", "UKS", "AZS", "KW", "Klub Żeglarski", "Sport Club")
+IMIONA = ("Anna", "Piotr", "Katarzyna", "Tomasz", "Marta", "Michał", "Agnieszka", "Paweł",
+          "Magdalena", "Krzysztof", "Joanna", "Jakub", "Ewa", "Bartosz", "Zofia", "Łukasz")
+NAZWISKA = ("Nowak", "Kowalski", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski",
+            "Zieliński", "Szymański", "Woźniak", "Dąbrowski", "Kozłowski", "Jankowski", "Mazur",
+            "Kwiatkowski", "Krawczyk", "Piotrowski", "Grabowski", "Nowakowski", "Pawłowski")
+
+# pliki wejściowe innych skryptów (stałe ROK/LIGA w tworzenie_wystepowania_*)
+ROK_LISTY, LIGA_LISTY = 2024, "Ekstraklasa"
+ROK_XLSX = 2025
+
+
+def parametry_skali(skala: int = 1, **zmiany) -> dict:
+    """Parametry generuj() dla skali N (N razy więcej rund); zmiany nadpisują domyślne."""
+    param = {
+        "lata": LATA, "ligi": LIGI, "rundy": RUNDY * skala, "druzyny": DRUZYNY,
+        "wyscigi": WYSCIGI, "lodzie": LODZIE, "zawodnicy_na_klub": ZAWODNICY_NA_KLUB,
+        "final": FINAL, "kary": KARY, "ankieta": ANKIETA, "seed": 0,
+    }
+    param.update({k: v for k, v in zmiany.items() if v is not None})
+    return param
+
+
+# -------------------------------
+# Kluby i zawodnicy
+# -------------------------------
+
+def _kluby(rng, ligi, na_lige: int) -> dict:
+    """liga -> lista (Skrót, Nazwa); każda liga ma własną pulę klubów."""
+    n = len(ligi) * na_lige
+    litery = np.array(list("ABCDEFGHIJKLMNOPRSTUWYZ"))
+    skroty = []
+    widziane = set()
+    while len(skroty) < n:
+        s = "".join(rng.choice(litery, 3))
+        if s not in widziane:
+            widziane.add(s)
+            skroty.append(s)
+
+    kluby = [(s, f"{PRZEDROSTKI[i % len(PRZEDROSTKI)]} {MIASTA[(i // len(PRZEDROSTKI)) % len(MIASTA)]} {s}")
+             for i, s in enumerate(skroty)]
+    return {liga: kluby[i * na_lige:(i + 1) * na_lige] for i, liga in enumerate(ligi)}
+
+
+def _zawodnicy(rng, kluby: dict, na_klub: int) -> dict:
+    """Skrót -> lista (Imie, Nazwisko); nazwiska unikalne w całym zbiorze."""
+    wynik = {}
+    nr = 0
+    for lista in kluby.values():
+        for skrot, _ in lista:
+            sklad = []
+            for _ in range(na_klub):
+                imie = IMIONA[int(rng.integers(len(IMIONA)))]
+                nazwisko = NAZWISKA[nr % len(NAZWISKA)]
+                if nr >= len(NAZWISKA):
+                    nazwisko += f"-{NAZWISKA[(nr // len(NAZWISKA)) % len(NAZWISKA)]}{nr // len(NAZWISKA) ** 2 or ''}"
+                sklad.append((imie, nazwisko))
+                nr += 1
+            wynik[skrot] = sklad
+    return wynik
+
+
+# -------------------------------
+# Plik rundy
+# -------------------------------
+
+def _wiersze_rundy(rng, druzyny: list, wyscigi: int, lodzie: int, final: bool, kary: float) -> list:
+    """Wiersze pliku rundy (bez nagłówka), posortowane po M-sce."""
+    n = len(druzyny)
+    lodzie = min(lodzie, n)
+    komorki = [[""] * wyscigi for _ in range(n)]
+    punkty = np.zeros(n, dtype=np.int64)
+
+    for w in range(wyscigi):
+        plyna = rng.permutation(n)[:lodzie]         # kolejność = miejsca 1..lodzie
+        kara = rng.random(lodzie) < kary
+        for miejsce, (d, k) in enumerate(zip(plyna, kara), start=1):
+            if k:
+                pkt = lodzie + 1
+                komorki[d][w] = f"{pkt} ({ZNACZNIKI_KAR[int(rng.integers(len(ZNACZNIKI_KAR)))]})"
+            else:
+                pkt = miejsce
+                komorki[d][w] = str(miejsce)
+            punkty[d] += pkt
+
+    fnl = [""] * n
+    if final:
+        for miejsce, d in enumerate(rng.permutation(n), start=1):
+            fnl[d] = str(miejsce)
+            punkty[d] += miejsce
+
+    kolejnosc = np.argsort(punkty, kind="stable")
+    wiersze = []
+    for m, d in enumerate(kolejnosc, start=1):
+        skrot, nazwa = druzyny[d]
+        wiersze.append([m, f" {skrot}", nazwa, *komorki[d], *([fnl[d]] if final else []), int(punkty[d])])
+    return wiersze
+
+
+# -------------------------------
+# Generator
+# -------------------------------
+
+def generuj(katalog: str, lata=LATA, ligi=LIGI, rundy: int = RUNDY, druzyny: int = DRUZYNY,
+            wyscigi: int = WYSCIGI, lodzie: int = LODZIE, zawodnicy_na_klub: int = ZAWODNICY_NA_KLUB,
+            final: float = FINAL, kary: float = KARY, ankieta: float = ANKIETA, seed: int = 0) -> dict:
+    """
+    Zapisuje <katalog>/mnt/data/{Regaty,kluby,zawodnicy,występowanie}.
+    Zwraca statystyki: pliki, wiersze, miejsca (komórki R1..Rn/FNL = wiersze _miejsca),
+    starty (niepuste komórki), zawodnicy, wystapienia_*.
+    """
+    rng = np.random.default_rng(seed)
+    data = os.path.join(katalog, "mnt", "data")
+    for folder in ("Regaty", "kluby", "zawodnicy", "występowanie"):
+        os.makedirs(os.path.join(data, folder), exist_ok=True)
+
+    pula = _kluby(rng, ligi, druzyny + 2)      # co rundę 2 kluby z puli nie startują
+    zawodnicy = _zawodnicy(rng, pula, zawodnicy_na_klub)
+    statystyki = {"pliki": 0, "wiersze": 0, "miejsca": 0, "starty": 0}
+    starty = []                                # (rok, liga, runda, skrót)
+
+    kolumny = [f"R{i}" for i in range(1, wyscigi + 1)]
+    for rok in lata:
+        for liga_folder in ligi:
+            liga = liga_z_folderu(liga_folder)
+            for runda in range(1, rundy + 1):
+                miasto = MIASTA[int(rng.integers(len(MIASTA)))]
+                folder = os.path.join(data, "Regaty", str(rok), liga_folder, f"Runda {runda}")
+                os.makedirs(folder, exist_ok=True)
+
+                wybrane = sorted(rng.choice(len(pula[liga_folder]), druzyny, replace=False))
+                ekipy = [pula[liga_folder][i] for i in wybrane]
+                z_finalem = rng.random() < final
+                wiersze = _wiersze_rundy(rng, ekipy, wyscigi, lodzie, z_finalem, kary)
+
+                with open(os.path.join(folder, f"{rok} {liga} - {miasto}.csv"), "w", newline="", encoding="utf-8") as f:
+                    w = csv.writer(f)
+                    w.writerow(["M-sce", "Skrót", "Klub", *kolumny, *(["FNL"] if z_finalem else []), "Σ"])
+                    w.writerows(wiersze)
+
+                statystyki["pliki"] += 1
+                statystyki["wiersze"] += len(wiersze)
+                statystyki["miejsca"] += len(wiersze) * (wyscigi + z_finalem)     # wiersze _miejsca z main.py
+                statystyki["starty"] += min(lodzie, druzyny) * wyscigi + (druzyny if z_finalem else 0)
+                starty.extend((rok, liga, runda, s) for s, _ in ekipy)
+
+    # Kluby_tablica.csv (zestawienie klubów dla kluby.py)
+    tablica = pd.DataFrame(
+        [(s, n) for lista in pula.values() for s, n in lista], columns=["Skrot", "Nazwa"]
+    )
+    tablica.insert(0, "ID_zestawienia_klubow", range(9000, 9000 + len(tablica)))
+    tablica.to_csv(os.path.join(data, "kluby", "Kluby_tablica.csv"), index=False)
+
+    # zawodnicy.csv
+    osoby = pd.DataFrame(
+        [(imie, nazwisko) for sklad in zawodnicy.values() for imie, nazwisko in sklad],
+        columns=["Imie", "Nazwisko"],
+    )
+    osoby.insert(0, "ID_Zawodnika", rng.choice(100_000_000, len(osoby), replace=False))
+    osoby.to_csv(os.path.join(data, "zawodnicy", "zawodnicy.csv"), index=False)
+    id_osoby = dict(zip(zip(osoby["Imie"], osoby["Nazwisko"]), osoby["ID_Zawodnika"]))
+
+    nazwy = {s: n for lista in pula.values() for s, n in lista}
+    lista, xlsx, ank = [], [], []
+    for rok, liga, runda, skrot in starty:
+        sklad = zawodnicy[skrot]
+        if rok == ROK_LISTY and liga == LIGA_LISTY:
+            lista.extend((f"{imie} {nazwisko}", skrot, runda) for imie, nazwisko in sklad)
+        if rok == ROK_XLSX:
+            xlsx.extend((liga, runda, imie, nazwisko, f"{nazwy[skrot]} ({skrot})") for imie, nazwisko in sklad)
+        id_regat = generate_numeric_id_int("regaty", liga, rok=rok, runda=runda)
+        for imie, nazwisko in sklad:
+            if rng.random() < ankieta:
+                ank.append((id_osoby[(imie, nazwisko)], id_regat, skrot, liga, rok, runda, f"{imie} {nazwisko}"))
+
+    wyst = os.path.join(data, "występowanie")
+    pd.DataFrame(lista, columns=["Zawodnik", "Klub", "Runda"]).to_csv(
+        os.path.join(wyst, "Zawodnicy_Ekstraklsa_2024.csv"), index=False)
+
+    try:
+        pd.DataFrame(xlsx, columns=["Regaty", "Runda", "Imię", "Nazwisko", "Klub"]).to_excel(
+            os.path.join(wyst, "PLZ_uczestnicy_2025.xlsx"), index=False)
+    except ImportError:  # openpyxl jest opcjonalny – bez niego etap xlsx nie ma wejścia
+        print("⚠ Brak pakietu openpyxl – pomijam PLZ_uczestnicy_2025.xlsx")
+
+    ankieta_df = pd.DataFrame(ank, columns=["ID_Zawodnika", "ID_Regat", "Skrot", "Poziom_Ligi", "Rok", "Runda", "Zawodnik"])
+    ankieta_df.insert(0, "ID_wystepowania", rng.choice(100_000_000, len(ankieta_df), replace=False))
+    ankieta_df.insert(4, "WynikWRegatach", "")
+    ankieta_df.insert(8, "Regaty_wybrane", "")
+    ankieta_df.to_csv(os.path.join(wyst, "wystepowania_z_ankiety_completed.csv"), index=False, encoding="utf-8-sig")
+
+    statystyki.update({
+        "zawodnicy": len(osoby),
+        "wystapienia_lista": len(lista),
+        "wystapienia_xlsx": len(xlsx),
+        "wystapienia_ankieta": len(ankieta_df),
+    })
+    return statystyki
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Generator sztucznego drzewa ./mnt/data do testów wydajności.")
+    ap.add_argument("katalog", help="katalog roboczy (powstanie w nim mnt/data/...)")
+    ap.add_argument("--skala", type=int, default=1, help="N razy więcej rund niż w 1x (≈ prawdziwe dane)")
+    ap.add_argument("--lata", type=int, nargs="+")
+    ap.add_argument("--ligi", nargs="+", help="nazwy folderów lig, np. Ekstraklasa 1Liga 2Liga")
+    ap.add_argument("--rundy", type=int, help="rund na ligę i rok (nadpisuje --skala)")
+    ap.add_argument("--druzyny", type=int)
+    ap.add_argument("--wyscigi", type=int)
+    ap.add_argument("--lodzie", type=int, help="drużyn w jednym wyścigu")
+    ap.add_argument("--seed", type=int)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    param = parametry_skali(
+        args.skala, lata=args.lata, ligi=args.ligi, rundy=args.rundy, druzyny=args.druzyny,
+        wyscigi=args.wyscigi, lodzie=args.lodzie, seed=args.seed,
+    )
+    statystyki = generuj(args.katalog, **param)
+    print(f"✅ Wygenerowano {statystyki['pliki']} plików rund, {statystyki['miejsca']} miejsc, "
+          f"{statystyki['zawodnicy']} zawodników w {args.katalog}")
+
+
+if __name__ == "__main__":
+    main()
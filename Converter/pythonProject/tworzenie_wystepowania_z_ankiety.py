@@ -3,14 +3,18 @@
 tworzenie_wystepowania_z_ankiety.py – WERSJA Z MAPĄ KLUBÓW
 
 ✔ NIE liczy ID_wariantu_klubu z nazwy.
-✔ Bierze ID_wariantu_klubu z kluby_wyciag.csv po samym skrócie.
+✔ Bierze ID_wariantu_klubu z indeksu klubów (kluby_index.py) po samym skrócie.
 ✔ Pomija wiersze bez ID_Zawodnika.
 ✔ Dodaje kolumnę ID_wystepowania (pustą).
 """
 
 from pathlib import Path
+import argparse
 import pandas as pd
-import re
+
+import kluby_index
+import metrics
+import schemat
 
 BASE_DIR = Path("mnt/data")
 
@@ -26,48 +30,6 @@ OUT_MISSING = OUT_DIR / "wystepowania_z_ankiety_missing_kluby.csv"
 CLUBS_FILE = BASE_DIR / "kluby" / "kluby_wyciag.csv"
 
 
-def _norm_key(s: str) -> str:
-    """
-    Normalizacja skrótu klubu:
-    - trim
-    - redukcja wielu spacji
-    - usunięcie WSZYSTKICH spacji
-    - UPPER
-    """
-    if s is None:
-        return ""
-    base = str(s).strip()
-    base = re.sub(r"\s+", " ", base)
-    base = base.replace(" ", "")
-    return base.upper()
-
-
-def load_club_variant_map(path: Path) -> dict:
-    """
-    Ładuje mapę: znormalizowany skrót -> ID_wariantu_klubu
-    z pliku kluby_wyciag.csv (wygenerowanego przez kluby.py).
-    """
-    if not path.exists():
-        print(f"⚠ Nie znaleziono pliku z wariantami klubów: {path}")
-        return {}
-
-    df = pd.read_csv(path)
-    if "Skrot" not in df.columns or "ID_wariantu_klubu" not in df.columns:
-        print("⚠ kluby_wyciag.csv musi mieć kolumny: Skrot, ID_wariantu_klubu")
-        return {}
-
-    df["Skrot_norm"] = df["Skrot"].map(_norm_key)
-
-    club_map = {}
-    for _, r in df.iterrows():
-        key = r["Skrot_norm"]
-        if key not in club_map:
-            club_map[key] = int(r["ID_wariantu_klubu"])
-
-    print(f"📚 Załadowano mapę klubów: {len(club_map)} skrótów")
-    return club_map
-
-
 def load_input() -> pd.DataFrame:
     for path in IN_FILE_CANDIDATES:
         if path.exists():
@@ -79,7 +41,7 @@ def load_input() -> pd.DataFrame:
     )
 
 
-def prepare_for_db(df: pd.DataFrame, club_map: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+def prepare_for_db(df: pd.DataFrame, indeks: kluby_index.IndeksKlubow) -> tuple[pd.DataFrame, pd.DataFrame]:
     df = df.copy()
 
     required = ["ID_Zawodnika", "ID_Regat", "Skrot", "WynikWRegatach"]
@@ -87,22 +49,19 @@ def prepare_for_db(df: pd.DataFrame, club_map: dict) -> tuple[pd.DataFrame, pd.D
         if col not in df.columns:
             raise ValueError(f"Brakuje obowiązkowej kolumny: {col}")
 
-    df["ID_Zawodnika"] = pd.to_numeric(df["ID_Zawodnika"], errors="coerce").astype("Int64")
+    # ID_Zawodnika / ID_Regat -> UInt32, WynikWRegatach -> UInt16 (braki = <NA>)
+    df = schemat.typuj(df, "wystepowanie")
     before = len(df)
     df = df[df["ID_Zawodnika"].notna()]
     after = len(df)
     print(f"⚠ Usunięto {before - after} wierszy bez ID_Zawodnika")
 
-    df["ID_Regat"] = pd.to_numeric(df["ID_Regat"], errors="coerce").astype("Int64")
-    df["WynikWRegatach"] = pd.to_numeric(df["WynikWRegatach"], errors="coerce").astype("Int64")
-
     df["ID_wystepowania"] = pd.NA
 
     if "Trening" not in df.columns:
         df["Trening"] = pd.NA
 
-    df["Skrot_norm"] = df["Skrot"].map(_norm_key)
-    df["ID_wariantu_klubu"] = df["Skrot_norm"].map(club_map)
+    df["ID_wariantu_klubu"] = indeks.warianty(df["Skrot"])
 
     missing_df = df[df["ID_wariantu_klubu"].isna()][
         ["ID_Zawodnika", "ID_Regat", "Skrot"]
@@ -116,18 +75,33 @@ def prepare_for_db(df: pd.DataFrame, club_map: dict) -> tuple[pd.DataFrame, pd.D
         "WynikWRegatach",
         "Trening",
     ]
-    return df[cols], missing_df
+    return schemat.typuj(df[cols], "wystepowanie"), missing_df
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Występowania z ankiety (wystepowania_z_ankiety_completed.csv).")
+    metrics.dodaj_argumenty(ap)
+    return ap.parse_args(argv)
+
 
+def main(argv=None):
+    args = parse_args(argv)
+    metrics.wlacz_z_argumentow(args, "wystepowanie_ankieta")
 
-def main():
-    df = load_input()
+    with metrics.etap("wczytanie") as e:
+        df = load_input()
+        e.dodaj(wiersze_we=len(df), wiersze_wy=len(df))
     print(f"▶ Wczytano {len(df)} wierszy wejściowych.")
 
-    club_map = load_club_variant_map(CLUBS_FILE)
-    final_df, missing_df = prepare_for_db(df, club_map)
+    with metrics.etap("dopasowanie") as e:
+        indeks = kluby_index.wczytaj(wyciag_path=str(CLUBS_FILE))
+        final_df, missing_df = prepare_for_db(df, indeks)
+        e.dodaj(wiersze_we=len(df), wiersze_wy=len(final_df))
 
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    final_df.to_csv(OUT_FILE, index=False, encoding="utf-8-sig")
+    with metrics.etap("zapis") as e:
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
+        schemat.do_tekstu(final_df, "wystepowanie", zera=False).to_csv(OUT_FILE, index=False, encoding="utf-8-sig")
+        e.dodaj(wiersze_we=len(final_df), wiersze_wy=len(final_df))
     print(f"💾 Zapisano: {OUT_FILE} ({len(final_df)} rekordów)")
 
     if not missing_df.empty:
@@ -135,6 +109,7 @@ def main():
         print(f"⚠ Zapisano brakujące kluby do: {OUT_MISSING}")
 
     print("🎉 Gotowe – plik zgodny z tabelą liga_Wystepowanie_w_regatach.")
+    metrics.zakoncz_z_argumentow(args)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
 """
 tworzenie_wystepowania_z_xlsx.py / export_wystepowania_from_PLZ2025.py
-WERSJA: ID_Regat brane z plików _regaty.csv wygenerowanych przez main.py
+WERSJA: ID_Regat brane z indeksu regat zapisanego przez main.py (regaty_index.py)
 """
 
 import pandas as pd
-import hashlib
 import re
 import unicodedata
 from pathlib import Path
+import argparse
 import os
 
+import id_index
+import kluby_index
+import metrics
+import regaty_index
+import schemat
+import xlsx_ingest
+from id_registry import id_z_klucza, wlacz_indeks, zapisz_indeks
+
 # Wejścia / wyjścia
 SRC_PLZ2025 = Path("mnt/data/występowanie/PLZ_uczestnicy_2025.xlsx")
 OUT_DIR = Path("mnt/data/output/wystepowanie/xlsx")
@@ -31,63 +39,9 @@ def strip_accents_lower(s: str) -> str:
     return s.lower().strip()
 
 
-def _norm_key(s: str) -> str:
-    """Normalizacja skrótu klubu – tak samo jak w main.py / kluby.py."""
-    if s is None:
-        return ""
-    base = str(s).strip()
-    base = re.sub(r"\s+", " ", base)
-    base = base.replace(" ", "")
-    return base.upper()
-
-
-def load_club_variant_map(path: Path) -> dict:
-    """
-    Mapa: znormalizowany Skrot -> ID_wariantu_klubu
-    z pliku kluby_wyciag.csv (z kluby.py).
-    """
-    if not path.exists():
-        print(f"⚠ Nie znaleziono pliku z wariantami klubów: {path}")
-        return {}
-
-    df = pd.read_csv(path)
-    if "Skrot" not in df.columns or "ID_wariantu_klubu" not in df.columns:
-        print("⚠ kluby_wyciag.csv musi mieć kolumny: Skrot, ID_wariantu_klubu")
-        return {}
-
-    df["Skrot_norm"] = df["Skrot"].map(_norm_key)
-
-    club_map = {}
-    for _, r in df.iterrows():
-        key = r["Skrot_norm"]
-        if key not in club_map:
-            club_map[key] = int(r["ID_wariantu_klubu"])
-
-    print(f"📚 Załadowano mapę klubów: {len(club_map)} skrótów")
-    return club_map
-
-
 def generate_player_id_only_name(fullname: str) -> int:
     norm = strip_accents_lower(fullname)
-    base = f"zawodnik|name_norm={norm}"
-    h = hashlib.sha1(base.encode()).digest()
-    return int.from_bytes(h[:4], "big") % 100_000_000
-
-
-def extract_tag(klub_cell: str) -> str:
-    """
-    Wyciąga skrót klubu z komórki 'Klub', np. 'Sport Vita Ski&Sail (SPO)' -> 'SPO'.
-    Jeśli nie ma nawiasu, próbuje zgadnąć ostatni wielki token.
-    """
-    s = str(klub_cell or "").strip()
-    m = re.search(r"\(([^)]+)\)\s*$", s)
-    if m:
-        return m.group(1).strip()
-    tokens = re.split(r"[\s,/|-]+", s)
-    for tok in reversed(tokens):
-        if tok.isupper() and 2 <= len(tok) <= 4:
-            return tok
-    return s[:10].upper()
+    return id_z_klucza(f"zawodnik|name_norm={norm}")
 
 
 def liga_from_regaty_cell(cell: str) -> str:
@@ -109,145 +63,119 @@ def liga_from_regaty_cell(cell: str) -> str:
     return "Ekstraklasa"
 
 
-# -------------------------------
-# Mapa Regat z plików main.py
-# -------------------------------
-
-def load_regaty_map(regaty_dir: Path) -> pd.DataFrame:
-    """
-    Wczytuje wszystkie pliki *_regaty.csv z outputu main.py
-    i zwraca DataFrame z kolumnami:
-      ID_Regat, Liga_Poziom, Numer_Rundy, Rok
-    """
-    rows = []
-    if not regaty_dir.exists():
-        print(f"⚠ Katalog z regatami nie istnieje: {regaty_dir}")
-        return pd.DataFrame(columns=["ID_Regat", "Liga_Poziom", "Numer_Rundy", "Rok"])
-
-    for fname in os.listdir(regaty_dir):
-        if not fname.endswith("_regaty.csv"):
-            continue
-        path = regaty_dir / fname
-        try:
-            df = pd.read_csv(path)
-        except Exception as e:
-            print(f"⏭️ Pomijam {path}: {e}")
-            continue
-
-        required = {"ID_Regat", "Liga_Poziom", "Numer_Rundy", "Rok"}
-        if not required.issubset(df.columns):
-            print(f"⚠ Plik {path} nie ma wymaganych kolumn {required}, pomijam.")
-            continue
-
-        rows.append(df[["ID_Regat", "Liga_Poziom", "Numer_Rundy", "Rok"]])
-
-    if not rows:
-        print("⚠ Nie znaleziono żadnych plików *_regaty.csv.")
-        return pd.DataFrame(columns=["ID_Regat", "Liga_Poziom", "Numer_Rundy", "Rok"])
-
-    all_reg = pd.concat(rows, ignore_index=True)
-    # usuwamy duplikaty (gdyby coś się powtórzyło)
-    all_reg = all_reg.drop_duplicates(subset=["ID_Regat", "Liga_Poziom", "Numer_Rundy", "Rok"])
-    print(f"📚 Załadowano regaty: {len(all_reg)} rekordów z plików _regaty.csv")
-    return all_reg
-
-
 # -------------------------------
 # GŁÓWNY SKRYPT
 # -------------------------------
 
-def main():
+def utworz_wystepowania():
     print("🏁 Generuję występowania z PLZ_uczestnicy_2025.xlsx (ID_Regat z _regaty.csv)...")
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    club_map = load_club_variant_map(CLUBS_FILE)
-    regaty_df = load_regaty_map(MAIN_OUTPUT_REGATY_DIR)
+    # ID zawodników trafiają do globalnego indeksu ID, jeśli main.py --id-index go założył
+    if os.path.isfile(id_index.INDEKS_PATH):
+        wlacz_indeks(id_index.INDEKS_PATH)
 
-    if regaty_df.empty:
-        print("❌ Brak danych regat (pliki *_regaty.csv). Przerwij i odpal najpierw main.py.")
-        return
+    with metrics.etap("wczytanie") as e:
+        indeks_klubow = kluby_index.wczytaj(wyciag_path=str(CLUBS_FILE))
+        regaty_df = schemat.typuj(
+            regaty_index.wczytaj(regaty_dir=str(MAIN_OUTPUT_REGATY_DIR)).ramka(rok=2025), "regaty"
+        )
+
+        if regaty_df.empty:
+            print("❌ Brak danych regat (indeks regat main.py). Przerwij i odpal najpierw main.py.")
+            return
+        print(f"📚 Załadowano regaty: {len(regaty_df)} rekordów z indeksu regat")
+
+        missing_codes = set()
+
+        # strumieniowo + cache Parquet (xlsx_ingest) – plik rośnie przez cały sezon
+        ucz = xlsx_ingest.wczytaj_arkusz(str(SRC_PLZ2025))
+        ucz.columns = [c.strip().lower() for c in ucz.columns]
+
+        imie_col = "imię" if "imię" in ucz.columns else "imie"
+        nazw_col = "nazwisko"
+        runda_col = "runda"
+        klub_col = "klub"
+        regaty_col = "regaty"
+
+        # budujemy DataFrame wystąpień wejściowych
+        wyst = pd.DataFrame({
+            "Zawodnik": (ucz[imie_col].astype(str).str.strip() + " " +
+                         ucz[nazw_col].astype(str).str.strip()).str.replace(r"\s+", " ", regex=True),
+            "Skrot": ucz[klub_col].map(kluby_index.wyciagnij_skrot),
+            "rok": 2025,
+            "regaty": ucz[regaty_col].astype(str),
+            "numer_rundy": pd.to_numeric(ucz[runda_col], errors="coerce").astype("Int64"),
+            "poziom_ligi": ucz[regaty_col].apply(liga_from_regaty_cell),
+        }).dropna(subset=["Zawodnik", "Skrot", "numer_rundy"])
+        e.plik(SRC_PLZ2025, czas_s=None, wiersze_we=len(ucz), wiersze_wy=len(wyst))
+
+    with metrics.etap("dopasowanie") as e:
+        # dopasowujemy ID_Regat po (Rok, Numer_Rundy, Liga_Poziom)
+        merge_left = wyst.copy()
+        merge_left["Rok"] = merge_left["rok"].astype(int)
+        merge_left["Numer_Rundy"] = merge_left["numer_rundy"].astype(int)
+        merge_left["Liga_Poziom"] = merge_left["poziom_ligi"]
+
+        merged = merge_left.merge(
+            regaty_df,
+            on=["Rok", "Numer_Rundy", "Liga_Poziom"],
+            how="left",
+            suffixes=("", "_reg")
+        )
 
-    missing_codes = set()
-
-    ucz = pd.read_excel(SRC_PLZ2025)
-    ucz.columns = [c.strip().lower() for c in ucz.columns]
-
-    imie_col = "imię" if "imię" in ucz.columns else "imie"
-    nazw_col = "nazwisko"
-    runda_col = "runda"
-    klub_col = "klub"
-    regaty_col = "regaty"
-
-    # budujemy DataFrame wystąpień wejściowych
-    wyst = pd.DataFrame({
-        "Zawodnik": (ucz[imie_col].astype(str).str.strip() + " " +
-                     ucz[nazw_col].astype(str).str.strip()).str.replace(r"\s+", " ", regex=True),
-        "Skrot": ucz[klub_col].apply(extract_tag),
-        "rok": 2025,
-        "regaty": ucz[regaty_col].astype(str),
-        "numer_rundy": pd.to_numeric(ucz[runda_col], errors="coerce").astype("Int64"),
-        "poziom_ligi": ucz[regaty_col].apply(liga_from_regaty_cell),
-    }).dropna(subset=["Zawodnik", "Skrot", "numer_rundy"])
-
-    # dopasowujemy ID_Regat po (Rok, Numer_Rundy, Liga_Poziom)
-    merge_left = wyst.copy()
-    merge_left["Rok"] = merge_left["rok"].astype(int)
-    merge_left["Numer_Rundy"] = merge_left["numer_rundy"].astype(int)
-    merge_left["Liga_Poziom"] = merge_left["poziom_ligi"]
-
-    merged = merge_left.merge(
-        regaty_df,
-        on=["Rok", "Numer_Rundy", "Liga_Poziom"],
-        how="left",
-        suffixes=("", "_reg")
-    )
-
-    # jeśli nie znaleziono ID_Regat – logujemy to do osobnego pliku
-    missing_reg = merged[merged["ID_Regat"].isna()][
-        ["Zawodnik", "Skrot", "rok", "numer_rundy", "poziom_ligi", "regaty"]
-    ]
-
-    if not missing_reg.empty:
-        miss_path = OUT_DIR / "wystepowanie_all_brak_regat.csv"
-        missing_reg.to_csv(miss_path, index=False, encoding="utf-8-sig")
-        print(f"⚠ {len(missing_reg)} wierszy nie dopasowało ID_Regat – zapisano do: {miss_path}")
-        print("   Sprawdź, czy 'poziom_ligi' i 'numer_rundy' zgadzają się z danymi w _regaty.csv")
-
-    # rekordy z poprawnym ID_Regat
-    ok = merged[merged["ID_Regat"].notna()].copy()
-
-    # liczymy ID_Zawodnika i ID_wariantu_klubu
-    rows = []
-    for _, r in ok.iterrows():
-        full_name = str(r["Zawodnik"]).strip()
-        skrot_klubu = str(r["Skrot"]).strip()
-
-        id_zaw = generate_player_id_only_name(full_name)
-        id_regat = int(r["ID_Regat"])
-
-        id_wariantu = club_map.get(_norm_key(skrot_klubu))
-        if id_wariantu is None:
-            missing_codes.add(skrot_klubu)
-
-        rows.append({
-            "ID_wystepowania": "",
-            "ID_Zawodnika": id_zaw,
-            "ID_Regat": id_regat,
-            "ID_wariantu_klubu": id_wariantu,
-            "WynikWRegatach": "",
-            "Trening": "",
-        })
+        # jeśli nie znaleziono ID_Regat – logujemy to do osobnego pliku
+        missing_reg = merged[merged["ID_Regat"].isna()][
+            ["Zawodnik", "Skrot", "rok", "numer_rundy", "poziom_ligi", "regaty"]
+        ]
+
+        if not missing_reg.empty:
+            miss_path = OUT_DIR / "wystepowanie_all_brak_regat.csv"
+            missing_reg.to_csv(miss_path, index=False, encoding="utf-8-sig")
+            print(f"⚠ {len(missing_reg)} wierszy nie dopasowało ID_Regat – zapisano do: {miss_path}")
+            print("   Sprawdź, czy 'poziom_ligi' i 'numer_rundy' zgadzają się z danymi w _regaty.csv")
+
+        # rekordy z poprawnym ID_Regat
+        ok = merged[merged["ID_Regat"].notna()].copy()
+        ok["ID_wariantu_klubu"] = indeks_klubow.warianty(ok["Skrot"].astype(str))
+
+        # liczymy ID_Zawodnika i ID_wariantu_klubu
+        rows = []
+        for _, r in ok.iterrows():
+            full_name = str(r["Zawodnik"]).strip()
+            skrot_klubu = str(r["Skrot"]).strip()
+
+            id_zaw = generate_player_id_only_name(full_name)
+            id_regat = int(r["ID_Regat"])
+
+            id_wariantu = None if pd.isna(r["ID_wariantu_klubu"]) else int(r["ID_wariantu_klubu"])
+            if id_wariantu is None:
+                missing_codes.add(skrot_klubu)
+
+            rows.append({
+                "ID_wystepowania": "",
+                "ID_Zawodnika": id_zaw,
+                "ID_Regat": id_regat,
+                "ID_wariantu_klubu": id_wariantu,
+                "WynikWRegatach": "",
+                "Trening": "",
+            })
+
+        e.dodaj(wiersze_we=len(wyst), wiersze_wy=len(rows))
 
     if not rows:
         print("⚠ Po odfiltrowaniu braków nie ma wierszy do zapisania.")
         return
 
-    out_df = pd.DataFrame(rows)
-    out_path = OUT_DIR / "wystepowanie_all.csv"
-    out_df.to_csv(out_path, index=False, encoding="utf-8-sig")
+    with metrics.etap("zapis") as e:
+        out_df = schemat.typuj(pd.DataFrame(rows), "wystepowanie")
+        out_path = OUT_DIR / "wystepowanie_all.csv"
+        schemat.do_tekstu(out_df, "wystepowanie", zera=False).to_csv(out_path, index=False, encoding="utf-8-sig")
+        e.dodaj(wiersze_we=len(out_df), wiersze_wy=len(out_df))
 
     print(f"✅ Zapisano: {out_path} ({len(out_df)} rekordów)")
     print(out_df.head(15).to_string(index=False))
+    zapisz_indeks()
 
     if missing_codes:
         miss_codes_path = OUT_DIR / "wystepowanie_all_brak_wariantu_klubu.csv"
@@ -260,5 +188,20 @@ def main():
     print("🎉 Gotowe – ID_Regat są zgodne z danymi z main.py.")
 
 
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Występowania z PLZ_uczestnicy_2025.xlsx (ID_Regat z _regaty.csv).")
+    metrics.dodaj_argumenty(ap)
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    metrics.wlacz_z_argumentow(args, "wystepowanie_xlsx")
+    try:
+        utworz_wystepowania()
+    finally:
+        metrics.zakoncz_z_argumentow(args)
+
+
 if __name__ == "__main__":
     main()
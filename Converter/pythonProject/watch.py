@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+watch.py – tryb obserwacji na weekendy regatowe (wyniki prawie na żywo)
+
+Zamiast ręcznego main.py + merge_outputs.py po całej historii po każdych kilku wyścigach:
+✔ co --interwal sekund sprawdza (size, mtime) plików rund w Regaty/<rok>/<liga>/Runda N/
+  (i skoroszytów z --xlsx) – polling, bez dodatkowych pakietów,
+✔ debounce: plik jest brany dopiero, gdy przez --debounce sekund się nie zmienia
+  (edytor / eksport zapisuje go kilka razy pod rząd),
+✔ przelicza tylko zmienione rundy – ta sama konwersja i ten sam manifest co main.py --incremental,
+  więc przebiegi main.py --incremental i watch.py się uzupełniają,
+✔ połączone tabele merge/all_*.csv trzymane są w pamięci: wiersze przeliczonych rund
+  są podmieniane (po ID_Regat, dla miejsc po ID_wyscigu), a plik zapisywany
+  atomowo (tmp + os.replace) – czytelnik nigdy nie zobaczy połowy pliku,
+✔ --ranking: ranking sezonów liczony przyrostowo (standings_live.py) – tylko zmienione
+  wiersze trafiają do ranking/zmiany_na_zywo.csv, cały ranking do ranking/ranking_sezonow.csv.
+Podmienione rundy trafiają na koniec pliku – kolejność wierszy może się różnić
+od pełnego merge_outputs.py, zawartość nie.
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+import main as konwersja
+import merge_outputs
+import regaty_index
+import schemat
+import standings
+import standings_live
+from manifest import Manifest, plik_zrodla
+from source_catalog import Katalog
+
+MERGE_DIR = os.path.join(konwersja.output_dir, "merge")
+
+# tabela -> (plik połączony w MERGE_DIR, kolumna z ID_Regat / ID_wyscigu)
+SCALONE = {
+    "regaty": ("all_regaty.csv", "ID_Regat"),
+    "wyscigi": ("all_wyscigi.csv", "ID_Regat"),
+    "wynikRegat": ("all_wynikRegat.csv", "regaty"),
+    "miejsca": ("all_miejsca.csv", "ID_wyscigu"),
+}
+
+ZMIANY_RANKINGU = os.path.join(standings.OUT_DIR, "zmiany_na_zywo.csv")
+
+
+# -------------------------------
+# Obserwacja plików
+# -------------------------------
+
+def migawka(base_dir: str, xlsx_dir: str = None) -> dict:
+    """{ścieżka: (size, mtime_ns)} plików .csv rund i skoroszytów .xlsx."""
+    stan = {}
+    for katalog, rozszerzenie in ((base_dir, ".csv"), (xlsx_dir, ".xlsx")):
+        if not katalog or not os.path.isdir(katalog):
+            continue
+        for root, _, files in os.walk(katalog):
+            for f in files:
+                if not f.endswith(rozszerzenie) or f.startswith("~$"):
+                    continue
+                path = os.path.normpath(os.path.join(root, f))
+                try:
+                    st = os.stat(path)
+                except OSError:         # plik zniknął w trakcie przeglądania
+                    continue
+                stan[path] = (st.st_size, st.st_mtime_ns)
+    return stan
+
+
+class Obserwator:
+    """Zmiany między migawkami + debounce: gotowe() zwraca pliki, które się uspokoiły."""
+
+    def __init__(self, base_dir: str, xlsx_dir: str = None, debounce: float = 2.0):
+        self.base_dir = base_dir
+        self.xlsx_dir = xlsx_dir
+        self.debounce = debounce
+        self.stan = migawka(base_dir, xlsx_dir)
+        self.oczekujace = {}     # ścieżka -> czas ostatniej zauważonej zmiany
+
+    def sprawdz(self) -> None:
+        teraz = migawka(self.base_dir, self.xlsx_dir)
+        chwila = time.monotonic()
+        for path in set(teraz) | set(self.stan):
+            if teraz.get(path) != self.stan.get(path):
+                self.oczekujace[path] = chwila
+        self.stan = teraz
+
+    def gotowe(self) -> set:
+        chwila = time.monotonic()
+        pliki = {p for p, t in self.oczekujace.items() if chwila - t >= self.debounce}
+        for p in pliki:
+            del self.oczekujace[p]
+        return pliki
+
+
+# -------------------------------
+# Połączone tabele
+# -------------------------------
+
+def _wczytaj_nowe(tabela: str, path: str) -> pd.DataFrame:
+    """Plik rundy do doklejenia; pusty (runda bez kolumn wyścigów) -> None."""
+    try:
+        df = schemat.wczytaj_csv(path, tabela)
+    except pd.errors.EmptyDataError:
+        return None
+    if tabela == "wynikRegat":
+        df = merge_outputs._normalizuj_wynik_regat(df)
+    return df
+
+
+def _zapisz_atomowo(df: pd.DataFrame, path: str, tabela: str = None) -> None:
+    """tabela schematu – ID bez zer wiodących, tak samo jak merge_outputs."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    if tabela:
+        df = schemat.do_tekstu(df, tabela, zera=False)
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class ScaloneTabele:
+    """merge/all_*.csv w pamięci; podmien() wymienia wiersze rund i zapisuje pliki."""
+
+    def __init__(self, merge_dir: str = MERGE_DIR):
+        self.merge_dir = merge_dir
+        brak = [plik for plik, _ in SCALONE.values() if not os.path.isfile(os.path.join(merge_dir, plik))]
+        if brak:
+            print(f"ℹ Brak połączonych tabel {brak} – jednorazowe pełne łączenie")
+            self._pelne_laczenie()
+
+        self.ramki = {}
+        for tabela, (plik, _) in SCALONE.items():
+            path = os.path.join(merge_dir, plik)
+            self.ramki[tabela] = schemat.wczytaj_csv(path, tabela) if os.path.isfile(path) else pd.DataFrame()
+        print(f"📚 Połączone tabele w pamięci: "
+              + ", ".join(f"{t} {len(df)}" for t, df in self.ramki.items()))
+
+    def _pelne_laczenie(self) -> None:
+        katalog = os.path.relpath(self.merge_dir, merge_outputs.output_dir)
+        merge_outputs.merge_csv_files("*_wyscigi.csv", os.path.join(katalog, "all_wyscigi.csv"), "ID_wyscigu",
+                                      tabela="wyscigi")
+        merge_outputs.merge_csv_files("*_regaty.csv", os.path.join(katalog, "all_regaty.csv"), "ID_Regat",
+                                      tabela="regaty")
+        merge_outputs.merge_csv_files("*_miejsca.csv", os.path.join(katalog, "all_miejsca.csv"),
+                                      tabela="miejsca")
+        merge_outputs.merge_wynik_regat(os.path.join(katalog, "all_wynikRegat.csv"))
+
+    def _id_wyscigow(self, id_regat: set) -> set:
+        df = self.ramki["wyscigi"]
+        if df.empty or "ID_wyscigu" not in df.columns:
+            return set()
+        return set(df.loc[df["ID_Regat"].isin(id_regat), "ID_wyscigu"].tolist())
+
+    def podmien(self, id_regat: set, nowe_pliki: dict) -> None:
+        """
+        Usuwa wiersze regat id_regat (stare i nowe wersje rund) i dokleja
+        świeże pliki rund: nowe_pliki = {tabela: [ścieżki *_<tabela>.csv]}.
+        """
+        nowe = {t: [_wczytaj_nowe(t, p) for p in nowe_pliki.get(t, [])] for t in SCALONE}
+        nowe = {t: [df for df in ramki if df is not None] for t, ramki in nowe.items()}
+
+        # miejsca nie mają ID_Regat – usuwamy je po wyścigach starej i nowej wersji rund
+        id_wyscigow = self._id_wyscigow(id_regat)
+        for df in nowe["wyscigi"]:
+            id_wyscigow.update(df["ID_wyscigu"].tolist())
+        klucze = {"regaty": id_regat, "wyscigi": id_regat, "wynikRegat": id_regat, "miejsca": id_wyscigow}
+
+        for tabela, (plik, kolumna) in SCALONE.items():
+            df = self.ramki[tabela]
+            if kolumna in df.columns:
+                df = df[~df[kolumna].isin(klucze[tabela])]
+            df = pd.concat([df] + nowe[tabela], ignore_index=True) if nowe[tabela] else df
+            self.ramki[tabela] = df
+            _zapisz_atomowo(df, os.path.join(self.merge_dir, plik), tabela)
+
+
+# -------------------------------
+# Przeliczanie zmienionych rund
+# -------------------------------
+
+class Konwerter:
+    """Konwersja zmienionych rund jak main.py --incremental, manifest i indeks regat w pamięci."""
+
+    def __init__(self, args, scalone: ScaloneTabele):
+        self.args = args
+        self.scalone = scalone
+        self.manifest = Manifest(os.path.join(konwersja.output_dir, konwersja.MANIFEST_FILE),
+                                 generator=konwersja.generator_manifestu(args.format, args.wynik_z_wyscigow))
+        self.indeks_regat = regaty_index.wczytaj(regaty_index.INDEKS_PATH, konwersja.output_dir)
+
+        self.ranking = None
+        if args.ranking:
+            r = scalone.ramki
+            self.ranking = standings_live.StanRankingu(r["wynikRegat"], r["regaty"], r["miejsca"], r["wyscigi"])
+
+    def przetworz(self, zmienione: set = None) -> int:
+        """
+        Przelicza rundy z plików `zmienione` (None = wszystkie zmienione od ostatniego
+        przebiegu wg manifestu) i aktualizuje połączone tabele. Zwraca liczbę rund.
+        """
+        start = time.perf_counter()
+        katalog = Katalog(konwersja.base_dir, xlsx_dir=self.args.xlsx)
+        zadania = konwersja.znajdz_pliki_rund(katalog)
+        for zadanie in zadania:
+            zadanie["wynik_z_wyscigow"] = self.args.wynik_z_wyscigow
+
+        id_regat = set()
+        stare_wyniki = []        # dawne wyniki przeliczonych / znikniętych źródeł
+        stare_regaty = set()     # i ich ID_Regat – kandydaci do usunięcia z indeksu regat
+        nowe_pliki = {t: [] for t in SCALONE}
+        zmiany = []
+        rundy = 0
+        for zadanie in zadania:
+            src = zadanie["input_file"]
+            if zmienione is not None and os.path.normpath(plik_zrodla(src)) not in zmienione:
+                continue
+            bez_zmian, info = self.manifest.sprawdz(src)
+            if bez_zmian:
+                continue
+
+            stare = self.manifest.wyniki(src)
+            stare_id = regaty_index.id_regat_z_wynikow(stare)
+            wynik = konwersja.przetworz_plik_rundy(zadanie, katalog)
+            zapisane = konwersja.zapisz_wynik_rundy(wynik, self.args.format)
+            if zapisane is None:
+                continue
+
+            self.manifest.zapisz_wpis(src, info, zapisane)
+            self.indeks_regat.dodaj_ramke(wynik["regaty"])
+            stare_wyniki += stare
+            stare_regaty |= stare_id
+            id_regat |= stare_id | set(wynik["regaty"]["ID_Regat"].tolist())
+            if self.ranking is not None:
+                zmiany.append(self.ranking.zastosuj_runde(wynik))
+            for tabela in SCALONE:
+                nowe_pliki[tabela] += [p for p in zapisane if p.endswith(f"_{tabela}.csv")]
+            rundy += 1
+
+        # źródła, które zniknęły: ich wiersze też wypadają z połączonych tabel
+        obecne = [z["input_file"] for z in zadania]
+        for src in set(self.manifest.zrodla) - set(obecne):
+            stare = self.manifest.wyniki(src)
+            usuniete = regaty_index.id_regat_z_wynikow(stare)
+            stare_wyniki += stare
+            stare_regaty |= usuniete
+            id_regat |= usuniete
+            if self.ranking is not None:
+                zmiany += [self.ranking.usun_regaty(i) for i in usuniete]
+        for src in self.manifest.usun_nieaktualne(obecne):
+            print(f"🗑️ Źródło zniknęło: {src}")
+            rundy += 1
+
+        if not rundy:
+            return 0
+
+        self.manifest.zapisz()
+        regaty_index.usun_nieaktualne(self.indeks_regat, stare_regaty, stare_wyniki)
+        if self.indeks_regat.zmieniony:
+            self.indeks_regat.zapisz()
+        self.scalone.podmien(id_regat, nowe_pliki)
+        if self.ranking is not None:
+            self._zapisz_ranking(zmiany)
+        print(f"🔄 Zaktualizowano {rundy} rund(y) i połączone tabele w {time.perf_counter() - start:.2f} s")
+        return rundy
+
+    def _zapisz_ranking(self, zmiany: list) -> None:
+        """Zmienione wiersze -> dopisane do ZMIANY_RANKINGU, cały ranking -> ranking_sezonow.csv."""
+        sezon = [z.sezon for z in zmiany if not z.sezon.empty]
+        if sezon:
+            df = standings.dolacz_nazwy_klubow(pd.concat(sezon, ignore_index=True))
+            df.insert(0, "Czas", time.strftime("%Y-%m-%d %H:%M:%S"))
+            os.makedirs(os.path.dirname(ZMIANY_RANKINGU), exist_ok=True)
+            df.to_csv(ZMIANY_RANKINGU, mode="a", index=False, header=not os.path.isfile(ZMIANY_RANKINGU))
+        print(f"🏆 Ranking: {sum(len(s) for s in sezon)} zmienionych wierszy")
+
+        ranking = standings.dolacz_nazwy_klubow(self.ranking.ranking())
+        _zapisz_atomowo(ranking, os.path.join(standings.OUT_DIR, "ranking_sezonow.csv"))
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Obserwacja plików rund: przeliczanie zmienionych rund i merge na bieżąco.")
+    ap.add_argument("--interwal", type=float, default=1.0,
+                    help="co ile sekund sprawdzać pliki (domyślnie 1)")
+    ap.add_argument("--debounce", type=float, default=2.0,
+                    help="ile sekund plik musi być niezmieniony, zanim go przeliczymy (domyślnie 2)")
+    ap.add_argument("--format", choices=["csv", "oba"], default="csv",
+                    help="format wyjścia main.py; połączone tabele powstają z plików CSV")
+    ap.add_argument("--xlsx", nargs="?", const=konwersja.xlsx_dir, default=None,
+                    help=f"obserwuj też skoroszyty wyników PLŻ (domyślnie {konwersja.xlsx_dir})")
+    ap.add_argument("--wynik-z-wyscigow", action="store_true",
+                    help="jak w main.py: _wynikRegat z wyścigów, gdy plik nie ma kolumny M-sce")
+    ap.add_argument("--ranking", action="store_true",
+                    help="utrzymuj ranking sezonów przyrostowo (standings_live.py) i zapisuj zmienione wiersze")
+    ap.add_argument("--raz", action="store_true",
+                    help="tylko nadrób zmiany od ostatniego przebiegu i zakończ")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(konwersja.output_dir, exist_ok=True)
+
+    scalone = ScaloneTabele()
+    konwerter = Konwerter(args, scalone)
+
+    # zmiany, które zaszły, gdy watch.py nie działał
+    konwerter.przetworz()
+    if args.raz:
+        return
+
+    obserwator = Obserwator(konwersja.base_dir, args.xlsx, args.debounce)
+    print(f"👀 Obserwuję {konwersja.base_dir}" + (f" i {args.xlsx}" if args.xlsx else "")
+          + f" (co {args.interwal:g} s, debounce {args.debounce:g} s) – Ctrl+C kończy")
+    try:
+        while True:
+            time.sleep(args.interwal)
+            obserwator.sprawdz()
+            gotowe = obserwator.gotowe()
+            if gotowe:
+                for path in sorted(gotowe):
+                    print(f"📝 Zmiana: {path}")
+                konwerter.przetworz(gotowe)
+    except KeyboardInterrupt:
+        print("⏹ Koniec obserwacji")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+xlsx_ingest.py – strumieniowe wczytywanie skoroszytów .xlsx z cache kolumnowym
+
+✔ openpyxl w trybie read_only (wiersz po wierszu, bez budowania całego skoroszytu w pamięci),
+✔ arkusze parsowane równolegle w puli procesów (workers > 1),
+✔ sparsowane arkusze trafiają do cache jako typowany Parquet, kluczem jest SHA1
+  skoroszytu – niezmieniony plik nie jest parsowany drugi raz:
+    ./mnt/data/output/xlsx_cache/<sha1>/arkusze.json + <nr arkusza>.parquet
+✔ typy kolumn jak z pd.read_csv: same liczby całkowite -> int64, liczby z brakami
+  -> float64, kolumny mieszane -> tekst ("8 (SCP)" obok 5 daje "5").
+
+Arkusz wyników PLŻ ma nad tabelą opis ("RUNDA: Sopot (1)", "SEZON: 2022",
+"POZIOM: EKSTRAKLASA") – trafia on do `meta`, a tabela zaczyna się od pierwszego
+wiersza z co najmniej trzema komórkami, wszystkimi tekstowymi (nagłówek).
+Puste wiersze w tabeli są pomijane (jak przy pd.read_excel, tylko bez wierszy
+NaN); do_pustego=True (arkusze wyników PLŻ) – tabela kończy się na pierwszym
+pustym wierszu, pod nią bywają notatki.
+
+openpyxl i pyarrow są opcjonalne: bez openpyxl nie czytamy .xlsx wcale,
+bez pyarrow czytamy bez cache.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import columnar
+from manifest import SEPARATOR_ARKUSZA, sha1_pliku
+
+try:
+    import openpyxl
+except ImportError:  # .xlsx jest opcjonalny
+    openpyxl = None
+
+CACHE_DIR = "./mnt/data/output/xlsx_cache"
+# podbijamy przy każdej zmianie parsowania – stary cache przestaje pasować
+WERSJA_PARSERA = 2
+
+_sha1 = {}          # (path, size, mtime_ns) -> sha1 – skoroszyt hashujemy raz na proces
+_ostrzezono = False
+
+
+def dostepny() -> bool:
+    return openpyxl is not None
+
+
+def _wymagaj_openpyxl():
+    if openpyxl is None:
+        raise RuntimeError("Pliki .xlsx wymagają pakietu openpyxl (pip install openpyxl).")
+
+
+def sciezka_arkusza(path: str, arkusz: str) -> str:
+    """'plik.xlsx' + 'Sopot' -> 'plik.xlsx::Sopot' (ścieżka źródła dla main.py / manifestu)."""
+    return f"{path}{SEPARATOR_ARKUSZA}{arkusz}"
+
+
+def rozdziel_sciezke(zrodlo: str):
+    """'plik.xlsx::Sopot' -> ('plik.xlsx', 'Sopot'); zwykła ścieżka -> (ścieżka, None)."""
+    path, sep, arkusz = zrodlo.partition(SEPARATOR_ARKUSZA)
+    return path, (arkusz if sep else None)
+
+
+# -------------------------------
+# Parsowanie
+# -------------------------------
+
+def _liczba(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _tekst(v) -> str:
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _typuj_kolumne(wartosci: list) -> pd.Series:
+    """Typ kolumny jak po pd.read_csv (patrz opis modułu)."""
+    niepuste = [v for v in wartosci if v is not None]
+    if not niepuste:
+        return pd.Series([float("nan")] * len(wartosci), dtype="float64")
+
+    if all(_liczba(v) for v in niepuste):
+        if len(niepuste) == len(wartosci) and all(float(v).is_integer() for v in niepuste):
+            return pd.Series([int(v) for v in wartosci], dtype="int64")
+        return pd.Series([float("nan") if v is None else float(v) for v in wartosci], dtype="float64")
+
+    if all(isinstance(v, (datetime.datetime, datetime.date)) for v in niepuste):
+        return pd.Series(pd.to_datetime(wartosci))
+
+    return pd.Series([None if v is None else _tekst(v) for v in wartosci], dtype=object)
+
+
+def _naglowek(wiersz: tuple) -> bool:
+    niepuste = [v for v in wiersz if v is not None and str(v).strip()]
+    return len(niepuste) >= 3 and all(isinstance(v, str) for v in niepuste)
+
+
+def parsuj_arkusz(path: str, arkusz: str, do_pustego: bool = False):
+    """
+    Czyta jeden arkusz strumieniowo. Zwraca (meta, DataFrame): meta to teksty
+    nad nagłówkiem. Puste wiersze tabeli są pomijane; do_pustego=True – tabela
+    kończy się na pierwszym pustym wierszu.
+    """
+    _wymagaj_openpyxl()
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        meta, kolumny, wiersze = [], None, []
+        for wiersz in wb[arkusz].iter_rows(values_only=True):
+            if kolumny is None:
+                if _naglowek(wiersz):
+                    n = max(i for i, v in enumerate(wiersz) if v is not None) + 1
+                    kolumny = [str(v).strip() if v is not None else f"Unnamed: {i}"
+                               for i, v in enumerate(wiersz[:n])]
+                else:
+                    meta += [v.strip() for v in wiersz if isinstance(v, str) and v.strip()]
+                continue
+
+            if all(v is None for v in wiersz[:len(kolumny)]):
+                if do_pustego:
+                    break
+                continue
+            wiersz = tuple(wiersz[:len(kolumny)])
+            wiersze.append(wiersz + (None,) * (len(kolumny) - len(wiersz)))
+    finally:
+        wb.close()
+
+    if kolumny is None:
+        return meta, pd.DataFrame()
+
+    df = pd.DataFrame({
+        nazwa: _typuj_kolumne([w[i] for w in wiersze]) for i, nazwa in enumerate(kolumny)
+    })
+    return meta, df
+
+
+def _parsuj_w_puli(zadanie):
+    path, arkusz, do_pustego = zadanie
+    return parsuj_arkusz(path, arkusz, do_pustego)
+
+
+# -------------------------------
+# Cache
+# -------------------------------
+
+def sha1_skoroszytu(path: str) -> str:
+    st = os.stat(path)
+    klucz = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if klucz not in _sha1:
+        _sha1[klucz] = sha1_pliku(path)
+    return _sha1[klucz]
+
+
+def _katalog_cache(path: str, do_pustego: bool = False) -> str:
+    """Osobny cache dla każdego trybu parsowania (tabela do pustego wiersza / cała)."""
+    return os.path.join(CACHE_DIR, sha1_skoroszytu(path) + ("_do_pustego" if do_pustego else ""))
+
+
+def _wczytaj_spis(katalog: str):
+    """Spis arkuszy z cache albo None, jeśli cache nie ma / jest niepełny / z innej wersji."""
+    try:
+        with open(os.path.join(katalog, "arkusze.json"), encoding="utf-8") as f:
+            spis = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if spis.get("wersja") != WERSJA_PARSERA:
+        return None
+    if not all(os.path.isfile(os.path.join(katalog, a["plik"])) for a in spis["arkusze"]):
+        return None
+    return spis
+
+
+def _zapisz_cache(katalog: str, arkusze: list) -> None:
+    """Zapis do katalogu tymczasowego i os.replace – równoległy proces nie zobaczy połowy cache."""
+    tmp = f"{katalog}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    spis = {"wersja": WERSJA_PARSERA, "arkusze": []}
+    for i, (nazwa, meta, df) in enumerate(arkusze):
+        plik = f"{i}.parquet"
+        df.to_parquet(os.path.join(tmp, plik), index=False)
+        spis["arkusze"].append({"nazwa": nazwa, "meta": meta, "plik": plik, "wiersze": len(df)})
+    with open(os.path.join(tmp, "arkusze.json"), "w", encoding="utf-8") as f:
+        json.dump(spis, f, ensure_ascii=False, indent=1)
+    try:
+        os.replace(tmp, katalog)
+    except OSError:             # inny proces zdążył pierwszy (albo stary, niepełny cache)
+        shutil.rmtree(katalog, ignore_errors=True)
+        try:
+            os.replace(tmp, katalog)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _cache_wlaczony() -> bool:
+    global _ostrzezono
+    if not columnar.dostepny():
+        if not _ostrzezono:
+            print("⚠ Brak pyarrow – skoroszyty .xlsx będą parsowane bez cache.")
+            _ostrzezono = True
+        return False
+    return True
+
+
+def wczytaj_skoroszyt(path: str, workers: int = 1, do_pustego: bool = False) -> list:
+    """
+    Wszystkie arkusze skoroszytu: lista (nazwa, meta, DataFrame) w kolejności arkuszy.
+    Z cache, jeśli skoroszyt się nie zmienił; inaczej parsowanie (równoległe
+    dla workers > 1) i zapis cache. do_pustego – zob. parsuj_arkusz.
+    """
+    _wymagaj_openpyxl()
+    z_cache = _cache_wlaczony()
+    katalog = _katalog_cache(path, do_pustego) if z_cache else None
+
+    spis = _wczytaj_spis(katalog) if z_cache else None
+    if spis is not None:
+        return [
+            (a["nazwa"], a["meta"], pd.read_parquet(os.path.join(katalog, a["plik"])))
+            for a in spis["arkusze"]
+        ]
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+    nazwy = wb.sheetnames
+    wb.close()
+
+    zadania = [(path, nazwa, do_pustego) for nazwa in nazwy]
+    if workers > 1 and len(zadania) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(zadania))) as pool:
+            wyniki = list(pool.map(_parsuj_w_puli, zadania))
+    else:
+        wyniki = [_parsuj_w_puli(z) for z in zadania]
+
+    arkusze = [(nazwa, meta, df) for nazwa, (meta, df) in zip(nazwy, wyniki)]
+    if z_cache:
+        _zapisz_cache(katalog, arkusze)
+    return arkusze
+
+
+def wczytaj_arkusz(path: str, arkusz=0, do_pustego: bool = False) -> pd.DataFrame:
+    """
+    Jeden arkusz (nazwa albo numer) jako DataFrame – zamiennik pd.read_excel(path)
+    z cache. Nieznany arkusz -> KeyError.
+    """
+    spis = _wczytaj_spis(_katalog_cache(path, do_pustego)) if _cache_wlaczony() else None
+    if spis is not None:
+        for i, a in enumerate(spis["arkusze"]):
+            if a["nazwa"] == arkusz or i == arkusz:
+                return pd.read_parquet(os.path.join(_katalog_cache(path, do_pustego), a["plik"]))
+
+    arkusze = wczytaj_skoroszyt(path, do_pustego=do_pustego)
+    if isinstance(arkusz, int):
+        return arkusze[arkusz][2]
+    for nazwa, _, df in arkusze:
+        if nazwa == arkusz:
+            return df
+    raise KeyError(f"Brak arkusza '{arkusz}' w {path}")
+
+
+def wczytaj_zrodlo(zrodlo: str) -> pd.DataFrame:
+    """
+    Plik źródłowy rundy: 'plik.xlsx::Arkusz' (arkusz wyników PLŻ – do pustego
+    wiersza) z cache, każdy inny przez pd.read_csv.
+    """
+    path, arkusz = rozdziel_sciezke(zrodlo)
+    if arkusz is None:
+        return pd.read_csv(path)
+    return wczytaj_arkusz(path, arkusz, do_pustego=True)
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Wczytanie skoroszytów .xlsx do cache (Parquet).")
+    ap.add_argument("sciezki", nargs="+", help="pliki .xlsx albo katalogi (przeszukiwane rekurencyjnie)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="procesów do parsowania arkuszy; 0 = liczba rdzeni")
+    ap.add_argument("--do-pustego", action="store_true",
+                    help="tabela kończy się na pierwszym pustym wierszu (arkusze wyników PLŻ, jak main.py --xlsx)")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    _wymagaj_openpyxl()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    pliki = []
+    for sciezka in args.sciezki:
+        if os.path.isdir(sciezka):
+            for root, _, files in os.walk(sciezka):
+                pliki += [os.path.join(root, f) for f in sorted(files)
+                          if f.endswith(".xlsx") and not f.startswith("~$")]
+        else:
+            pliki.append(sciezka)
+
+    for path in sorted(pliki):
+        start = time.perf_counter()
+        arkusze = wczytaj_skoroszyt(path, workers, args.do_pustego)
+        wiersze = sum(len(df) for _, _, df in arkusze)
+        print(f"✅ {path}: {len(arkusze)} arkuszy, {wiersze} wierszy ({time.perf_counter() - start:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+zapytania.py – zapytania analityczne PLŻ lokalnie, bez serwera MySQL
+
+Połączone wyjścia konwertera ładowane są do SQLite w pamięci ze schematem
+i indeksami z init_updated.sql (db_loader.schemat_sqlite / db_loader.zaladuj):
+✔ zapytania z ZapytaniaSQL.sql, X_Przykładowe zapytania/ (srednie_wynikow,
+  wygraneKlubow), ranking sezonu i ranking z finałem – przepisane na obecny
+  schemat (klub = ID_wariantu_klubu, Skrot z liga_KlubWariant),
+✔ dowolne zapytanie: --sql "SELECT ..." albo --plik zapytanie.sql,
+✔ ładowane są tylko tabele, których zapytanie używa (raz na uruchomienie),
+✔ CEIL/CEILING z MySQL dorejestrowane jako funkcje SQLite,
+✔ cache wyników: klucz = SHA1 zapytania, parametrów i plików wejściowych –
+  przy niezmienionych CSV wynik czytany jest z cache bez ładowania bazy.
+
+Przykłady:
+    python zapytania.py --lista
+    python zapytania.py wygrane_klubow -p rok=2021
+    python zapytania.py ranking_sezonu -p rok=2021 -p liga=Ekstraklasa --out ranking.csv
+    python zapytania.py --sql "SELECT Liga_Poziom, COUNT(*) FROM liga_Regaty GROUP BY 1"
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import db_loader
+from manifest import sha1_pliku
+
+CACHE_DIR = "./mnt/data/output/zapytania/cache"
+
+
+@dataclass(frozen=True)
+class Zapytanie:
+    nazwa: str
+    opis: str
+    sql: str
+    parametry: dict = field(default_factory=dict)   # :nazwa -> wartość domyślna (None = bez filtra)
+    wymagane: tuple = ()
+
+
+ZAPYTANIA = {z.nazwa: z for z in (
+    Zapytanie(
+        "wygrane_klubow",
+        "Top kluby wg liczby wygranych wyścigów (wygraneKlubow)",
+        """
+        SELECT k.Skrot AS Klub, COUNT(*) AS LiczbaWygranychWyscigow
+        FROM liga_Miejsca m
+        JOIN liga_KlubWariant k ON k.ID_wariantu_klubu = m.ID_wariantu_klubu
+        JOIN liga_Wyscigi w     ON w.ID_wyscigu = m.ID_wyscigu
+        JOIN liga_Regaty r      ON r.ID_Regat = w.ID_Regat
+        WHERE m.Zajete_miejsce = 1
+          AND (:rok IS NULL OR r.Rok = :rok)
+        GROUP BY k.Skrot
+        ORDER BY LiczbaWygranychWyscigow DESC, Klub
+        LIMIT :limit
+        """,
+        {"rok": None, "limit": 10},
+    ),
+    Zapytanie(
+        "wygrane_klubow_ligi",
+        "Top kluby wg wygranych wyścigów w każdej lidze + liczba wyścigów ligi (wygraneKlubow)",
+        """
+        WITH WygraneKluby AS (
+            SELECT r.Liga_Poziom, k.Skrot AS Klub, COUNT(*) AS LiczbaWygranychWyscigow
+            FROM liga_Miejsca m
+            JOIN liga_KlubWariant k ON k.ID_wariantu_klubu = m.ID_wariantu_klubu
+            JOIN liga_Wyscigi w     ON w.ID_wyscigu = m.ID_wyscigu
+            JOIN liga_Regaty r      ON r.ID_Regat = w.ID_Regat
+            WHERE m.Zajete_miejsce = 1
+              AND (:rok IS NULL OR r.Rok = :rok)
+            GROUP BY r.Liga_Poziom, k.Skrot
+        ),
+        Ranking AS (
+            SELECT Liga_Poziom, Klub, LiczbaWygranychWyscigow,
+                   ROW_NUMBER() OVER (PARTITION BY Liga_Poziom
+                                      ORDER BY LiczbaWygranychWyscigow DESC, Klub) AS rn
+            FROM WygraneKluby
+        ),
+        WyscigiLigi AS (
+            SELECT r.Liga_Poziom, COUNT(DISTINCT w.ID_wyscigu) AS LiczbaWyscigowWLidze
+            FROM liga_Wyscigi w
+            JOIN liga_Regaty r ON r.ID_Regat = w.ID_Regat
+            WHERE (:rok IS NULL OR r.Rok = :rok)
+            GROUP BY r.Liga_Poziom
+        )
+        SELECT rk.Liga_Poziom, rk.Klub, rk.LiczbaWygranychWyscigow, wl.LiczbaWyscigowWLidze
+        FROM Ranking rk
+        JOIN WyscigiLigi wl ON wl.Liga_Poziom = rk.Liga_Poziom
+        WHERE rk.rn <= :limit
+        ORDER BY rk.Liga_Poziom, rk.LiczbaWygranychWyscigow DESC, rk.Klub
+        """,
+        {"rok": None, "limit": 10},
+    ),
+    Zapytanie(
+        "srednie_wynikow",
+        "Zawodnicy z najlepszym średnim miejscem klubu w regatach (srednie_wynikow)",
+        """
+        SELECT z.ID_Zawodnika, z.Imie, z.Nazwisko,
+               COUNT(DISTINCT w.ID_Regat)  AS LiczbaRegat,
+               AVG(wrm.miejsceWRegatach)   AS SrednieMiejsce
+        FROM liga_Wystepowanie_w_regatach w
+        JOIN liga_Zawodnik z          ON z.ID_Zawodnika = w.ID_Zawodnika
+        JOIN liga_WynikRegatManual wrm ON wrm.regaty = w.ID_Regat
+                                      AND wrm.ID_wariantu_klubu = w.ID_wariantu_klubu
+        JOIN liga_Regaty r            ON r.ID_Regat = w.ID_Regat
+        WHERE (:rok IS NULL OR r.Rok = :rok)
+        GROUP BY z.ID_Zawodnika, z.Imie, z.Nazwisko
+        HAVING COUNT(DISTINCT w.ID_Regat) >= :min_regat
+        ORDER BY SrednieMiejsce ASC, z.ID_Zawodnika
+        LIMIT :limit
+        """,
+        {"rok": None, "min_regat": 2, "limit": 10},
+    ),
+    Zapytanie(
+        "regaty_zawodnika",
+        "Regaty zawodnika z miejscem jego klubu (srednie_wynikow – 'pokazanie')",
+        """
+        SELECT r.ID_Regat, r.Nazwa, r.Miasto, r.Numer_Rundy, r.Rok,
+               wrm.miejsceWRegatach AS Miejsce
+        FROM liga_Wystepowanie_w_regatach w
+        JOIN liga_Regaty r             ON r.ID_Regat = w.ID_Regat
+        JOIN liga_WynikRegatManual wrm ON wrm.regaty = w.ID_Regat
+                                      AND wrm.ID_wariantu_klubu = w.ID_wariantu_klubu
+        WHERE w.ID_Zawodnika = :zawodnik
+        ORDER BY r.Rok DESC, r.Numer_Rundy ASC
+        """,
+        {"zawodnik": None},
+        wymagane=("zawodnik",),
+    ),
+    Zapytanie(
+        "ranking_sezonu",
+        "Ranking sezonu: punkty 19-miejsce, tie-break best1..best4 (wyniki z sezonu sql dobry)",
+        """
+        WITH WynikiRundy AS (
+            SELECT r.Rok, r.Liga_Poziom, m.ID_wariantu_klubu AS Klub, m.miejsceWRegatach,
+                   CASE WHEN m.miejsceWRegatach BETWEEN 1 AND 18
+                        THEN (19 - m.miejsceWRegatach) ELSE 0 END AS Punkty
+            FROM liga_WynikRegatManual m
+            JOIN liga_Regaty r ON r.ID_Regat = m.regaty
+            WHERE (:rok IS NULL OR r.Rok = :rok)
+              AND (:liga IS NULL OR r.Liga_Poziom = :liga)
+        ),
+        MiejscaPosortowane AS (
+            SELECT Rok, Liga_Poziom, Klub, miejsceWRegatach,
+                   ROW_NUMBER() OVER (PARTITION BY Rok, Liga_Poziom, Klub
+                                      ORDER BY miejsceWRegatach ASC) AS rn
+            FROM WynikiRundy
+        ),
+        PunktySezon AS (
+            SELECT Rok, Liga_Poziom, Klub, SUM(Punkty) AS PunktySezon
+            FROM WynikiRundy
+            GROUP BY Rok, Liga_Poziom, Klub
+        ),
+        TieBreak AS (
+            SELECT p.Rok, p.Liga_Poziom, p.Klub, p.PunktySezon,
+                   MIN(CASE WHEN m.rn = 1 THEN m.miejsceWRegatach END) AS best1,
+                   MIN(CASE WHEN m.rn = 2 THEN m.miejsceWRegatach END) AS best2,
+                   MIN(CASE WHEN m.rn = 3 THEN m.miejsceWRegatach END) AS best3,
+                   MIN(CASE WHEN m.rn = 4 THEN m.miejsceWRegatach END) AS best4
+            FROM PunktySezon p
+            LEFT JOIN MiejscaPosortowane m
+              ON m.Rok = p.Rok AND m.Liga_Poziom = p.Liga_Poziom AND m.Klub = p.Klub
+            GROUP BY p.Rok, p.Liga_Poziom, p.Klub, p.PunktySezon
+        )
+        SELECT t.*,
+               ROW_NUMBER() OVER (
+                 PARTITION BY t.Rok, t.Liga_Poziom
+                 ORDER BY t.PunktySezon DESC, t.best1 ASC, t.best2 ASC, t.best3 ASC, t.best4 ASC, t.Klub ASC
+               ) AS MiejsceWSezonie
+        FROM TieBreak t
+        ORDER BY t.Rok, t.Liga_Poziom, MiejsceWSezonie
+        """,
+        {"rok": None, "liga": None},
+    ),
+    Zapytanie(
+        "ranking_z_finalem",
+        "Klasyfikacja regat z podziałem GOLD/SILVER po finale (zapytanieOKlubyZFinałami)",
+        """
+        WITH
+        uniq AS (
+          SELECT m.ID_wariantu_klubu AS Klub, m.ID_wyscigu, MIN(m.Zajete_miejsce) AS miejsce
+          FROM liga_Miejsca m
+          GROUP BY m.ID_wariantu_klubu, m.ID_wyscigu
+        ),
+        pre AS (
+          SELECT w.ID_Regat, u.Klub, SUM(u.miejsce) AS pre_score
+          FROM uniq u
+          JOIN liga_Wyscigi w ON w.ID_wyscigu = u.ID_wyscigu
+          WHERE CAST(w.Numer_wyscigu AS UNSIGNED) <> 0
+          GROUP BY w.ID_Regat, u.Klub
+        ),
+        final AS (
+          SELECT w.ID_Regat, u.Klub, MIN(u.miejsce) AS final_score
+          FROM uniq u
+          JOIN liga_Wyscigi w ON w.ID_wyscigu = u.ID_wyscigu
+          WHERE CAST(w.Numer_wyscigu AS UNSIGNED) = 0
+          GROUP BY w.ID_Regat, u.Klub
+        ),
+        pre_ranked AS (
+          SELECT p.*,
+                 RANK() OVER (PARTITION BY p.ID_Regat ORDER BY p.pre_score ASC, p.Klub ASC) AS pre_rank,
+                 CEIL(COUNT(*) OVER (PARTITION BY p.ID_Regat) / 2.0)                       AS half_cnt
+          FROM pre p
+        ),
+        group_totals AS (
+          SELECT pr.ID_Regat, pr.Klub, pr.pre_score, pr.half_cnt,
+                 CASE WHEN pr.pre_rank <= pr.half_cnt THEN 'GOLD' ELSE 'SILVER' END AS grp,
+                 pr.pre_score + COALESCE(f.final_score, 0)                          AS total_in_group
+          FROM pre_ranked pr
+          LEFT JOIN final f ON f.ID_Regat = pr.ID_Regat AND f.Klub = pr.Klub
+        ),
+        group_places AS (
+          SELECT gt.*,
+                 ROW_NUMBER() OVER (PARTITION BY gt.ID_Regat, gt.grp
+                                    ORDER BY gt.total_in_group ASC, gt.Klub ASC) AS rn_in_grp
+          FROM group_totals gt
+        )
+        SELECT r.Rok, r.ID_Regat, r.Nazwa AS Nazwa_Regat, r.Liga_Poziom, r.Miasto, r.Numer_Rundy,
+               gp.Klub, k.Skrot, k.Nazwa AS Nazwa_Klubu,
+               gp.pre_score               AS Suma_Przefinalem,
+               COALESCE(f.final_score, 0) AS Wynik_Finalu,
+               gp.total_in_group          AS Suma_Po_Finalu,
+               gp.grp                     AS Final_Grupa,
+               CASE WHEN gp.grp = 'GOLD' THEN gp.rn_in_grp
+                    ELSE gp.half_cnt + gp.rn_in_grp END AS Miejsce_Koncowe
+        FROM group_places gp
+        JOIN liga_Regaty r           ON r.ID_Regat = gp.ID_Regat
+        LEFT JOIN liga_KlubWariant k ON k.ID_wariantu_klubu = gp.Klub
+        LEFT JOIN final f            ON f.ID_Regat = gp.ID_Regat AND f.Klub = gp.Klub
+        WHERE (:rok IS NULL OR r.Rok = :rok)
+          AND (:liga IS NULL OR r.Liga_Poziom = :liga)
+        ORDER BY r.Rok DESC, r.Numer_Rundy, r.Nazwa, Miejsce_Koncowe, k.Skrot
+        """,
+        {"rok": None, "liga": None},
+    ),
+)}
+
+
+def tabele_zapytania(sql: str) -> list:
+    """Tabele liga_* (db_loader.TABELE), których używa zapytanie – tylko one są ładowane."""
+    return [t for t in db_loader.TABELE if re.search(rf"\b{t.nazwa}\b", sql)]
+
+
+def _ceil(x):
+    return None if x is None else math.ceil(x)
+
+
+# -------------------------------
+# Silnik (SQLite w pamięci)
+# -------------------------------
+
+class Silnik:
+    """
+    SQLite w pamięci ze schematem init_updated.sql. Tabele ładowane są
+    przy pierwszym zapytaniu, które ich używa (bez kluczy obcych – ładujemy
+    tylko część tabel), potem zostają w pamięci do końca procesu.
+    """
+
+    def __init__(self, schema_path: str = db_loader.SCHEMA_PATH):
+        conn = sqlite3.connect(":memory:")
+        for nazwa in ("CEIL", "CEILING"):
+            conn.create_function(nazwa, 1, _ceil, deterministic=True)
+        self.polaczenie = db_loader.Polaczenie(conn, "?", "sqlite")
+        db_loader.utworz_schemat(self.polaczenie, schema_path)
+        self.zaladowane = set()
+
+    def zaladuj(self, tabele) -> None:
+        nowe = [t for t in tabele if t.nazwa not in self.zaladowane]
+        if nowe:
+            db_loader.zaladuj(self.polaczenie, nowe)
+            self.zaladowane.update(t.nazwa for t in nowe)
+
+    def zapytaj(self, sql: str, parametry: dict = None) -> pd.DataFrame:
+        self.zaladuj(tabele_zapytania(sql))
+        return pd.read_sql_query(sql, self.polaczenie.conn, params=parametry or {})
+
+    def zamknij(self) -> None:
+        self.polaczenie.zamknij()
+
+
+# -------------------------------
+# Cache wyników
+# -------------------------------
+
+def klucz_cache(sql: str, parametry: dict, schema_path: str = db_loader.SCHEMA_PATH) -> str:
+    """SHA1 zapytania, parametrów, schematu i zawartości plików wejściowych jego tabel."""
+    h = hashlib.sha1()
+    h.update(" ".join(sql.split()).encode("utf-8"))
+    h.update(json.dumps(parametry or {}, sort_keys=True, default=str).encode("utf-8"))
+    h.update(sha1_pliku(schema_path).encode("ascii"))
+    for tabela in tabele_zapytania(sql):
+        for path in db_loader.pliki_zrodlowe(tabela):
+            h.update(f"{tabela.nazwa}|{path}|{sha1_pliku(path)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class Sesja:
+    """Zapytania z cache wyników; silnik tworzony dopiero przy pierwszym chybieniu."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, schema_path: str = db_loader.SCHEMA_PATH):
+        self.cache_dir = cache_dir
+        self.schema_path = schema_path
+        self._silnik = None
+
+    @property
+    def silnik(self) -> Silnik:
+        if self._silnik is None:
+            self._silnik = Silnik(self.schema_path)
+        return self._silnik
+
+    def wykonaj(self, sql: str, parametry: dict = None, cache: bool = True):
+        """Zwraca (DataFrame, czy_z_cache)."""
+        path = None
+        if cache and self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{klucz_cache(sql, parametry, self.schema_path)}.csv")
+            if os.path.isfile(path):
+                return pd.read_csv(path), True
+
+        wynik = self.silnik.zapytaj(sql, parametry)
+
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.tmp"
+            wynik.to_csv(tmp, index=False)
+            os.replace(tmp, path)
+        return wynik, False
+
+    def zamknij(self) -> None:
+        if self._silnik is not None:
+            self._silnik.zamknij()
+
+
+# -------------------------------
+# MAIN
+# -------------------------------
+
+def _wartosc(tekst: str):
+    """Parametr z linii poleceń: liczba całkowita albo tekst."""
+    return int(tekst) if re.fullmatch(r"-?\d+", tekst) else tekst
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(
+        description="Zapytania PLŻ lokalnie: połączone CSV konwertera w SQLite w pamięci (init_updated.sql).")
+    ap.add_argument("zapytanie", nargs="?", choices=sorted(ZAPYTANIA), help="zapisane zapytanie")
+    ap.add_argument("--sql", help="dowolne zapytanie SQL (składnia SQLite)")
+    ap.add_argument("--plik", help="plik .sql z jednym zapytaniem")
+    ap.add_argument("-p", "--param", action="append", default=[], metavar="NAZWA=WARTOSC",
+                    help="parametr zapytania (:NAZWA), np. -p rok=2021 -p liga=Ekstraklasa")
+    ap.add_argument("--lista", action="store_true", help="pokaż zapisane zapytania i ich parametry")
+    ap.add_argument("--out", help="zapisz wynik do CSV")
+    ap.add_argument("--bez-cache", action="store_true", help="zawsze licz od nowa (i nie zapisuj do cache)")
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--schema", default=db_loader.SCHEMA_PATH, help="ścieżka do init_updated.sql")
+    ap.add_argument("--wiersze", type=int, default=30, help="ile wierszy wyniku wypisać (domyślnie 30)")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.lista:
+        for z in ZAPYTANIA.values():
+            parametry = ", ".join(f"{k}={v}" for k, v in z.parametry.items())
+            print(f"▶ {z.nazwa} – {z.opis}" + (f"  [{parametry}]" if parametry else ""))
+        return
+
+    podane = {}
+    for p in args.param:
+        nazwa, sep, wartosc = p.partition("=")
+        if not sep:
+            raise SystemExit(f"❌ Parametr musi mieć postać NAZWA=WARTOSC: {p}")
+        podane[nazwa.strip()] = _wartosc(wartosc.strip())
+
+    if sum(x is not None for x in (args.zapytanie, args.sql, args.plik)) != 1:
+        raise SystemExit("❌ Podaj dokładnie jedno: nazwę zapytania, --sql albo --plik (lista: --lista)")
+
+    if args.zapytanie:
+        z = ZAPYTANIA[args.zapytanie]
+        nieznane = set(podane) - set(z.parametry)
+        if nieznane:
+            raise SystemExit(f"❌ {z.nazwa} nie ma parametrów: {', '.join(sorted(nieznane))}")
+        brak = [k for k in z.wymagane if podane.get(k) is None]
+        if brak:
+            raise SystemExit(f"❌ {z.nazwa} wymaga parametrów: {', '.join(brak)} (-p {brak[0]}=...)")
+        sql, parametry = z.sql, {**z.parametry, **podane}
+    elif args.plik:
+        with open(args.plik, encoding="utf-8") as f:
+            sql, parametry = f.read(), podane
+    else:
+        sql, parametry = args.sql, podane
+
+    sesja = Sesja(None if args.bez_cache else args.cache_dir, args.schema)
+    start = time.perf_counter()
+    try:
+        wynik, z_cache = sesja.wykonaj(sql, parametry, cache=not args.bez_cache)
+    finally:
+        sesja.zamknij()
+    czas_ms = (time.perf_counter() - start) * 1000
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(wynik.head(args.wiersze).to_string(index=False))
+    if len(wynik) > args.wiersze:
+        print(f"… (+{len(wynik) - args.wiersze} wierszy)")
+    print(f"📊 {len(wynik)} wierszy w {czas_ms:.1f} ms" + (" (z cache)" if z_cache else ""))
+
+    if args.out:
+        folder = os.path.dirname(args.out)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        wynik.to_csv(args.out, index=False)
+        print(f"💾 Zapisano: {args.out}")
+
+
+if __name__ == "__main__":
+    main()